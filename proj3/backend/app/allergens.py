@@ -0,0 +1,107 @@
+"""
+Canonical allergen vocabulary and the ``allergen_mask`` bitmask.
+
+Every canonical allergen owns one bit. ``create_meal`` and ``update_meal``
+store ``allergen_mask``, the bits of everything in ``allergen_info``
+``contains`` and ``may_contain``, and allergen exclusion becomes a single
+``{"allergen_mask": {"$bitsAllClear": mask}}`` clause instead of a ``$nin``
+over free-text names.
+
+Names are matched after lowercasing and plural folding, so "Dairy",
+"dairy" and "Milk" set the same bit. Some names stand for several bits:
+"nuts" covers peanuts and tree nuts, and "wheat" also sets gluten.
+Names outside the vocabulary cannot be masked; ``allergen_exclusion``
+keeps excluding them by exact name as before.
+
+Bit positions are stored in MongoDB, so new allergens are only ever
+appended to ``ALLERGENS``.
+"""
+
+from typing import Iterable, List, Optional
+
+from .ingredients import normalize_ingredient
+
+# Canonical allergens in bit order (append only)
+ALLERGENS = (
+    "dairy", "eggs", "fish", "shellfish", "peanuts", "tree nuts", "wheat",
+    "gluten", "soy", "sesame", "corn", "coconut", "mustard", "celery",
+    "sulfites", "lupin",
+)
+ALLERGEN_BITS = {name: 1 << bit for bit, name in enumerate(ALLERGENS)}
+
+# Other names for canonical allergens (keys as normalize_ingredient gives them)
+_ALIASES = {
+    "milk": ("dairy",),
+    "lactose": ("dairy",),
+    "egg": ("eggs",),
+    "crustacean": ("shellfish",),
+    "shrimp": ("shellfish",),
+    "crab": ("shellfish",),
+    "lobster": ("shellfish",),
+    "peanut": ("peanuts",),
+    "nut": ("peanuts", "tree nuts"),
+    "tree nut": ("tree nuts",),
+    "almond": ("tree nuts",),
+    "walnut": ("tree nuts",),
+    "cashew": ("tree nuts",),
+    "pecan": ("tree nuts",),
+    "hazelnut": ("tree nuts",),
+    "pistachio": ("tree nuts",),
+    "wheat": ("wheat", "gluten"),
+    "soya": ("soy",),
+    "sesame seed": ("sesame",),
+    "sulphite": ("sulfites",),
+    "sulfite": ("sulfites",),
+}
+_MASKS = {normalize_ingredient(name): bit for name, bit in ALLERGEN_BITS.items()}
+_MASKS.update(
+    {
+        alias: sum(ALLERGEN_BITS[name] for name in names)
+        for alias, names in _ALIASES.items()
+    }
+)
+
+
+def allergen_bits(name: str) -> int:
+    """Mask for one allergen name, 0 if it is not in the vocabulary"""
+    return _MASKS.get(normalize_ingredient(name), 0)
+
+
+def allergen_names(mask: int) -> List[str]:
+    """Canonical allergens set in ``mask``, in bit order"""
+    return [name for name, bit in ALLERGEN_BITS.items() if mask & bit]
+
+
+def allergen_mask(meal: dict) -> int:
+    """Mask stored on a meal as ``allergen_mask`` (contains | may_contain)"""
+    info = meal.get("allergen_info") or {}
+    mask = 0
+    for name in (info.get("contains") or []) + (info.get("may_contain") or []):
+        mask |= allergen_bits(name)
+    return mask
+
+
+def allergen_exclusion(names: Optional[Iterable[str]]) -> dict:
+    """Query clauses excluding meals with any of ``names`` (empty if none).
+
+    Known allergens become one ``$bitsAllClear`` over ``allergen_mask``;
+    names outside the vocabulary fall back to an exact ``$nin``.
+    """
+    mask = 0
+    unknown = []
+    for name in names or ():
+        name = name.strip()
+        if not name:
+            continue
+        bits = allergen_bits(name)
+        if bits:
+            mask |= bits
+        elif name not in unknown:
+            unknown.append(name)
+
+    clauses = {}
+    if mask:
+        clauses["allergen_mask"] = {"$bitsAllClear": mask}
+    if unknown:
+        clauses["allergen_info.contains"] = {"$nin": unknown}
+    return clauses
@@ -0,0 +1,111 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Resolved principals are kept for a short time so protected routes do not
+# hit the users collection on every request. Set AUTH_CACHE_TTL_SECONDS=0 to
+# disable caching entirely.
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "1024"))
+
+
+class PrincipalCache:
+    """Size-bounded TTL cache of authenticated users keyed by bearer token.
+
+    Entries are evicted least-recently-used first once ``max_size`` is
+    reached. A reverse index from user id to tokens lets profile writes
+    refresh or drop every cached entry for that user.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries = OrderedDict()  # token -> (expires_at, user)
+        self._tokens_by_user = {}  # str(user _id) -> set of tokens
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    def get(self, token: str) -> Optional[dict]:
+        """Return the cached user for ``token`` or None on a miss."""
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user: dict) -> None:
+        """Cache ``user`` as the principal for ``token``."""
+        if not self.enabled:
+            return
+
+        if token in self._entries:
+            self._remove(token)
+
+        self._entries[token] = (time.monotonic() + self.ttl_seconds, user)
+        self._tokens_by_user.setdefault(str(user.get("_id")), set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def update_user(self, user: dict) -> None:
+        """Write-through: replace the cached document for every token of ``user``."""
+        tokens = self._tokens_by_user.get(str(user.get("_id")), ())
+        for token in tokens:
+            expires_at, _ = self._entries[token]
+            self._entries[token] = (expires_at, user)
+
+    def invalidate_user(self, user_id) -> None:
+        """Drop all cached entries belonging to ``user_id``."""
+        for token in list(self._tokens_by_user.get(str(user_id), ())):
+            self._remove(token)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_key = str(entry[1].get("_id"))
+        tokens = self._tokens_by_user.get(user_key)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_key]
+
+
+principal_cache = PrincipalCache(AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_SIZE)
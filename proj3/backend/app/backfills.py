@@ -0,0 +1,168 @@
+"""
+Resumable data backfills for fields derived from existing documents.
+
+Each backfill walks its collection in ``_id`` order in batches, writes the
+derived fields with one unordered ``bulk_write`` per batch and records the
+last ``_id`` it processed in the ``backfills`` collection, so an
+interrupted run picks up where it stopped. Run them with
+``tastebuddiez backfill <name>``.
+"""
+
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from .allergens import allergen_mask
+from .dietary import dietary_tags
+from .geo import geo_point
+from .ingredients import ingredient_tokens
+from .meal_cards import SNAPSHOT_FIELD, seller_snapshot
+
+PROGRESS_COLLECTION = "backfills"
+
+
+class Backfill:
+    """A derived-field backfill over one collection.
+
+    ``filter`` selects documents that still need the fields; ``transform``
+    returns the fields to ``$set`` for a document, or None to skip it.
+    With ``join=(collection, field)`` the documents each batch references
+    through ``field`` are fetched in one query, and ``transform`` gets the
+    referenced document (None if it is gone) as a second argument.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        collection: str,
+        filter: dict,
+        transform: Callable[[dict], Optional[dict]],
+        description: str = "",
+        join: Optional[Tuple[str, str]] = None,
+    ):
+        self.name = name
+        self.collection = collection
+        self.filter = filter
+        self.transform = transform
+        self.description = description
+        self.join = join
+
+
+def _meal_geo_fields(meal: dict) -> Optional[dict]:
+    location = meal.get("seller_location") or {}
+    point = geo_point(location.get("latitude"), location.get("longitude"))
+    return {"seller_location.geo": point} if point else None
+
+
+def _meal_dietary_tags(meal: dict) -> Optional[dict]:
+    return {"dietary_tags": dietary_tags(meal)}
+
+
+def _meal_ingredient_tokens(meal: dict) -> Optional[dict]:
+    return {"ingredient_tokens": ingredient_tokens(meal)}
+
+
+def _meal_allergen_mask(meal: dict) -> Optional[dict]:
+    return {"allergen_mask": allergen_mask(meal)}
+
+
+def _meal_seller_snapshot(meal: dict, seller: Optional[dict]) -> Optional[dict]:
+    return {SNAPSHOT_FIELD: seller_snapshot(seller)} if seller else None
+
+
+BACKFILLS = {
+    "meal-geo": Backfill(
+        name="meal-geo",
+        collection="meals",
+        filter={
+            "seller_location.geo": {"$exists": False},
+            "seller_location.latitude": {"$ne": None},
+        },
+        transform=_meal_geo_fields,
+        description="GeoJSON seller_location.geo point for the 2dsphere index",
+    ),
+    "meal-dietary-tags": Backfill(
+        name="meal-dietary-tags",
+        collection="meals",
+        filter={"dietary_tags": {"$exists": False}},
+        transform=_meal_dietary_tags,
+        description="dietary_tags derived from ingredients and allergen_info",
+    ),
+    "meal-ingredient-tokens": Backfill(
+        name="meal-ingredient-tokens",
+        collection="meals",
+        filter={"ingredient_tokens": {"$exists": False}},
+        transform=_meal_ingredient_tokens,
+        description="normalized ingredient_tokens for ingredient exclusion",
+    ),
+    "meal-allergen-mask": Backfill(
+        name="meal-allergen-mask",
+        collection="meals",
+        filter={"allergen_mask": {"$exists": False}},
+        transform=_meal_allergen_mask,
+        description="allergen_mask bits for allergen exclusion",
+    ),
+    "meal-seller-snapshot": Backfill(
+        name="meal-seller-snapshot",
+        collection="meals",
+        filter={SNAPSHOT_FIELD: {"$exists": False}},
+        transform=_meal_seller_snapshot,
+        description="seller name and rating snapshot for meal cards",
+        join=("users", "seller_id"),
+    ),
+}
+
+
+async def _joined(db, backfill: Backfill, batch: list) -> dict:
+    """Referenced documents of a batch by ``_id``"""
+    collection, field = backfill.join
+    ids = list({doc[field] for doc in batch if doc.get(field) is not None})
+    if not ids:
+        return {}
+    found = await db[collection].find({"_id": {"$in": ids}}).to_list(length=None)
+    return {doc["_id"]: doc for doc in found}
+
+
+async def run_backfill(
+    db, backfill: Backfill, batch_size: int = 500, restart: bool = False
+) -> dict:
+    """Run (or resume) a backfill to completion; returns the final progress"""
+    progress_collection = db[PROGRESS_COLLECTION]
+    progress = None if restart else await progress_collection.find_one({"_id": backfill.name})
+    if progress is None or progress.get("done"):
+        progress = {"_id": backfill.name, "last_id": None, "scanned": 0, "updated": 0}
+    progress["done"] = False
+
+    collection = db[backfill.collection]
+    while True:
+        query = dict(backfill.filter)
+        if progress["last_id"] is not None:
+            query["_id"] = {"$gt": progress["last_id"]}
+        batch = await collection.find(query).sort("_id", 1).limit(batch_size).to_list(
+            length=batch_size
+        )
+
+        joined = await _joined(db, backfill, batch) if backfill.join else None
+        updates = []
+        for doc in batch:
+            if joined is None:
+                fields = backfill.transform(doc)
+            else:
+                fields = backfill.transform(doc, joined.get(doc.get(backfill.join[1])))
+            if fields:
+                updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+
+        if batch:
+            progress["last_id"] = batch[-1]["_id"]
+        progress["scanned"] += len(batch)
+        progress["updated"] += len(updates)
+        progress["done"] = len(batch) < batch_size
+        progress["updated_at"] = datetime.utcnow()
+        await progress_collection.replace_one(
+            {"_id": backfill.name}, progress, upsert=True
+        )
+        if progress["done"]:
+            return progress
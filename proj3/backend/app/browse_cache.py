@@ -0,0 +1,207 @@
+"""
+Cache of serialized ``GET /api/meals/`` pages.
+
+Browse traffic repeats itself: the same city, the same cuisine, the same
+first page. Pages do not depend on who asks, so each worker keeps the JSON
+body and headers of recent pages keyed by the normalized filters (the
+MongoDB filter query, paging and cursor). Requests with a location are not
+cached: their distances and radius cut-off depend on the exact point, and
+rounding it would move meals across the radius edge.
+
+Concurrent misses for one key share a single fill (no stampede when a
+popular page expires). Meal writes drop the pages they can change: pages
+for the meal's cuisine (or any cuisine), plus pages showing a seller whose
+name or rating changed.
+Everything else ages out after ``BROWSE_CACHE_TTL_SECONDS``. Set it to 0
+to disable the cache.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional, Tuple
+
+BROWSE_CACHE_TTL_SECONDS = float(os.getenv("BROWSE_CACHE_TTL_SECONDS", "30"))
+BROWSE_CACHE_MAX_SIZE = int(os.getenv("BROWSE_CACHE_MAX_SIZE", "512"))
+BROWSE_CACHE_MAX_BYTES = int(os.getenv("BROWSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# A page as the handler returns it: body, headers, seller ids shown on it
+Page = Tuple[bytes, dict, Iterable]
+
+
+class _Scope:
+    """What a page depends on, for invalidation"""
+
+    __slots__ = ("cuisine", "sellers", "stale")
+
+    def __init__(self, cuisine: Optional[str]):
+        self.cuisine = cuisine
+        self.sellers = frozenset()
+        self.stale = False  # a write landed while the page was being filled
+
+    def covers(self, cuisine: Optional[str]) -> bool:
+        return self.cuisine is None or self.cuisine == cuisine
+
+
+class _Entry:
+    __slots__ = ("body", "headers", "expires_at", "scope", "size")
+
+    def __init__(self, body: bytes, headers: dict, expires_at: float, scope: _Scope):
+        self.body = body
+        self.headers = headers
+        self.expires_at = expires_at
+        self.scope = scope
+        self.size = len(body) + sum(len(k) + len(v) for k, v in headers.items())
+
+
+class BrowseCache:
+    """Size- and byte-bounded TTL cache of browse pages with single-flight fills.
+
+    Entries are evicted least-recently-used first once ``max_size`` entries
+    or ``max_bytes`` of bodies are held.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 30.0,
+        max_size: int = 512,
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> _Entry
+        self._fills = {}  # key -> (Task of the page, _Scope)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_size > 0
+
+    @staticmethod
+    def key(query: dict, *params) -> tuple:
+        """Cache key for a filter query and the paging parameters"""
+        return (json.dumps(query, sort_keys=True, default=str),) + params
+
+    async def get_or_fill(
+        self,
+        key: tuple,
+        cuisine: Optional[str],
+        fill: Callable[[], Awaitable[Page]],
+    ) -> Tuple[bytes, dict]:
+        """Body and headers of the page for ``key``, filling it on a miss.
+
+        ``fill`` runs at most once per key at a time; requests arriving
+        while it runs wait for its result (or its exception).
+        """
+        if not self.enabled:
+            body, headers, _ = await fill()
+            return body, headers
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.body, entry.headers
+            self._remove(key)
+
+        if key in self._fills:
+            self.coalesced += 1
+            task = self._fills[key][0]
+        else:
+            self.misses += 1
+            # A task of its own, so a disconnecting client does not cancel
+            # the fill other requests are waiting for
+            task = asyncio.ensure_future(fill())
+            scope = _Scope(cuisine)
+            self._fills[key] = (task, scope)
+            task.add_done_callback(lambda done: self._filled(key, scope, done))
+
+        body, headers, _ = await asyncio.shield(task)
+        return body, headers
+
+    def invalidate_meal(self, *meals: Optional[dict]) -> None:
+        """Drop pages a write to these meal versions (old and new) can change"""
+        for meal in meals:
+            if not meal:
+                continue
+            cuisine = meal.get("cuisine_type")
+            self._invalidate(lambda scope: scope.covers(cuisine))
+
+    def invalidate_seller(self, seller_id) -> None:
+        """Drop pages showing a seller whose name or rating changed"""
+        seller = str(seller_id)
+        self._invalidate(lambda scope: seller in scope.sellers)
+        # Sellers of a page are known only once it is filled
+        for _, scope in self._fills.values():
+            scope.stale = True
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for _, scope in self._fills.values():
+            scope.stale = True
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "in_flight": len(self._fills),
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _filled(self, key: tuple, scope: _Scope, task: asyncio.Task) -> None:
+        if self._fills.get(key, (None,))[0] is task:
+            del self._fills[key]
+        if task.cancelled() or task.exception() is not None or scope.stale:
+            return
+        body, headers, sellers = task.result()
+        scope.sellers = frozenset(str(seller) for seller in sellers)
+        entry = _Entry(body, dict(headers), time.monotonic() + self.ttl_seconds, scope)
+        if entry.size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while len(self._entries) > self.max_size or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _invalidate(self, matches: Callable[[_Scope], bool]) -> None:
+        for key in [key for key, entry in self._entries.items() if matches(entry.scope)]:
+            self._remove(key)
+            self.invalidations += 1
+        for _, scope in self._fills.values():
+            if matches(scope):
+                scope.stale = True
+
+    def _remove(self, key: tuple) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+
+browse_cache = BrowseCache(
+    BROWSE_CACHE_TTL_SECONDS,
+    BROWSE_CACHE_MAX_SIZE,
+    BROWSE_CACHE_MAX_BYTES,
+)
@@ -1,20 +1,90 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo.server_api import ServerApi
+import importlib.util
 import os
 from dotenv import load_dotenv
 
+from .metrics import command_metrics
+from .pool_metrics import pool_metrics
+from .query_accounting import query_accounting
+from .slow_queries import slow_query_log
+
 load_dotenv()  # Load environment variables from .env file
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://mongodb:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "myapp")
 
+# Connection pool tuning (unset values fall back to the driver defaults)
+MONGO_MAX_POOL_SIZE = os.getenv("MONGO_MAX_POOL_SIZE")
+MONGO_MIN_POOL_SIZE = os.getenv("MONGO_MIN_POOL_SIZE")
+MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+MONGO_WAIT_QUEUE_TIMEOUT_MS = os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS")
+# Comma-separated, in order of preference, e.g. "zstd,snappy,zlib"
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_ZLIB_LEVEL = os.getenv("MONGO_ZLIB_LEVEL")
+
+# Python packages each wire compressor needs (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
 client = None
 database = None
+client_config = {}
+
+
+def available_compressors(requested: str) -> list:
+    """Filter requested compressors down to the ones importable here"""
+    compressors = []
+    for name in (c.strip().lower() for c in requested.split(",")):
+        if not name:
+            continue
+        module = _COMPRESSOR_MODULES.get(name)
+        if module is None or importlib.util.find_spec(module) is None:
+            print(f"⚠️ MongoDB compressor '{name}' unavailable, skipping")
+            continue
+        compressors.append(name)
+    return compressors
+
+
+def client_options() -> dict:
+    """Keyword arguments for AsyncIOMotorClient built from the environment"""
+    options = {
+        "server_api": ServerApi("1"),
+        "event_listeners": [
+            pool_metrics,
+            command_metrics,
+            slow_query_log,
+            query_accounting,
+        ],
+    }
+
+    int_options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+    for name, value in int_options.items():
+        if value not in (None, ""):
+            options[name] = int(value)
+
+    compressors = available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+        if "zlib" in compressors and MONGO_ZLIB_LEVEL not in (None, ""):
+            options["zlibCompressionLevel"] = int(MONGO_ZLIB_LEVEL)
+
+    return options
 
 
 async def connect_to_mongo():
-    global client, database
-    client = AsyncIOMotorClient(MONGODB_URL, server_api=ServerApi("1"))
+    global client, database, client_config
+    options = client_options()
+    client_config = {
+        key: value
+        for key, value in options.items()
+        if key not in ("server_api", "event_listeners")
+    }
+    client = AsyncIOMotorClient(MONGODB_URL, **options)
     database = client[DATABASE_NAME]
     print(f"Connected to MongoDB at {MONGODB_URL}")
 
@@ -27,3 +97,8 @@ async def close_mongo_connection():
 
 def get_database():
     return database
+
+
+def pool_diagnostics() -> dict:
+    """Configured pool options plus live CMAP metrics"""
+    return {"options": client_config, "servers": pool_metrics.stats()}
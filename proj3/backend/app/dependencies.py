@@ -1,66 +1,126 @@
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
+from bson import ObjectId
+import os
 from .database import get_database
+from .auth_cache import principal_cache
+from .tokens import decode_token, looks_like_jwt, TokenError
 
 security = HTTPBearer()
 # Optional bearer that does not raise if header is missing (useful for upload endpoints)
 security_optional = HTTPBearer(auto_error=False)
 
+# The legacy scheme sends the account email as the bearer, so anyone who
+# knows an email can act as that user. The frontend still uses it, so it
+# stays on by default; set AUTH_ALLOW_EMAIL_TOKENS=0 once clients send
+# access tokens.
+ALLOW_EMAIL_TOKENS = os.getenv("AUTH_ALLOW_EMAIL_TOKENS", "1") == "1"
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-) -> dict:
-    """
-    Dependency to get the current authenticated user from token.
-    For now, this is a simple implementation. You'll want to add JWT later.
+
+def _is_verified(user: dict) -> bool:
+    """Accept truthy values for verified (bool True or string 'true')"""
+    verified_val = user.get("verified")
+    if isinstance(verified_val, bool):
+        return verified_val
+    if isinstance(verified_val, str):
+        return verified_val.lower() in ("true", "1", "yes")
+    return False
+
+
+def principal_cache_key(user_id) -> str:
+    """Cache key for principals resolved from signed tokens"""
+    return f"user:{user_id}"
+
+
+async def _load_user_by_id(user_id: str) -> Optional[dict]:
+    """Return the user document for a validated token subject.
+
+    Login and refresh prime the cache, so this only reaches the database
+    after the cache entry has expired or been invalidated.
     """
+    key = principal_cache_key(user_id)
+    user = principal_cache.get(key)
+    if user is not None:
+        return user
+
     db = get_database()
+    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    if user and _is_verified(user):
+        principal_cache.set(key, user)
+    return user
 
-    if not credentials:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
-        )
 
-    # Simple token validation (replace with JWT in production)
-    try:
-        # Extract token (assuming "Bearer <email>" format temporarily)
-        token = credentials.credentials
-        print(f"[auth] token received: {repr(token)}")
-        user = await db.users.find_one({"email": token})
-
-        # Debugging: print retrieved user summary
-        if user:
-            print(
-                f"[auth] found user: _id={user.get('_id')} email={user.get('email')}"
-                f" verified={user.get('verified')}"
-            )
-        else:
-            print(f"[auth] no user found for token: {repr(token)}")
+async def _load_user_by_email(token: str) -> Optional[dict]:
+    """Legacy lookup for clients that send the account email as the bearer"""
+    user = principal_cache.get(token)
+    if user is not None:
+        return user
 
-        if not user:
+    db = get_database()
+    user = await db.users.find_one({"email": token})
+    if user and _is_verified(user):
+        principal_cache.set(token, user)
+    return user
+
+
+async def _authenticate(token: str) -> dict:
+    """Resolve a bearer token to a verified user or raise HTTPException"""
+    if looks_like_jwt(token):
+        try:
+            claims = decode_token(token)
+        except TokenError as e:
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
+                status_code=status.HTTP_401_UNAUTHORIZED, detail=e.detail
             )
 
-        # Accept truthy values for verified (bool True or string 'true')
-        verified_val = user.get("verified")
-        is_verified = False
-        if isinstance(verified_val, bool):
-            is_verified = verified_val
-        elif isinstance(verified_val, str):
-            is_verified = verified_val.lower() in ("true", "1", "yes")
-
-        if not is_verified:
-            print(
-                f"[auth] user present but not verified according to DB value: {repr(verified_val)}"
-            )
+        # Signature and claims are enough to reject unverified accounts
+        if not claims["verified"]:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified"
             )
+        if not ObjectId.is_valid(claims["sub"]):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication credentials",
+            )
 
-        return user
+        user = await _load_user_by_id(claims["sub"])
+    elif ALLOW_EMAIL_TOKENS:
+        user = await _load_user_by_email(token)
+    else:
+        user = None
+
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    if not _is_verified(user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified"
+        )
+
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+) -> dict:
+    """
+    Dependency to get the current authenticated user from token.
+
+    Signed access tokens issued by /api/auth/login are validated locally;
+    the matching user document is served from the principal cache.
+    """
+    if not credentials:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
+        )
+
+    try:
+        return await _authenticate(credentials.credentials)
     except HTTPException:
         raise
     except Exception as e:
@@ -71,6 +131,15 @@ async def get_current_user(
         )
 
 
+async def get_current_admin(current_user: dict = Depends(get_current_user)) -> dict:
+    """Dependency for admin-only endpoints: the current user, if an admin"""
+    if current_user.get("role") != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required"
+        )
+    return current_user
+
+
 async def get_optional_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security_optional),
 ) -> Optional[dict]:
@@ -79,25 +148,10 @@ async def get_optional_current_user(
     This allows endpoints to accept uploads from anonymous users during development.
     It will not raise if the Authorization header is missing or invalid.
     """
-    db = get_database()
     if not credentials:
         return None
 
     try:
-        token = credentials.credentials
-        user = await db.users.find_one({"email": token})
-        # Accept truthy values for verified similar to get_current_user
-        if not user:
-            return None
-        verified_val = user.get("verified")
-        is_verified = False
-        if isinstance(verified_val, bool):
-            is_verified = verified_val
-        elif isinstance(verified_val, str):
-            is_verified = verified_val.lower() in ("true", "1", "yes")
-
-        if not is_verified:
-            return None
-        return user
+        return await _authenticate(credentials.credentials)
     except Exception:
         return None
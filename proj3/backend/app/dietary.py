@@ -0,0 +1,241 @@
+"""
+Dietary restriction rules and the ``dietary_tags`` derived from them.
+
+A meal satisfies a restriction when none of the restriction's excluded
+ingredients appear in its ``ingredients`` text and none of its excluded
+allergens appear in ``allergen_info.contains``. ``create_meal`` and
+``update_meal`` store the restrictions a meal satisfies as
+``dietary_tags`` so browse queries can filter with ``$all`` in MongoDB.
+
+Terms match at the start of a word, so plurals and compounds still count
+("eggs", "meatballs", "breadcrumbs") but terms inside other words do not
+("rice" in "licorice", "corn" in "peppercorn"). The rules of a set of
+restrictions are compiled into one regex per field, cached per set, and
+checked in a single scan of each field.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+DIETARY_RESTRICTIONS = (
+    "vegetarian", "vegan", "pescatarian", "gluten-free",
+    "dairy-free", "nut-free", "keto", "paleo",
+)
+
+
+DIETARY_RULES = {
+    "vegetarian": {
+        "ingredients": [
+            "beef",
+            "pork",
+            "chicken",
+            "turkey",
+            "lamb",
+            "meat",
+            "fish",
+            "seafood",
+            "shrimp",
+            "salmon",
+            "tuna",
+        ],
+        "allergens": [],
+    },
+    "vegan": {
+        "ingredients": [
+            "beef",
+            "pork",
+            "chicken",
+            "turkey",
+            "lamb",
+            "meat",
+            "fish",
+            "seafood",
+            "shrimp",
+            "cheese",
+            "butter",
+            "cream",
+            "milk",
+            "yogurt",
+            "honey",
+            "egg",
+        ],
+        "allergens": ["dairy", "eggs", "milk"],
+    },
+    "pescatarian": {
+        "ingredients": ["beef", "pork", "chicken", "turkey", "lamb", "meat"],
+        "allergens": [],
+    },
+    "gluten-free": {
+        "ingredients": [
+            "wheat",
+            "flour",
+            "bread",
+            "pasta",
+            "barley",
+            "rye",
+            "noodles",
+        ],
+        "allergens": ["wheat", "gluten"],
+    },
+    "dairy-free": {
+        "ingredients": [
+            "cheese",
+            "butter",
+            "cream",
+            "milk",
+            "yogurt",
+            "whey",
+            "casein",
+        ],
+        "allergens": ["dairy", "milk"],
+    },
+    "nut-free": {
+        "ingredients": [
+            "peanut",
+            "almond",
+            "walnut",
+            "cashew",
+            "pecan",
+            "hazelnut",
+            "pistachio",
+        ],
+        "allergens": ["peanuts", "tree nuts", "nuts"],
+    },
+    "keto": {
+        "ingredients": [
+            "bread",
+            "pasta",
+            "rice",
+            "potato",
+            "sugar",
+            "flour",
+            "noodles",
+            "corn",
+        ],
+        "allergens": [],
+    },
+    "paleo": {
+        "ingredients": [
+            "bread",
+            "pasta",
+            "rice",
+            "bean",
+            "lentil",
+            "dairy",
+            "sugar",
+            "flour",
+        ],
+        "allergens": [],
+    },
+}
+_NO_RULES = {"ingredients": [], "allergens": []}
+
+
+def get_dietary_exclusions(dietary_restriction: str):
+    """Get ingredients and allergens to exclude based on dietary restriction"""
+    return DIETARY_RULES.get(dietary_restriction.lower(), _NO_RULES)
+
+
+def _compile_terms(term_restrictions: dict):
+    """One word-start regex for all terms, longest first.
+
+    The longest term wins at any position, so each term also carries the
+    restrictions of the terms that are its prefixes (they matched too).
+    """
+    if not term_restrictions:
+        return None, {}
+    violates = {
+        term: frozenset().union(
+            *(names for other, names in term_restrictions.items() if term.startswith(other))
+        )
+        for term in term_restrictions
+    }
+    alternation = "|".join(re.escape(term) for term in sorted(violates, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})"), violates
+
+
+class DietaryMatcher:
+    """The exclusion rules of a set of restrictions, compiled for one pass per field"""
+
+    def __init__(self, restrictions: Iterable[str]):
+        self.restrictions = tuple(restrictions)
+        ingredients, allergens = {}, {}
+        for restriction in self.restrictions:
+            rules = get_dietary_exclusions(restriction)
+            for term in rules["ingredients"]:
+                ingredients.setdefault(term.lower(), set()).add(restriction)
+            for term in rules["allergens"]:
+                allergens.setdefault(term.lower(), set()).add(restriction)
+        self._ingredients, self._ingredient_violations = _compile_terms(ingredients)
+        self._allergens, self._allergen_violations = _compile_terms(allergens)
+
+    def _texts(self, meal: dict):
+        ingredients = (meal.get("ingredients") or "").lower()
+        allergens = "\n".join((meal.get("allergen_info") or {}).get("contains") or []).lower()
+        return (
+            (self._ingredients, self._ingredient_violations, ingredients),
+            (self._allergens, self._allergen_violations, allergens),
+        )
+
+    def violated(self, meal: dict) -> set:
+        """Restrictions of this set that the meal breaks"""
+        broken = set()
+        for pattern, violations, text in self._texts(meal):
+            if pattern is not None and text:
+                for match in pattern.finditer(text):
+                    broken |= violations[match.group()]
+        return broken
+
+    def satisfied(self, meal: dict) -> List[str]:
+        """Restrictions of this set that the meal keeps, in set order"""
+        broken = self.violated(meal)
+        return [r for r in self.restrictions if r not in broken]
+
+    def matches(self, meal: dict) -> bool:
+        """True if the meal keeps every restriction of the set"""
+        for pattern, _, text in self._texts(meal):
+            if pattern is not None and text and pattern.search(text):
+                return False
+        return True
+
+
+@lru_cache(maxsize=256)
+def _matcher(restrictions: tuple) -> DietaryMatcher:
+    return DietaryMatcher(restrictions)
+
+
+def dietary_matcher(restrictions: Iterable[str]) -> DietaryMatcher:
+    """Compiled matcher for a restriction combination, cached per combination"""
+    names = sorted({r.lower() for r in restrictions if r.lower() in DIETARY_RULES})
+    return _matcher(tuple(names))
+
+
+def check_meal_matches_dietary_restriction(
+    meal: dict, dietary_restriction: str
+) -> bool:
+    """Check if a meal matches a dietary restriction"""
+    return dietary_matcher([dietary_restriction]).matches(meal)
+
+
+def meal_matches_restrictions(meal: dict, restrictions: Iterable[str]) -> bool:
+    """Check a meal against ALL of a user's restrictions in one pass"""
+    return dietary_matcher(restrictions).matches(meal)
+
+
+def dietary_tags(meal: dict) -> List[str]:
+    """Restrictions a meal satisfies, stored on the meal as ``dietary_tags``"""
+    return _matcher(DIETARY_RESTRICTIONS).satisfied(meal)
+
+
+def dietary_tags_filter(restrictions) -> Optional[dict]:
+    """``dietary_tags`` clause for meals matching ALL restrictions, or None.
+
+    Names without rules never excluded anything, so they are ignored.
+    """
+    wanted = []
+    for restriction in restrictions or ():
+        restriction = restriction.lower()
+        if restriction in DIETARY_RESTRICTIONS and restriction not in wanted:
+            wanted.append(restriction)
+    return {"$all": wanted} if wanted else None
@@ -0,0 +1,49 @@
+"""
+ETags and ``304 Not Modified`` responses for conditional GETs.
+
+A resource's ETag is a hash of the fields that say which version of it a
+response shows (``updated_at`` and the like), not of the response body, so
+handlers can answer ``If-None-Match`` from a projection of those fields
+before loading or serializing anything.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import Response
+
+# Meal views change on every read and have to reach the server to count
+MEAL_CACHE_CONTROL = "no-cache"
+# Profiles and review summaries: reuse for a short while, then revalidate
+USER_CACHE_CONTROL = "private, max-age=30, must-revalidate"
+REVIEWS_CACHE_CONTROL = "public, max-age=30, must-revalidate"
+
+
+def etag(*parts, weak: bool = False) -> str:
+    """Quoted ETag for a resource version made of ``parts``"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"' if weak else f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an ``If-None-Match`` header names ``tag`` (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def set_etag(response: Response, tag: str, cache_control: str) -> None:
+    """Validator headers for a full (200) response"""
+    response.headers["ETag"] = tag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(tag: str, cache_control: str) -> Response:
+    """Empty 304 response carrying the validator headers"""
+    return Response(status_code=304, headers={"ETag": tag, "Cache-Control": cache_control})
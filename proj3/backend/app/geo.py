@@ -0,0 +1,161 @@
+"""
+GeoJSON helpers for meal locations and ``$geoNear`` queries.
+
+Meals keep ``seller_location.latitude``/``longitude`` for display and store
+the same position as a GeoJSON point in ``seller_location.geo``, which is
+covered by a 2dsphere index. MongoDB measures spherical distances in meters.
+
+``batch_distances``/``nearest_within`` compute many distances at once with
+NumPy when it is installed and fall back to a plain loop otherwise.
+"""
+
+import math
+from typing import Optional, Sequence
+
+from bson import ObjectId
+
+try:
+    import numpy as np
+except ImportError:  # optional; batch distances fall back to a Python loop
+    np = None
+
+GEO_FIELD = "seller_location.geo"
+METERS_PER_MILE = 1609.344
+DISTANCE_FIELD = "distance_meters"
+# Radius MongoDB uses for spherical distances
+EARTH_RADIUS_METERS = 6378100.0
+# Below this many points NumPy's call overhead outweighs the vectorization
+NUMPY_MIN_BATCH = 64
+
+
+def geo_point(latitude, longitude) -> Optional[dict]:
+    """GeoJSON point for a coordinate pair, or None if it is missing or invalid"""
+    if latitude is None or longitude is None:
+        return None
+    try:
+        lat, lon = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    # GeoJSON order is [longitude, latitude]
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def meters_to_miles(meters: float) -> float:
+    return round(meters / METERS_PER_MILE, 1)
+
+
+def _haversine(lat1: float, cos_lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + cos_lat1 * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_METERS * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def batch_distances(
+    latitude: float, longitude: float, lats: Sequence[float], lons: Sequence[float]
+):
+    """Spherical distances in meters from one point to many (degrees in).
+
+    Returns a NumPy array for batches of ``NUMPY_MIN_BATCH`` or more points
+    when NumPy is installed, else a list.
+    """
+    lat1 = math.radians(latitude)
+    cos_lat1 = math.cos(lat1)
+    if np is not None and len(lats) >= NUMPY_MIN_BATCH:
+        lat2 = np.radians(np.asarray(lats, dtype=np.float64))
+        dlon = np.radians(np.asarray(lons, dtype=np.float64) - longitude)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + cos_lat1 * np.cos(lat2) * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+    lon1 = math.radians(longitude)
+    return [
+        _haversine(lat1, cos_lat1, lon1, math.radians(lat2), math.radians(lon2))
+        for lat2, lon2 in zip(lats, lons)
+    ]
+
+
+def nearest_within(
+    latitude: float,
+    longitude: float,
+    lats: Sequence[float],
+    lons: Sequence[float],
+    max_distance: Optional[float] = None,
+    min_distance: Optional[float] = None,
+):
+    """Distances, radius mask and nearest-first order in one pass.
+
+    Returns ``(order, distances)``: the indices of the points with
+    ``min_distance < distance <= max_distance`` sorted by distance, and the
+    distances of all points in meters.
+    """
+    distances = batch_distances(latitude, longitude, lats, lons)
+    if not isinstance(distances, list):
+        mask = np.ones(len(distances), dtype=bool)
+        if max_distance is not None:
+            mask &= distances <= max_distance
+        if min_distance is not None:
+            mask &= distances > min_distance
+        selected = np.flatnonzero(mask)
+        order = selected[np.argsort(distances[selected], kind="stable")]
+        return order.tolist(), distances.tolist()
+
+    order = [
+        i
+        for i, distance in enumerate(distances)
+        if (max_distance is None or distance <= max_distance)
+        and (min_distance is None or distance > min_distance)
+    ]
+    order.sort(key=distances.__getitem__)
+    return order, distances
+
+
+def geo_near_pipeline(
+    query: dict,
+    latitude: float,
+    longitude: float,
+    max_distance_miles: Optional[float] = None,
+    after: Optional[tuple] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> list:
+    """Aggregation returning meals nearest first with a ``distance_meters`` field.
+
+    ``after`` is the ``(distance_meters, _id)`` of the last meal on the
+    previous page. ``minDistance`` lets the index skip everything closer and
+    the ``_id`` tie-break keeps meals at the same distance from repeating.
+    """
+    geo_near = {
+        "near": {"type": "Point", "coordinates": [longitude, latitude]},
+        "key": GEO_FIELD,
+        "distanceField": DISTANCE_FIELD,
+        "spherical": True,
+        "query": query,
+    }
+    if max_distance_miles is not None:
+        geo_near["maxDistance"] = max_distance_miles * METERS_PER_MILE
+
+    pipeline = []
+    if after is not None:
+        last_distance, last_id = after
+        geo_near["minDistance"] = last_distance
+        pipeline.append({"$geoNear": geo_near})
+        pipeline.append(
+            {
+                "$match": {
+                    "$or": [
+                        {DISTANCE_FIELD: {"$gt": last_distance}},
+                        {DISTANCE_FIELD: last_distance, "_id": {"$gt": ObjectId(last_id)}},
+                    ]
+                }
+            }
+        )
+    else:
+        pipeline.append({"$geoNear": geo_near})
+
+    pipeline.append({"$sort": {DISTANCE_FIELD: 1, "_id": 1}})
+    if skip and after is None:
+        pipeline.append({"$skip": skip})
+    pipeline.append({"$limit": limit})
+    return pipeline
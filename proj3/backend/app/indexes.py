@@ -0,0 +1,217 @@
+"""
+Declarative registry of every MongoDB index the application relies on.
+
+Indexes are declared per collection and created in bulk with
+``create_indexes`` (one round trip per collection, collections in
+parallel). Unique indexes get a call of their own: a build that fails on
+existing duplicates then leaves the collection's other indexes in place.
+``index_report`` compares the registry with the live database and is used
+by ``tastebuddiez indexes``.
+"""
+
+import asyncio
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+
+# Options that change index behaviour and therefore count as drift
+_COMPARED_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "meals": [
+        # get_my_meals: seller's listings newest first
+        IndexModel([("seller_id", ASCENDING), ("created_at", DESCENDING)]),
+        # get_meals / get_recommended_meals: available meals newest first,
+        # _id breaks created_at ties for cursor pages
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)]),
+        # get_meals with a cuisine filter
+        IndexModel(
+            [
+                ("status", ASCENDING),
+                ("cuisine_type", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ]
+        ),
+        # get_meals / get_recommended_meals with dietary restrictions
+        # (multikey; $all uses one tag for the index bounds)
+        IndexModel(
+            [
+                ("status", ASCENDING),
+                ("dietary_tags", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ]
+        ),
+        # exclude_ingredients / avoid_ingredients: $nin over the
+        # multikey ingredient_tokens
+        IndexModel([("status", ASCENDING), ("ingredient_tokens", ASCENDING)]),
+        # $geoNear in get_meals / get_recommended_meals
+        IndexModel([("seller_location.geo", GEOSPHERE)]),
+        # search_meals before the in-process search index is built
+        IndexModel(
+            [
+                ("title", TEXT),
+                ("description", TEXT),
+                ("ingredients", TEXT),
+                ("cuisine_type", TEXT),
+            ],
+            weights={"title": 3, "cuisine_type": 2, "ingredients": 1, "description": 1},
+            name="meal_text",
+        ),
+    ],
+    "verification_tokens": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        # verify_user / verify_email / resend_verification
+        IndexModel([("email", ASCENDING), ("token_type", ASCENDING)]),
+    ],
+    "reviews": [
+        # One review per meal per reviewer; also serves create_review's check
+        IndexModel([("meal_id", ASCENDING), ("reviewer_id", ASCENDING)], unique=True),
+        # get_meal_reviews
+        IndexModel([("meal_id", ASCENDING), ("created_at", DESCENDING)]),
+        # get_user_reviews / update_seller_stats
+        IndexModel([("seller_id", ASCENDING), ("created_at", DESCENDING)]),
+        # get_my_reviews
+        IndexModel([("reviewer_id", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "disputes": [
+        IndexModel([("transaction_id", ASCENDING)], unique=True),
+        IndexModel([("buyer_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("seller_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]),
+    ],
+    "transactions": [
+        # get_my_orders
+        IndexModel([("buyer_id", ASCENDING), ("created_at", DESCENDING)]),
+        # get_my_sales
+        IndexModel([("seller_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexModel([("meal_id", ASCENDING)]),
+        IndexModel([("status", ASCENDING)]),
+    ],
+    "events": [
+        # my_events: each $or branch gets its own index
+        IndexModel([("organizer_id", ASCENDING)]),
+        IndexModel([("attendees", ASCENDING)]),
+    ],
+    "email_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+    ],
+}
+
+
+def _normalize_key(key) -> tuple:
+    """Turn a key spec (SON, dict or list of pairs) into a comparable tuple"""
+    items = key.items() if hasattr(key, "items") else key
+    return tuple((field, direction) for field, direction in items)
+
+
+def _text_key(spec: dict) -> tuple:
+    """Key of a text index as declared, with the weights of its fields.
+
+    Live text indexes report ``{"_fts": "text", "_ftsx": 1}`` as their key
+    and list the indexed fields under ``weights``.
+    """
+    key = _normalize_key(spec["key"])
+    weights = spec.get("weights") or {
+        field: 1 for field, direction in key if direction == TEXT
+    }
+    return tuple((field, TEXT, weight) for field, weight in sorted(weights.items()))
+
+
+def _signature(spec: dict) -> tuple:
+    """Key plus behaviour-changing options of an index document"""
+    options = tuple(
+        (opt, spec[opt]) for opt in _COMPARED_OPTIONS if spec.get(opt) not in (None, False)
+    )
+    key = _normalize_key(spec["key"])
+    if any(direction == TEXT for _, direction in key):
+        key = _text_key(spec)
+    return key, options
+
+
+def _batches(models: list) -> list:
+    """Split models into create_indexes calls: all non-unique ones, then each unique one"""
+    shared = [model for model in models if not model.document.get("unique")]
+    unique = [[model] for model in models if model.document.get("unique")]
+    return ([shared] if shared else []) + unique
+
+
+async def _create_for_collection(db, name: str, models: list) -> dict:
+    created, errors = [], []
+    for batch in _batches(models):
+        try:
+            created += await db[name].create_indexes(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                errors.append(f"{batch[0].document['name']}: {e}")
+            else:
+                errors.append(str(e))
+    return {"collection": name, "created": created, "error": "; ".join(errors) or None}
+
+
+async def ensure_indexes(db, registry: dict = INDEXES) -> list:
+    """Create every declared index; collections are handled concurrently.
+
+    Errors are reported per collection rather than raised so one conflicting
+    index does not stop the rest from being built. A unique index that
+    cannot be built because of duplicate documents is named in the error;
+    remove the duplicates and run ``tastebuddiez indexes --apply``.
+    """
+    return await asyncio.gather(
+        *(_create_for_collection(db, name, models) for name, models in registry.items())
+    )
+
+
+async def _index_usage(collection) -> dict:
+    """Map index name -> access count since the server last restarted"""
+    usage = {}
+    try:
+        async for stat in collection.aggregate([{"$indexStats": {}}]):
+            usage[stat["name"]] = stat.get("accesses", {}).get("ops", 0)
+    except Exception:
+        # $indexStats needs clusterMonitor on some deployments
+        return {}
+    return usage
+
+
+def diff_indexes(declared: list, live: list, usage: dict = None) -> dict:
+    """Compare declared IndexModel documents with live index documents.
+
+    Returns the names/keys of missing, undeclared ("extra") and unused
+    indexes. The mandatory ``_id_`` index is never reported.
+    """
+    usage = usage or {}
+    live = [spec for spec in live if spec.get("name") != "_id_"]
+    live_signatures = {_signature(spec): spec["name"] for spec in live}
+    declared_signatures = {_signature(spec): spec for spec in declared}
+
+    missing = [
+        {"name": spec.get("name"), "key": list(sig[0]), "options": dict(sig[1])}
+        for sig, spec in declared_signatures.items()
+        if sig not in live_signatures
+    ]
+    extra = [
+        {"name": name, "key": list(sig[0]), "options": dict(sig[1])}
+        for sig, name in live_signatures.items()
+        if sig not in declared_signatures
+    ]
+    unused = [
+        spec["name"] for spec in live if spec["name"] in usage and usage[spec["name"]] == 0
+    ]
+    return {"missing": missing, "extra": extra, "unused": unused}
+
+
+async def index_report(db, registry: dict = INDEXES) -> dict:
+    """Drift report for every collection in the registry"""
+    report = {}
+    for name, models in registry.items():
+        collection = db[name]
+        live = [spec async for spec in collection.list_indexes()]
+        usage = await _index_usage(collection)
+        declared = [model.document for model in models]
+        report[name] = diff_indexes(declared, live, usage)
+    return report
@@ -0,0 +1,68 @@
+"""
+Normalized ingredient tokens for indexable ingredient exclusion.
+
+``MealCreate.ingredients`` is a comma-separated string. ``create_meal``
+and ``update_meal`` store ``ingredient_tokens`` next to it: every run of
+consecutive words of every listed ingredient, normalized and deduplicated
+("extra virgin olive oil" gives "olive oil", "oil", "extra virgin", ...).
+Excluding an ingredient is then an exact ``$nin`` over that multikey
+array instead of an unanchored case-insensitive regex per ingredient.
+
+Normalization lowercases, keeps letters and digits only and folds simple
+plurals ("Tomatoes" -> "tomato", "eggs" -> "egg"), and is applied to both
+the stored tokens and the excluded names, so excluding "Peanuts" drops
+a meal listing "peanut butter" and excluding "olive oil" drops one listing
+"Extra Virgin Olive Oil", but excluding "rice" keeps "licorice".
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Longer ingredient names add their full phrase and runs of up to this many words
+MAX_PHRASE_WORDS = 4
+
+
+def _singular(word: str) -> str:
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def normalize_words(text: str) -> List[str]:
+    """Lowercased, plural-folded words of any text"""
+    return [_singular(word) for word in _WORD.findall((text or "").lower())]
+
+
+def normalize_ingredient(name: str) -> str:
+    """Canonical phrase for one ingredient name ("" if it has no words)"""
+    return " ".join(normalize_words(name))
+
+
+def ingredient_tokens(meal: dict) -> List[str]:
+    """Tokens stored on a meal as ``ingredient_tokens``, in listing order"""
+    tokens = {}
+    for name in (meal.get("ingredients") or "").split(","):
+        words = normalize_ingredient(name).split()
+        if words:
+            tokens.setdefault(" ".join(words), None)
+        for size in range(min(len(words), MAX_PHRASE_WORDS), 0, -1):
+            for start in range(len(words) - size + 1):
+                tokens.setdefault(" ".join(words[start:start + size]), None)
+    return list(tokens)
+
+
+def ingredient_exclusion_filter(names: Optional[Iterable[str]]) -> Optional[dict]:
+    """``ingredient_tokens`` clause excluding meals with any of ``names``, or None"""
+    excluded = []
+    for name in names or ():
+        phrase = normalize_ingredient(name)
+        if phrase and phrase not in excluded:
+            excluded.append(phrase)
+    return {"$nin": excluded} if excluded else None
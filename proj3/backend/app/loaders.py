@@ -0,0 +1,106 @@
+"""
+Request-scoped batched document loaders (the DataLoader pattern).
+
+``loader.load(id)`` returns a future right away. Every id asked for
+before the event loop gets back to the loader is fetched in a single
+``find({"_id": {"$in": [...]}})``, and each id is fetched at most once per
+request. Handlers that resolve related documents for a list (a page of
+meals and their sellers, events and their attendees) therefore issue a
+constant number of queries however long the list is.
+
+Handlers get a fresh ``Loaders`` per request through ``Depends(get_loaders)``;
+nothing is shared between requests, so no invalidation is needed.
+"""
+
+import asyncio
+from typing import Any, Iterable, List, Optional
+
+from bson import ObjectId
+
+from . import database
+
+
+def document_id(value: Any) -> Any:
+    """``_id`` for a stored reference: ObjectId strings become ObjectIds"""
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return ObjectId(value)
+    return value
+
+
+class DocumentLoader:
+    """Batches and memoizes ``_id`` lookups on one collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self._futures = {}  # _id -> Future of the document (None if missing)
+        self._queue = []  # _ids waiting for the next batch
+        self.batches = 0
+
+    def load(self, value) -> "asyncio.Future[Optional[dict]]":
+        """Future of the document with this ``_id`` (None if there is none).
+
+        Loading None resolves to None without a query.
+        """
+        key = document_id(value)
+        future = self._futures.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            if key is None:
+                future.set_result(None)
+                return future
+            self._futures[key] = future
+            if not self._queue:
+                # Let the rest of this tick ask for ids before fetching
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, values: Iterable) -> List[Optional[dict]]:
+        """Documents for ``values`` in order (None for missing ones)"""
+        return list(await asyncio.gather(*(self.load(value) for value in values)))
+
+    def prime(self, document: dict) -> None:
+        """Remember a document this request already has"""
+        future = self._futures.get(document["_id"])
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._futures[document["_id"]] = future
+        if not future.done():
+            future.set_result(document)
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        keys = [key for key in keys if not self._futures[key].done()]
+        if keys:
+            asyncio.ensure_future(self._fetch(keys))
+
+    async def _fetch(self, keys: list) -> None:
+        self.batches += 1
+        try:
+            found = await self.collection.find({"_id": {"$in": keys}}).to_list(length=None)
+        except Exception as e:
+            for key in keys:
+                # Failures are not memoized; a later load retries
+                future = self._futures.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        documents = {document["_id"]: document for document in found}
+        for key in keys:
+            future = self._futures[key]
+            if not future.done():
+                future.set_result(documents.get(key))
+
+
+class Loaders:
+    """The loaders of one request"""
+
+    def __init__(self, db):
+        self.users = DocumentLoader(db.users)
+        self.meals = DocumentLoader(db.meals)
+
+
+def get_loaders() -> Loaders:
+    """Dependency giving each request its own loaders"""
+    return Loaders(database.get_database())
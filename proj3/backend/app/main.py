@@ -3,6 +3,15 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.auth_cache import principal_cache
+from app.browse_cache import browse_cache
+from app.password_pool import password_pool
+from app.outbox import outbox_worker
+from app.slow_queries import slow_query_log
+from app.meal_index import nearby_meals
+from app.search_index import meal_search
+from app.suggest_index import meal_suggest
+from app.view_counter import meal_views
 from app.routes.auth_routes import router as auth_router
 from app.routes.user_routes import router as user_router
 from app.routes.meal_routes import router as meal_router
@@ -10,16 +19,33 @@ from app.routes.review_routes import router as review_router
 from app.routes.event_routes import router as event_router
 from app.routes.dispute_routes import router as dispute_router
 from app.routes.transaction_routes import router as transaction_router
-from pymongo import ASCENDING
-from fastapi.responses import FileResponse, JSONResponse
+from app.routes.debug_routes import component_stats, router as debug_router
+from app.indexes import ensure_indexes
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.query_accounting import QueryAccountingMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response
 import os
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await connect_to_mongo()
+    await startup_event()
+    outbox_worker.start()
+    slow_query_log.start(get_database)
+    nearby_meals.start(get_database)
+    meal_search.start(get_database)
+    meal_suggest.start(get_database)
+    meal_views.start(get_database)
     yield
+    await meal_views.stop()
+    await meal_suggest.stop()
+    await meal_search.stop()
+    await nearby_meals.stop()
+    await slow_query_log.stop()
+    await outbox_worker.stop()
     await close_mongo_connection()
+    password_pool.shutdown()
 
 
 app = FastAPI(
@@ -54,50 +80,17 @@ async def root():
     return FileResponse(os.path.join(frontend_path, "index.html"))
 
 
-@app.on_event("startup")
 async def startup_event():
-    """Initialize database indexes on application startup"""
-
-    await connect_to_mongo()
+    """Initialize database indexes on application startup (called from lifespan)"""
     db = get_database()
 
     if db is not None:
-        try:
-            # User indexes
-            await db.users.create_index([("email", ASCENDING)], unique=True)
-
-            # Meal indexes
-            await db.meals.create_index([("seller_id", ASCENDING)])
-            await db.meals.create_index([("status", ASCENDING)])
-            await db.meals.create_index([("cuisine_type", ASCENDING)])
-            await db.meals.create_index([("created_at", ASCENDING)])
-
-            # Verification token indexes
-            await db.verification_tokens.create_index(
-                [("expires_at", ASCENDING)], expireAfterSeconds=0
-            )
-            await db.verification_tokens.create_index([("email", ASCENDING)])
-
-            # Review indexes
-            await db.reviews.create_index([("meal_id", ASCENDING)])
-            await db.reviews.create_index([("reviewer_id", ASCENDING)])
-            await db.reviews.create_index([("seller_id", ASCENDING)])
-
-            # Dispute indexes
-            await db.disputes.create_index([("transaction_id", ASCENDING)], unique=True)
-            await db.disputes.create_index([("buyer_id", ASCENDING)])
-            await db.disputes.create_index([("seller_id", ASCENDING)])
-            await db.disputes.create_index([("status", ASCENDING)])
-
-            # Transaction indexes
-            await db.transactions.create_index([("buyer_id", ASCENDING)])
-            await db.transactions.create_index([("seller_id", ASCENDING)])
-            await db.transactions.create_index([("meal_id", ASCENDING)])
-            await db.transactions.create_index([("status", ASCENDING)])
-
+        results = await ensure_indexes(db)
+        errors = [r for r in results if r["error"]]
+        for r in errors:
+            print(f"⚠️ Index creation note ({r['collection']}): {r['error']}")
+        if not errors:
             print("✅ Database indexes verified/created")
-        except Exception as e:
-            print(f"⚠️ Index creation note: {e}")
 
 
 # CORS configuration
@@ -107,13 +100,14 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# X-DB-Queries / Server-Timing headers when DB_QUERY_HEADERS=1
+app.add_middleware(QueryAccountingMiddleware)
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close MongoDB connection on shutdown"""
-    await close_mongo_connection()
+# Per-route latency and in-flight requests, exported from /metrics
+app.add_middleware(MetricsMiddleware)
 
 
 # Include routersv
@@ -124,6 +118,7 @@ app.include_router(review_router)
 app.include_router(event_router)
 app.include_router(dispute_router)
 app.include_router(transaction_router)
+app.include_router(debug_router)
 
 
 # @app.get("/")
@@ -139,6 +134,13 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    caches = {"auth": principal_cache.stats(), "browse": browse_cache.stats()}
+    return Response(render_metrics(caches, component_stats()), media_type=CONTENT_TYPE)
+
+
 def run():
     """Entry point for running the app as an installed package."""
     import uvicorn
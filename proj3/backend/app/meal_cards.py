@@ -0,0 +1,50 @@
+"""
+Seller snapshot stored on each meal, so one meal document is a full meal card.
+
+``MealResponse`` needs the seller's name and rating. ``create_meal`` and
+``update_meal`` read them from ``users`` and store them on the meal as
+``seller_snapshot``; ``update_my_profile`` and ``update_seller_stats``
+copy changes onto every meal of the seller. Browse pages then render
+straight from the meals they read, without a users lookup.
+
+The snapshot is embedded rather than kept in a separate ``meal_cards``
+collection, so browse queries keep their existing meal indexes and
+filters and a meal write updates its card in the same operation. Meals
+listed before snapshots existed fall back to a batched users lookup until
+``tastebuddiez backfill meal-seller-snapshot`` has run.
+"""
+
+SNAPSHOT_FIELD = "seller_snapshot"
+
+
+def seller_snapshot(user: dict) -> dict:
+    """Seller fields a meal card shows"""
+    return {
+        "full_name": user.get("full_name"),
+        "average_rating": (user.get("stats") or {}).get("average_rating", 0.0),
+    }
+
+
+async def load_seller_snapshot(db, seller: dict) -> dict:
+    """Snapshot of ``seller`` read from ``users``.
+
+    The principal from ``get_current_user`` may have been cached before
+    another worker synced a new rating; it is only used if the user
+    document is gone.
+    """
+    stored = await db.users.find_one({"_id": seller["_id"]}, {"full_name": 1, "stats": 1})
+    return seller_snapshot(stored or seller)
+
+
+def has_seller_snapshot(meal: dict) -> bool:
+    return "full_name" in (meal.get(SNAPSHOT_FIELD) or {})
+
+
+async def sync_seller_snapshot(db, seller_id, **fields) -> None:
+    """Copy changed seller fields onto the snapshot of every meal of the seller"""
+    if not fields:
+        return
+    await db.meals.update_many(
+        {"seller_id": seller_id, SNAPSHOT_FIELD: {"$exists": True}},
+        {"$set": {f"{SNAPSHOT_FIELD}.{name}": value for name, value in fields.items()}},
+    )
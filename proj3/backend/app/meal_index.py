@@ -0,0 +1,383 @@
+"""
+In-process spatial index of available meals.
+
+Each worker keeps a compact record (id, position, price, cuisine, meal
+type, dietary flags, ingredient tokens, allergen mask) for every available
+meal with a GeoJSON location, bucketed into a latitude/longitude grid.
+Radius and nearest-first queries scan only the grid cells around the user
+and hand back meal ids in ``(distance_meters, _id)`` order, so
+``get_meals`` fetches just the meals it will return instead of running
+``$geoNear`` over the collection.
+
+The index is rebuilt from MongoDB at startup and every
+``MEAL_INDEX_REFRESH_SECONDS`` (which also picks up writes made by other
+workers) and is kept current by the meal write routes in between. Until
+the first build finishes, callers fall back to ``$geoNear``. Distances use
+MongoDB's spherical earth radius so cursors work with either engine.
+"""
+
+import math
+import os
+import sys
+import time
+from typing import Callable, Iterator, Optional
+
+from .geo import EARTH_RADIUS_METERS, GEO_FIELD, nearest_within
+from .models import MealStatus
+from .periodic import PeriodicTask
+
+MEAL_INDEX_ENABLED = os.getenv("MEAL_INDEX_ENABLED", "1") == "1"
+# Grid cell size; 0.05 degrees of latitude is about 3.5 miles
+MEAL_INDEX_CELL_DEGREES = float(os.getenv("MEAL_INDEX_CELL_DEGREES", "0.05"))
+MEAL_INDEX_REFRESH_SECONDS = float(os.getenv("MEAL_INDEX_REFRESH_SECONDS", "300"))
+
+# Half the circumference: every point on earth is within this distance
+MAX_DISTANCE_METERS = math.pi * EARTH_RADIUS_METERS
+# First search ring for nearest-first queries; grows 4x until enough meals
+INITIAL_RADIUS_METERS = 2000.0
+
+# Fields read when building records from MongoDB
+_PROJECTION = {
+    "seller_id": 1,
+    "status": 1,
+    "seller_location.geo": 1,
+    "sale_price": 1,
+    "cuisine_type": 1,
+    "meal_type": 1,
+    "dietary_tags": 1,
+    "ingredient_tokens": 1,
+    "allergen_mask": 1,
+}
+
+
+class MealPoint:
+    """Compact index record for one available meal"""
+
+    __slots__ = (
+        "id", "seller_id", "lat", "lon", "price", "cuisine", "meal_type", "dietary",
+        "ingredients", "allergens",
+    )
+
+    def __init__(
+        self, id, seller_id, lat, lon, price, cuisine, meal_type, dietary,
+        ingredients=frozenset(), allergens=None,
+    ):
+        self.id = id
+        self.seller_id = seller_id
+        self.lat = lat
+        self.lon = lon
+        self.price = price
+        self.cuisine = cuisine
+        self.meal_type = meal_type
+        self.dietary = dietary
+        self.ingredients = ingredients
+        self.allergens = allergens
+
+    @classmethod
+    def from_meal(cls, meal: dict, require_location: bool = True) -> Optional["MealPoint"]:
+        """Record for an available meal with a GeoJSON point, else None.
+
+        With ``require_location=False`` meals without a point get a record
+        whose ``lat``/``lon`` are None.
+        """
+        if meal.get("status") != MealStatus.AVAILABLE:
+            return None
+        point = (meal.get("seller_location") or {}).get("geo")
+        if point:
+            lon, lat = point["coordinates"]
+        elif require_location:
+            return None
+        else:
+            lat = lon = None
+        return cls(
+            str(meal["_id"]),
+            str(meal.get("seller_id")),
+            lat,
+            lon,
+            meal.get("sale_price"),
+            meal.get("cuisine_type"),
+            meal.get("meal_type"),
+            frozenset(meal.get("dietary_tags") or ()),
+            # Interned: the same few thousand tokens repeat across meals
+            frozenset(sys.intern(t) for t in meal.get("ingredient_tokens") or ()),
+            meal.get("allergen_mask"),
+        )
+
+
+def point_filter(query: dict) -> Optional[Callable[[MealPoint], bool]]:
+    """Pre-filter for the simple equality, price, dietary, ingredient and allergen clauses.
+
+    Other clauses are left to MongoDB, which re-applies the whole query
+    when the matching meals are fetched.
+    """
+    cuisine = query.get("cuisine_type")
+    meal_type = query.get("meal_type")
+    price = query.get("sale_price")
+    max_price = price.get("$lte") if isinstance(price, dict) else None
+    tags = query.get("dietary_tags")
+    dietary = frozenset(tags["$all"]) if isinstance(tags, dict) and "$all" in tags else None
+    tokens = query.get("ingredient_tokens")
+    excluded = frozenset(tokens["$nin"]) if isinstance(tokens, dict) and "$nin" in tokens else None
+    mask = query.get("allergen_mask")
+    allergens = mask.get("$bitsAllClear") if isinstance(mask, dict) else None
+    if not isinstance(cuisine, str):
+        cuisine = None
+    if not isinstance(meal_type, str):
+        meal_type = None
+    if (
+        cuisine is None and meal_type is None and max_price is None
+        and not dietary and not excluded and not allergens
+    ):
+        return None
+
+    def match(point: MealPoint) -> bool:
+        if cuisine is not None and point.cuisine != cuisine:
+            return False
+        if meal_type is not None and point.meal_type != meal_type:
+            return False
+        if max_price is not None and (point.price is None or point.price > max_price):
+            return False
+        if dietary and not dietary <= point.dietary:
+            return False
+        if excluded and not excluded.isdisjoint(point.ingredients):
+            return False
+        # Meals without a mask do not match $bitsAllClear either
+        if allergens and (point.allergens is None or point.allergens & allergens):
+            return False
+        return True
+
+    return match
+
+
+class NearbyMealIndex:
+    """Grid-bucketed spatial index of available meals for one worker.
+
+    ``cells`` maps a ``(row, column)`` grid cell to ``{meal id: MealPoint}``.
+    Writes that arrive while a rebuild is reading MongoDB are journaled and
+    replayed onto the new grid before it replaces the old one.
+    """
+
+    def __init__(self, cell_degrees: float = 0.05, refresh_seconds: float = 300.0):
+        self.cell_degrees = cell_degrees
+        self.refresh_seconds = refresh_seconds
+        self.rows = math.ceil(180 / cell_degrees)
+        self.columns = math.ceil(360 / cell_degrees)
+        self.ready = False
+        self._cells = {}
+        self._points = {}  # meal id -> MealPoint
+        self._journal = None
+        self._refresher = PeriodicTask(
+            "Nearby-meal index rebuild", self._refresh, refresh_seconds
+        )
+        self.builds = 0
+        self.build_ms = 0.0
+        self.built_at = None
+        self.queries = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _cell(self, lat: float, lon: float) -> tuple:
+        row = min(int((lat + 90) / self.cell_degrees), self.rows - 1)
+        column = int((lon + 180) / self.cell_degrees) % self.columns
+        return row, column
+
+    def _place(self, cells: dict, points: dict, point: MealPoint) -> None:
+        self._drop(cells, points, point.id)
+        cells.setdefault(self._cell(point.lat, point.lon), {})[point.id] = point
+        points[point.id] = point
+
+    def _drop(self, cells: dict, points: dict, meal_id: str) -> None:
+        old = points.pop(meal_id, None)
+        if old is None:
+            return
+        key = self._cell(old.lat, old.lon)
+        bucket = cells.get(key)
+        if bucket is not None:
+            bucket.pop(meal_id, None)
+            if not bucket:
+                del cells[key]
+
+    def upsert(self, meal: dict) -> None:
+        """Index a created/updated meal; drops it once it is no longer available"""
+        point = MealPoint.from_meal(meal)
+        if point is None:
+            self.remove(str(meal["_id"]))
+            return
+        self._place(self._cells, self._points, point)
+        if self._journal is not None:
+            self._journal.append(("upsert", point))
+
+    def remove(self, meal_id) -> None:
+        meal_id = str(meal_id)
+        self._drop(self._cells, self._points, meal_id)
+        if self._journal is not None:
+            self._journal.append(("remove", meal_id))
+
+    def remove_seller(self, seller_id) -> None:
+        """Drop every meal of a seller (account deletion)"""
+        seller_id = str(seller_id)
+        for meal_id in [p.id for p in self._points.values() if p.seller_id == seller_id]:
+            self.remove(meal_id)
+
+    async def rebuild(self, db) -> int:
+        """Reload every available meal from MongoDB; returns the record count"""
+        started = time.perf_counter()
+        cells, points = {}, {}
+        self._journal = []
+        try:
+            cursor = db.meals.find(
+                {"status": MealStatus.AVAILABLE, GEO_FIELD: {"$exists": True}},
+                _PROJECTION,
+                batch_size=5000,
+            )
+            async for meal in cursor:
+                point = MealPoint.from_meal(meal)
+                if point is not None:
+                    self._place(cells, points, point)
+            for op, value in self._journal:
+                if op == "upsert":
+                    self._place(cells, points, value)
+                else:
+                    self._drop(cells, points, value)
+        finally:
+            self._journal = None
+
+        self._cells, self._points = cells, points
+        self.ready = True
+        self.builds += 1
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self.built_at = time.time()
+        return len(points)
+
+    def clear(self) -> None:
+        self._cells, self._points = {}, {}
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _candidates(self, latitude: float, longitude: float, radius: float) -> list:
+        """Points in the grid cells overlapping the circle's bounding box"""
+        angular = radius / EARTH_RADIUS_METERS
+        dlat = math.degrees(angular)
+        lat_lo, lat_hi = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+        rows = range(self._cell(lat_lo, 0)[0], self._cell(lat_hi, 0)[0] + 1)
+
+        cos_lat = math.cos(math.radians(latitude))
+        columns = None  # None means every column
+        if lat_lo > -90 and lat_hi < 90 and math.sin(angular) < cos_lat:
+            dlon = math.degrees(math.asin(math.sin(angular) / cos_lat))
+            first = int((longitude - dlon + 180) // self.cell_degrees)
+            last = int((longitude + dlon + 180) // self.cell_degrees)
+            if last - first + 1 < self.columns:
+                columns = [c % self.columns for c in range(first, last + 1)]
+
+        cells = self._cells
+        width = self.columns if columns is None else len(columns)
+        points = []
+        if len(rows) * width > len(cells):
+            # Big area: walk the occupied cells instead of the empty ones
+            wanted = None if columns is None else set(columns)
+            for (row, column), bucket in cells.items():
+                if row in rows and (wanted is None or column in wanted):
+                    points.extend(bucket.values())
+        else:
+            for row in rows:
+                for column in (range(self.columns) if columns is None else columns):
+                    bucket = cells.get((row, column))
+                    if bucket:
+                        points.extend(bucket.values())
+        return points
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        max_distance: Optional[float] = None,
+        after: Optional[tuple] = None,
+        match: Optional[Callable[[MealPoint], bool]] = None,
+    ) -> Iterator[tuple]:
+        """Yield ``(distance_meters, MealPoint)`` nearest first.
+
+        ``max_distance`` is in meters. ``after`` is the ``(distance_meters,
+        meal id)`` of the last meal already returned. Rings around the user
+        grow 4x at a time, so a page only touches the cells it needs.
+        """
+        self.queries += 1
+        limit = (
+            MAX_DISTANCE_METERS
+            if max_distance is None
+            else min(max_distance, MAX_DISTANCE_METERS)
+        )
+        radius = min(INITIAL_RADIUS_METERS, limit)
+        if after is not None:
+            radius = min(max(radius, after[0] * 2), limit)
+        inner = None
+
+        while True:
+            points = self._candidates(latitude, longitude, radius)
+            order, distances = nearest_within(
+                latitude,
+                longitude,
+                [point.lat for point in points],
+                [point.lon for point in points],
+                max_distance=radius,
+                min_distance=inner,
+            )
+            found = []
+            for i in order:
+                point, distance = points[i], distances[i]
+                if after is not None and (distance, point.id) <= after:
+                    continue
+                if match is not None and not match(point):
+                    continue
+                found.append((distance, point.id, point))
+            # Already in distance order; this only settles ties by id
+            found.sort(key=lambda item: (item[0], item[1]))
+            for distance, _, point in found:
+                yield distance, point
+            if radius >= limit:
+                return
+            inner, radius = radius, min(radius * 4, limit)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": MEAL_INDEX_ENABLED,
+            "ready": self.ready,
+            "meals": len(self._points),
+            "cells": len(self._cells),
+            "cell_degrees": self.cell_degrees,
+            "builds": self.builds,
+            "last_build_ms": round(self.build_ms, 1),
+            "built_at": self.built_at,
+            "queries": self.queries,
+        }
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def start(self, get_database) -> None:
+        """Build now and then every ``refresh_seconds`` on the running loop"""
+        if MEAL_INDEX_ENABLED:
+            self._refresher.start(get_database)
+
+    async def stop(self) -> None:
+        await self._refresher.stop()
+
+    async def _refresh(self, db) -> None:
+        count = await self.rebuild(db)
+        if self.builds == 1:
+            print(f"✅ Nearby-meal index built: {count} meals in {self.build_ms:.0f} ms")
+
+
+nearby_meals = NearbyMealIndex(
+    cell_degrees=MEAL_INDEX_CELL_DEGREES,
+    refresh_seconds=MEAL_INDEX_REFRESH_SECONDS,
+)
@@ -0,0 +1,356 @@
+"""
+Request and MongoDB command telemetry exported in Prometheus text format.
+
+Histograms are sharded per thread: each thread only ever writes to its own
+shard, so recording an observation takes no lock and allocates nothing once
+a label set has been seen. ``/metrics`` merges the shards when scraped.
+"""
+
+import itertools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Optional
+
+import bson
+from pymongo import monitoring
+
+from .pool_metrics import pool_metrics
+
+# Record the encoded size of every Nth MongoDB reply (0 disables sampling)
+METRICS_REPLY_SAMPLE_EVERY = int(os.getenv("METRICS_REPLY_SAMPLE_EVERY", "10"))
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Bucket counts for one label set; buckets are cumulative only on export"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.total = 0.0
+
+
+class HistogramFamily:
+    """A labelled histogram whose observations are recorded per thread"""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple, buckets: tuple):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = []
+
+    def _shard(self) -> dict:
+        shard = self._local.__dict__.get("shard")
+        if shard is None:
+            shard = self._local.shard = {}
+            # list.append is atomic, so registering a new thread needs no lock
+            self._shards.append(shard)
+        return shard
+
+    def observe(self, labels: tuple, value: float) -> None:
+        shard = self._shard()
+        histogram = shard.get(labels)
+        if histogram is None:
+            # +1 slot for observations above the largest bucket
+            histogram = shard[labels] = Histogram(len(self.buckets) + 1)
+        histogram.counts[bisect_left(self.buckets, value)] += 1
+        histogram.total += value
+
+    def collect(self) -> dict:
+        """Merge every thread's shard into {labels: (counts, total)}"""
+        merged = {}
+        for shard in list(self._shards):
+            for labels, histogram in list(shard.items()):
+                counts, total = merged.get(labels, (None, 0.0))
+                if counts is None:
+                    counts = [0] * len(histogram.counts)
+                for i, count in enumerate(histogram.counts):
+                    counts[i] += count
+                merged[labels] = (counts, total + histogram.total)
+        return merged
+
+    def reset(self) -> None:
+        for shard in list(self._shards):
+            shard.clear()
+
+
+http_request_duration = HistogramFamily(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ("method", "route", "status"),
+    LATENCY_BUCKETS,
+)
+mongodb_command_duration = HistogramFamily(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency by collection, command and outcome",
+    ("collection", "command", "outcome"),
+    LATENCY_BUCKETS,
+)
+mongodb_reply_size = HistogramFamily(
+    "mongodb_command_reply_bytes",
+    "Encoded size of sampled MongoDB replies by collection and command",
+    ("collection", "command"),
+    BYTE_BUCKETS,
+)
+
+
+class _InFlight:
+    """Requests currently being handled; only touched from the event loop"""
+
+    value = 0
+
+
+http_requests_in_flight = _InFlight()
+
+
+def _route_template(scope) -> str:
+    """Path template of the matched route, so /api/meals/{meal_id} is one series"""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    return getattr(route, "path_format", None) or getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.value += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.value -= 1
+            http_request_duration.observe(
+                (scope["method"], _route_template(scope), status),
+                time.perf_counter() - start,
+            )
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Times every MongoDB command and samples reply sizes.
+
+    The succeeded/failed events do not carry the command document, so the
+    collection name is remembered from the started event by request id.
+    """
+
+    def __init__(self, reply_sample_every: int = METRICS_REPLY_SAMPLE_EVERY):
+        self.reply_sample_every = reply_sample_every
+        self._pending = {}
+        self._replies = itertools.count()
+
+    def started(self, event):
+        name = event.command_name
+        target = event.command.get("collection" if name == "getMore" else name)
+        self._pending[event.request_id] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        collection = self._pending.pop(event.request_id, "")
+        name = event.command_name
+        mongodb_command_duration.observe(
+            (collection, name, "ok"), event.duration_micros / 1e6
+        )
+        every = self.reply_sample_every
+        if every and next(self._replies) % every == 0:
+            try:
+                size = len(bson.encode(event.reply))
+            except Exception:
+                return
+            mongodb_reply_size.observe((collection, name), size)
+
+    def failed(self, event):
+        collection = self._pending.pop(event.request_id, "")
+        mongodb_command_duration.observe(
+            (collection, event.command_name, "error"), event.duration_micros / 1e6
+        )
+
+
+command_metrics = CommandMetricsListener()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+_INF = 'le="+Inf"'
+
+
+def _format_bound(bound) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def _render_histogram(family: HistogramFamily, lines: list) -> None:
+    lines.append(f"# HELP {family.name} {family.help}")
+    lines.append(f"# TYPE {family.name} histogram")
+    for labels, (counts, total) in sorted(family.collect().items(), key=str):
+        cumulative = 0
+        for bound, count in zip(family.buckets, counts):
+            cumulative += count
+            le = f'le="{_format_bound(bound)}"'
+            lines.append(
+                f"{family.name}_bucket{_labels(family.labelnames, labels, le)} {cumulative}"
+            )
+        cumulative += counts[-1]
+        label_str = _labels(family.labelnames, labels)
+        lines.append(
+            f"{family.name}_bucket{_labels(family.labelnames, labels, _INF)} {cumulative}"
+        )
+        lines.append(f"{family.name}_sum{label_str} {total}")
+        lines.append(f"{family.name}_count{label_str} {cumulative}")
+
+
+def _render_gauge(name: str, help_text: str, samples: list, lines: list, kind="gauge"):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        lines.append(f"{name}{labels} {value}")
+
+
+CACHE_SERIES = (
+    ("cache_hits_total", "Lookups answered from the cache", "hits", "counter"),
+    ("cache_misses_total", "Lookups that had to be computed", "misses", "counter"),
+    ("cache_hit_ratio", "Share of lookups answered from the cache", "hit_ratio", "gauge"),
+    ("cache_entries", "Entries held", "size", "gauge"),
+    ("cache_bytes", "Approximate bytes held", "bytes", "gauge"),
+    ("cache_evictions_total", "Entries evicted to stay within bounds", "evictions", "counter"),
+    ("cache_invalidations_total", "Entries dropped by writes", "invalidations", "counter"),
+)
+
+
+# Cumulative fields of each component's stats(), exported as counters
+COMPONENT_COUNTERS = {
+    "password_pool": {"submitted", "completed", "rejected"},
+    "email_outbox": {
+        "sent",
+        "retried",
+        "failed",
+        "breaker_times_opened",
+        "smtp_connections_opened",
+    },
+    "slow_queries": {"flagged", "recorded", "explained", "explain_errors", "dropped"},
+    "nearby_index": {"builds", "queries"},
+    "search_index": {"builds", "queries"},
+    "suggest_index": {"builds", "queries"},
+    "view_counter": {"recorded", "flushed", "flushes", "flush_errors"},
+}
+
+
+def _render_component(component: str, stats: dict, lines: list) -> None:
+    """One series per numeric field of a component's ``stats()``.
+
+    Fields in ``COMPONENT_COUNTERS`` export as ``<component>_<field>_total``
+    counters, the rest as gauges. Booleans export as 0/1 and string states
+    as a labelled sample of 1 (``email_outbox_breaker_state{state="open"}
+    1``); other fields are skipped.
+    """
+    counters = COMPONENT_COUNTERS.get(component, ())
+    for key, value in stats.items():
+        name, kind = f"{component}_{key}", "gauge"
+        if isinstance(value, str):
+            samples = [(_labels(("state",), (value,)), 1)]
+        elif isinstance(value, (bool, int, float)):
+            samples = [("", int(value) if isinstance(value, bool) else value)]
+            if key in counters:
+                name, kind = f"{name}_total", "counter"
+        else:
+            continue
+        _render_gauge(name, f"{key} of {component}", samples, lines, kind)
+
+
+def render_metrics(caches: Optional[dict] = None, components: Optional[dict] = None) -> str:
+    """All metrics in the Prometheus text exposition format.
+
+    ``caches`` maps a cache name to its ``stats()``; each series is
+    exported for the caches that report it. ``components`` maps a metric
+    prefix to the ``stats()`` of a worker component.
+    """
+    lines = []
+    _render_gauge(
+        "http_requests_in_flight",
+        "HTTP requests currently being handled",
+        [("", http_requests_in_flight.value)],
+        lines,
+    )
+    _render_histogram(http_request_duration, lines)
+    _render_histogram(mongodb_command_duration, lines)
+    _render_histogram(mongodb_reply_size, lines)
+
+    servers = pool_metrics.stats()
+    pool_series = [
+        ("mongodb_pool_connections_open", "Open pooled connections", "open", "gauge"),
+        ("mongodb_pool_connections_in_use", "Checked-out connections", "in_use", "gauge"),
+        ("mongodb_pool_checkouts_total", "Successful connection checkouts", "checkouts", "counter"),
+        (
+            "mongodb_pool_checkout_failures_total",
+            "Failed connection checkouts",
+            "checkout_failures",
+            "counter",
+        ),
+        (
+            "mongodb_pool_checkout_wait_seconds_total",
+            "Total time spent waiting for a connection",
+            "checkout_wait_total_ms",
+            "counter",
+        ),
+    ]
+    for name, help_text, key, kind in pool_series:
+        samples = []
+        for address, server in sorted(servers.items()):
+            value = server[key]
+            if key.endswith("_ms"):
+                value = value / 1000
+            samples.append((_labels(("address",), (address,)), value))
+        _render_gauge(name, help_text, samples, lines, kind)
+
+    for name, help_text, key, kind in CACHE_SERIES:
+        samples = [
+            (_labels(("cache",), (cache,)), stats[key])
+            for cache, stats in sorted((caches or {}).items())
+            if key in stats
+        ]
+        if samples:
+            _render_gauge(name, help_text, samples, lines, kind)
+
+    for component, stats in sorted((components or {}).items()):
+        _render_component(component, stats, lines)
+
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Clear recorded observations (used by tests)"""
+    for family in (http_request_duration, mongodb_command_duration, mongodb_reply_size):
+        family.reset()
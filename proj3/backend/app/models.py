@@ -169,6 +169,12 @@ class UserLogin(BaseModel):
     password: str
 
 
+class TokenRefresh(BaseModel):
+    """Refresh token exchange model"""
+
+    refresh_token: str
+
+
 class VerificationToken(BaseModel):
     email: str
     token: str
@@ -317,6 +323,14 @@ class MealResponse(BaseModel):
     distance: Optional[float] = None  # Distance in miles from user's location
 
 
+class MealSuggestion(BaseModel):
+    """Type-ahead suggestion for the meal search box"""
+
+    text: str
+    kind: str  # title, cuisine or ingredient
+    meal_count: int
+
+
 # ============================================================
 # REVIEW MODELS
 # ============================================================
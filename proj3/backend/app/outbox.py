@@ -0,0 +1,358 @@
+import asyncio
+import os
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from pymongo import ReturnDocument
+
+from .database import get_database
+from .utils import smtp_settings, build_mime_message, build_verification_email
+
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "10"))
+OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("OUTBOX_BACKOFF_MAX_SECONDS", "3600"))
+OUTBOX_BREAKER_THRESHOLD = int(os.getenv("OUTBOX_BREAKER_THRESHOLD", "5"))
+OUTBOX_BREAKER_COOLDOWN_SECONDS = float(
+    os.getenv("OUTBOX_BREAKER_COOLDOWN_SECONDS", "60")
+)
+# How long a claimed message stays locked before another worker may retry it
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "120"))
+# Close the pooled SMTP connection after this long without traffic
+SMTP_IDLE_TIMEOUT_SECONDS = float(os.getenv("SMTP_IDLE_TIMEOUT_SECONDS", "60"))
+
+STATUS_PENDING = "pending"
+STATUS_SENDING = "sending"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff before retry number ``attempts`` (1-based)"""
+    delay = OUTBOX_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, OUTBOX_BACKOFF_MAX_SECONDS)
+
+
+class CircuitBreaker:
+    """Stops delivery attempts after repeated SMTP failures.
+
+    After ``threshold`` consecutive failures the breaker opens for
+    ``cooldown`` seconds; the next attempt after that is a half-open probe
+    that either closes the breaker or re-opens it.
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 60.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == "half-open" or self.consecutive_failures >= self.threshold:
+            self.opened_at = self._clock()
+            self.times_opened += 1
+
+
+class SMTPSession:
+    """A single SMTP connection reused across messages.
+
+    All methods block and must be called from one thread; the outbox worker
+    runs them on a dedicated single-thread executor. Without an SMTP server
+    configured, messages are printed to the log instead.
+    """
+
+    def __init__(self, settings: Optional[dict] = None, timeout: float = 10.0):
+        self.settings = settings if settings is not None else smtp_settings()
+        self.timeout = timeout
+        self._server = None
+        self._last_used = 0.0
+        self.connections_opened = 0
+
+    def _connect(self):
+        s = self.settings
+        if s["use_ssl"]:
+            server = smtplib.SMTP_SSL(s["server"], s["port"], timeout=self.timeout)
+        else:
+            server = smtplib.SMTP(s["server"], s["port"], timeout=self.timeout)
+        server.ehlo()
+        if not s["use_ssl"] and s["use_tls"]:
+            server.starttls()
+            server.ehlo()
+        if s["sender_email"] and s["sender_password"]:
+            server.login(s["sender_email"], s["sender_password"])
+        self.connections_opened += 1
+        return server
+
+    def _ensure_connected(self):
+        if (
+            self._server is not None
+            and time.monotonic() - self._last_used > SMTP_IDLE_TIMEOUT_SECONDS
+        ):
+            self.close()
+        if self._server is None:
+            self._server = self._connect()
+        return self._server
+
+    def send(self, message: dict) -> None:
+        """Deliver one outbox message; raises on failure"""
+        if not self.settings["server"]:
+            print(f"✅ Email for {message['to']}: {message['subject']}\n{message['text']}")
+            return
+
+        msg = build_mime_message(
+            message["to"],
+            message["subject"],
+            message["text"],
+            message.get("html") or "",
+            self.settings["sender_email"],
+        )
+        try:
+            self._ensure_connected().send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # The server dropped an idle connection; reconnect once and retry
+            self._server = None
+            self._ensure_connected().send_message(msg)
+        except Exception:
+            self.close()
+            raise
+        self._last_used = time.monotonic()
+
+    def close(self) -> None:
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+
+async def enqueue_email(
+    db, to: str, subject: str, text: str, html: Optional[str] = None, kind: str = ""
+):
+    """Append a message to the outbox; delivery happens in the background"""
+    now = datetime.utcnow()
+    result = await db.email_outbox.insert_one(
+        {
+            "to": to,
+            "subject": subject,
+            "text": text,
+            "html": html,
+            "kind": kind,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "sent_at": None,
+        }
+    )
+    outbox_worker.notify()
+    return result.inserted_id
+
+
+async def enqueue_verification_email(db, email: str, token: str, user_type: str = "user"):
+    """Queue a verification email for ``email``"""
+    message = build_verification_email(email, token, user_type)
+    return await enqueue_email(
+        db,
+        message["to"],
+        message["subject"],
+        message["text"],
+        message["html"],
+        kind="email_verification",
+    )
+
+
+class OutboxWorker:
+    """Background task that drains the email_outbox collection.
+
+    Messages are claimed in batches with a lease so several workers (or
+    restarts) never send the same message twice within the lease window.
+    """
+
+    def __init__(
+        self,
+        get_db: Callable = get_database,
+        session_factory: Callable[[], SMTPSession] = SMTPSession,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        poll_seconds: float = OUTBOX_POLL_SECONDS,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self._get_db = get_db
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker(
+            OUTBOX_BREAKER_THRESHOLD, OUTBOX_BREAKER_COOLDOWN_SECONDS
+        )
+        self._session = None
+        self._executor = None
+        self._task = None
+        self._wake = None
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def notify(self) -> None:
+        """Wake the worker early because a message was just enqueued"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _claim(self, db) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await db.email_outbox.find_one_and_update(
+            {
+                "$or": [
+                    {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+                    {"status": STATUS_SENDING, "locked_until": {"$lt": now}},
+                ]
+            },
+            {
+                "$set": {
+                    "status": STATUS_SENDING,
+                    "locked_until": now + timedelta(seconds=OUTBOX_LEASE_SECONDS),
+                }
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _deliver(self, message: dict) -> None:
+        if self._session is None:
+            self._session = self._session_factory()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="smtp-outbox"
+            )
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._session.send, message)
+
+    async def drain_once(self) -> int:
+        """Claim and deliver up to one batch; returns messages processed"""
+        db = self._get_db()
+        if db is None or not self.breaker.allow():
+            return 0
+
+        processed = 0
+        while processed < self.batch_size and self.breaker.allow():
+            message = await self._claim(db)
+            if message is None:
+                break
+            processed += 1
+
+            try:
+                await self._deliver(message)
+            except Exception as e:
+                self.breaker.record_failure()
+                attempts = message.get("attempts", 0) + 1
+                update = {"attempts": attempts, "last_error": str(e), "locked_until": None}
+                if attempts >= self.max_attempts:
+                    update["status"] = STATUS_FAILED
+                    self.failed += 1
+                    print(f"⚠️ Giving up on email to {message['to']}: {e}")
+                else:
+                    update["status"] = STATUS_PENDING
+                    update["next_attempt_at"] = datetime.utcnow() + timedelta(
+                        seconds=backoff_seconds(attempts)
+                    )
+                    self.retried += 1
+                await db.email_outbox.update_one({"_id": message["_id"]}, {"$set": update})
+                continue
+
+            self.breaker.record_success()
+            self.sent += 1
+            await db.email_outbox.update_one(
+                {"_id": message["_id"]},
+                {
+                    "$set": {
+                        "status": STATUS_SENT,
+                        "sent_at": datetime.utcnow(),
+                        "locked_until": None,
+                    },
+                    "$inc": {"attempts": 1},
+                },
+            )
+
+        return processed
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                processed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Email outbox worker error: {e}")
+                processed = 0
+
+            # A full batch means there is probably more waiting
+            if processed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._wake = None
+        if self._session is not None and self._executor is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self._session.close)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._session = None
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "breaker_state": self.breaker.state,
+            "breaker_times_opened": self.breaker.times_opened,
+            "smtp_connections_opened": (
+                self._session.connections_opened if self._session else 0
+            ),
+        }
+
+
+outbox_worker = OutboxWorker()
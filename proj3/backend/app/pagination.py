@@ -0,0 +1,76 @@
+"""
+Opaque cursor tokens for keyset pagination.
+
+A cursor is the sort key of the last item on a page, encoded as URL-safe
+base64 JSON. Clients pass it back unchanged in the ``cursor`` query
+parameter; the next page is read in the response's ``X-Next-Cursor``
+header. Resuming from a sort key costs the same on every page, unlike
+``skip``, which makes MongoDB walk and discard every earlier document.
+"""
+
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def decode_cursor(token: str) -> dict:
+    """Decode a cursor token; raises a 400 for anything malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position, dict):
+            raise ValueError("cursor must encode an object")
+        return position
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+
+
+# Newest-first pages keyed on (created_at, _id)
+
+
+def created_position(doc: dict) -> dict:
+    """Cursor position of a document in a newest-first listing"""
+    return {"t": doc["created_at"].isoformat(), "id": str(doc["_id"])}
+
+
+def decode_created_cursor(token: str) -> tuple:
+    """``(created_at, _id)`` from a newest-first cursor; 400 if malformed"""
+    position = decode_cursor(token)
+    try:
+        return datetime.fromisoformat(position["t"]), ObjectId(position["id"])
+    except (KeyError, TypeError, ValueError, InvalidId):
+        raise _invalid_cursor()
+
+
+def created_before(created_at: datetime, doc_id: ObjectId) -> dict:
+    """Filter for documents after ``(created_at, _id)`` in newest-first order"""
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": doc_id}},
+        ]
+    }
+
+
+# Sort matching created_before; ties on created_at fall back to _id
+NEWEST_FIRST = [("created_at", -1), ("_id", -1)]
+
+
+def next_cursor_headers(position) -> dict:
+    """Response headers advertising the next page, if there is one"""
+    return {NEXT_CURSOR_HEADER: encode_cursor(position)} if position else {}
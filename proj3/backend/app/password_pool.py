@@ -0,0 +1,101 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# bcrypt releases the GIL while hashing, so a small thread pool keeps the
+# event loop responsive without the overhead of a process pool.
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "4"))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64"))
+
+
+class PasswordPoolSaturated(Exception):
+    """Raised when the hashing pool already has max_queue calls waiting"""
+
+
+class PasswordHashPool:
+    """Size-capped executor for bcrypt work with a bounded wait queue.
+
+    Queue-wait totals are written from the worker threads, so every counter
+    is updated under ``_lock``.
+    """
+
+    def __init__(self, workers: int = 4, max_queue: int = 64):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    def _timed(self, submitted_at: float, fn, args):
+        wait = time.perf_counter() - submitted_at
+        with self._lock:
+            self.total_wait_seconds += wait
+            if wait > self.max_wait_seconds:
+                self.max_wait_seconds = wait
+        return fn(*args)
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on the pool, rejecting fast when saturated."""
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                raise PasswordPoolSaturated("Password hashing pool is saturated")
+
+            self.pending += 1
+            self.submitted += 1
+            if self.pending > self.peak_pending:
+                self.peak_pending = self.pending
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), self._timed, time.perf_counter(), fn, args
+            )
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = min(self.pending, self.workers)
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": in_flight,
+                "queued": self.pending - in_flight,
+                "peak_pending": self.peak_pending,
+                "saturation": round(self.pending / (self.workers + self.max_queue), 4),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": (
+                    round(self.total_wait_seconds / self.completed * 1000, 3)
+                    if self.completed
+                    else 0.0
+                ),
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 3),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordHashPool(PASSWORD_POOL_WORKERS, PASSWORD_POOL_MAX_QUEUE)
@@ -0,0 +1,94 @@
+"""
+Periodic background task shared by the in-process indexes and the view
+counter.
+
+``PeriodicTask`` runs a coroutine ``step(db)`` on the event loop every
+``interval`` seconds, or sooner when ``wake()`` is called. A failing step
+is logged and retried on the next tick. ``stop()`` cancels the loop, for
+steps that are safe to abandon (index rebuilds); with ``run_on_stop`` it
+instead lets a step under way finish and runs one last step, for steps
+that must not be cut off mid-write (view flushes).
+"""
+
+import asyncio
+from typing import Awaitable, Callable
+
+
+class PeriodicTask:
+    """Runs ``step(db)`` every ``interval`` seconds until stopped"""
+
+    def __init__(
+        self,
+        name: str,
+        step: Callable[[object], Awaitable],
+        interval: float,
+        run_at_start: bool = True,
+        run_on_stop: bool = False,
+    ):
+        self.name = name
+        self.step = step
+        self.interval = interval
+        self.run_at_start = run_at_start
+        self.run_on_stop = run_on_stop
+        self._get_db = None
+        self._wake = None  # created by start(), on the running loop
+        self._stopping = False
+        self._task = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, get_database: Callable) -> None:
+        if self._task is None:
+            self._get_db = get_database
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+
+    def wake(self) -> None:
+        """Run the next step now instead of at the end of the interval"""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        if self.run_on_stop:
+            # Not cancelled: a step under way finishes, then a final one runs
+            # so nothing queued before stop() is left behind
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            await self._step()
+        else:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _run(self) -> None:
+        if self.run_at_start:
+            await self._step()
+        while not self._stopping:
+            # Cleared after waiting, so a wake() that arrives during a step
+            # (or before the loop first runs) triggers the next one at once
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                return
+            await self._step()
+
+    async def _step(self) -> None:
+        db = self._get_db()
+        if db is None:
+            return
+        try:
+            await self.step(db)
+        except Exception as e:
+            print(f"⚠️ {self.name} failed: {e}")
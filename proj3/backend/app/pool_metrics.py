@@ -0,0 +1,126 @@
+import threading
+import time
+from pymongo import monitoring
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Collects connection-pool (CMAP) metrics per server address.
+
+    Motor runs pool checkouts on its executor threads, so checkout start
+    times are kept in a thread-local and the shared counters are guarded
+    by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._servers = {}
+
+    def _server(self, address) -> dict:
+        key = f"{address[0]}:{address[1]}" if isinstance(address, tuple) else str(address)
+        server = self._servers.get(key)
+        if server is None:
+            server = self._servers[key] = {
+                "open": 0,
+                "in_use": 0,
+                "max_in_use": 0,
+                "checkouts": 0,
+                "checkout_failures": 0,
+                "checkout_wait_total_ms": 0.0,
+                "checkout_wait_max_ms": 0.0,
+                "pool_cleared": 0,
+                "max_pool_size": None,
+                "min_pool_size": None,
+            }
+        return server
+
+    def pool_created(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["max_pool_size"] = event.options.get("maxPoolSize")
+            server["min_pool_size"] = event.options.get("minPoolSize")
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["pool_cleared"] += 1
+            # Checked-out connections from a cleared pool are discarded on return
+            server["in_use"] = 0
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        with self._lock:
+            self._server(event.address)["open"] += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["open"] = max(0, server["open"] - 1)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _record_wait(self, server) -> None:
+        started = getattr(self._local, "started", None)
+        if started is None:
+            return
+        self._local.started = None
+        wait_ms = (time.perf_counter() - started) * 1000
+        server["checkout_wait_total_ms"] += wait_ms
+        if wait_ms > server["checkout_wait_max_ms"]:
+            server["checkout_wait_max_ms"] = wait_ms
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["checkout_failures"] += 1
+            self._record_wait(server)
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["checkouts"] += 1
+            server["in_use"] += 1
+            if server["in_use"] > server["max_in_use"]:
+                server["max_in_use"] = server["in_use"]
+            self._record_wait(server)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            server = self._server(event.address)
+            server["in_use"] = max(0, server["in_use"] - 1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            out = {}
+            for address, server in self._servers.items():
+                snapshot = dict(server)
+                attempts = snapshot["checkouts"] + snapshot["checkout_failures"]
+                snapshot["checkout_wait_avg_ms"] = (
+                    round(snapshot["checkout_wait_total_ms"] / attempts, 3)
+                    if attempts
+                    else 0.0
+                )
+                snapshot["checkout_wait_total_ms"] = round(
+                    snapshot["checkout_wait_total_ms"], 3
+                )
+                snapshot["checkout_wait_max_ms"] = round(
+                    snapshot["checkout_wait_max_ms"], 3
+                )
+                out[address] = snapshot
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._servers.clear()
+
+
+pool_metrics = PoolMetricsListener()
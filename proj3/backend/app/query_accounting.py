@@ -0,0 +1,149 @@
+"""
+Per-request accounting of MongoDB round trips.
+
+``track_queries`` binds a ``QueryStats`` to a context variable; the command
+listener adds every command issued in that context to it. Motor copies the
+caller's context onto its executor threads, so commands are attributed to
+the request that awaited them. With ``DB_QUERY_HEADERS=1`` the middleware
+reports the totals in ``X-DB-Queries`` and ``Server-Timing`` response
+headers; otherwise no scope is opened and the listener does nothing.
+
+Reply sizes are counted in documents (the length of the cursor batch, or
+``n`` for writes) rather than bytes: driver events carry the decoded reply,
+and re-encoding it on every command costs more than the lookup it measures.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from pymongo import monitoring
+
+# Add X-DB-Queries / Server-Timing headers to every response (development aid)
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "0") == "1"
+
+
+class QueryStats:
+    """Commands, documents returned and time spent in MongoDB within one scope"""
+
+    __slots__ = ("commands", "documents", "duration_ms", "parent")
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.commands = []
+        self.documents = 0
+        self.duration_ms = 0.0
+        self.parent = parent
+
+    @property
+    def count(self) -> int:
+        return len(self.commands)
+
+    def add_command(self, name: str, collection: str) -> None:
+        stats = self
+        while stats is not None:
+            stats.commands.append((name, collection))
+            stats = stats.parent
+
+    def add_reply(self, duration_ms: float, documents: int) -> None:
+        stats = self
+        while stats is not None:
+            stats.duration_ms += duration_ms
+            stats.documents += documents
+            stats = stats.parent
+
+    def describe(self) -> str:
+        return ", ".join(f"{name} {collection}".strip() for name, collection in self.commands)
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def reply_documents(reply) -> int:
+    """Documents in a command reply, from fields the reply already carries"""
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+        return len(batch) if isinstance(batch, list) else 0
+    n = reply.get("n")
+    return n if isinstance(n, int) else 0
+
+
+@contextmanager
+def track_queries():
+    """Count MongoDB commands issued inside the block.
+
+    Scopes nest: commands also count towards any enclosing scope.
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryAccountingListener(monitoring.CommandListener):
+    """Attributes driver commands to the active ``QueryStats``, if any"""
+
+    def started(self, event):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        name = event.command_name
+        target = event.command.get("collection" if name == "getMore" else name)
+        stats.add_command(name, target if isinstance(target, str) else "")
+
+    def succeeded(self, event):
+        stats = _current_stats.get()
+        if stats is None:
+            return
+        stats.add_reply(event.duration_micros / 1000, reply_documents(event.reply))
+
+    def failed(self, event):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add_reply(event.duration_micros / 1000, 0)
+
+
+query_accounting = QueryAccountingListener()
+
+
+class QueryAccountingMiddleware:
+    """ASGI middleware adding per-request MongoDB totals to response headers"""
+
+    def __init__(self, app, enabled: bool = DB_QUERY_HEADERS):
+        self.app = app
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+
+            async def send_with_headers(message):
+                if message["type"] == "http.response.start":
+                    total_ms = (time.perf_counter() - start) * 1000
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append(
+                        (
+                            b"server-timing",
+                            (
+                                f'db;dur={stats.duration_ms:.2f};desc="{stats.count} queries, '
+                                f'{stats.documents} docs", app;dur={total_ms:.2f}'
+                            ).encode(),
+                        )
+                    )
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_headers)
@@ -6,13 +6,13 @@ import asyncio
 import sys
 import os
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Add the backend directory to the path so the app package imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Now we can import with the context set up properly
 if __name__ == "__main__":
-    from database import connect_to_mongo, close_mongo_connection, get_database
-    from utils import hash_password
+    from app.database import connect_to_mongo, close_mongo_connection, get_database
+    from app.utils import hash_password
 else:
     from .database import connect_to_mongo, close_mongo_connection, get_database
     from .utils import hash_password
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, HTTPException, status
 from fastapi.responses import HTMLResponse
 from datetime import datetime, timedelta
+from bson import ObjectId
 
 
 from ..models import (
     UserCreate,
     UserLogin,
+    TokenRefresh,
     UserRole,
     AccountStatus,
     UserStats,
@@ -13,16 +15,29 @@ from ..models import (
     DietaryPreferences,
 )
 from ..database import get_database
+from ..auth_cache import principal_cache
+from ..dependencies import principal_cache_key
+from ..tokens import issue_tokens, decode_token, TokenError, REFRESH_TOKEN_TYPE
 from ..utils import (
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
     generate_verification_token,
-    send_verification_email,
 )
+from ..outbox import enqueue_verification_email
+from ..password_pool import PasswordPoolSaturated
 
 router = APIRouter()
 
 
+def _server_busy() -> HTTPException:
+    """503 returned when the password hashing pool rejects new work"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please try again shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 # User Registration
 @router.post(
     "/api/auth/register/user", response_model=dict, status_code=status.HTTP_201_CREATED
@@ -38,8 +53,11 @@ async def register_user(user: UserCreate):
             detail="This email is already associated with an account",
         )
 
-    # Hash password
-    hashed_password = hash_password(user.password)
+    # Hash password (off the event loop)
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except PasswordPoolSaturated:
+        raise _server_busy()
 
     # Create user document
     user_doc = {
@@ -93,7 +111,14 @@ async def verify_user(email: str, token: str):
 
     # Mark user verified and remove token
     await db.users.update_one(
-        {"email": email}, {"$set": {"verified": True, "status": AccountStatus.ACTIVE}}
+        {"email": email},
+        {
+            "$set": {
+                "verified": True,
+                "status": AccountStatus.ACTIVE,
+                "updated_at": datetime.utcnow(),
+            }
+        },
     )
 
     await db.verification_tokens.delete_one({"_id": token_doc["_id"]})
@@ -202,8 +227,8 @@ async def resend_verification(email: str, account_type: str = "user"):
     }
     await db.verification_tokens.insert_one(token_doc)
 
-    # Send verification email
-    send_verification_email(email, token, account_type)
+    # Queue verification email; the outbox worker delivers it in the background
+    await enqueue_verification_email(db, email, token, account_type)
 
     return {"message": "Verification email sent successfully"}
 
@@ -216,7 +241,14 @@ async def login(credentials: UserLogin):
     # Check in users collection
     user = await db.users.find_one({"email": credentials.email})
     if user:
-        if not verify_password(credentials.password, user["password"]):
+        try:
+            password_ok = await verify_password_async(
+                credentials.password, user["password"]
+            )
+        except PasswordPoolSaturated:
+            raise _server_busy()
+
+        if not password_ok:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -228,12 +260,16 @@ async def login(credentials: UserLogin):
                 detail="Please verify your email before logging in",
             )
 
+        # Prime the principal cache so the first authenticated call is a hit
+        principal_cache.set(principal_cache_key(user["_id"]), user)
+
         return {
             "message": "Login successful",
             "user_id": str(user["_id"]),
             "email": user["email"],
             "role": user["role"],
             "full_name": user["full_name"],
+            **issue_tokens(user),
         }
 
     # User not found
@@ -243,6 +279,41 @@ async def login(credentials: UserLogin):
     )
 
 
+# Refresh access token
+@router.post("/api/auth/refresh", response_model=dict)
+async def refresh_token(body: TokenRefresh):
+    """Exchange a refresh token for a new access/refresh token pair"""
+    try:
+        claims = decode_token(body.refresh_token, expected_type=REFRESH_TOKEN_TYPE)
+    except TokenError as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=e.detail)
+
+    if not ObjectId.is_valid(claims["sub"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    # Re-read the account so role/verified changes take effect on refresh
+    db = get_database()
+    user = await db.users.find_one({"_id": ObjectId(claims["sub"])})
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+        )
+
+    if not user.get("verified"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Please verify your email before logging in",
+        )
+
+    principal_cache.set(principal_cache_key(user["_id"]), user)
+
+    return {"message": "Token refreshed", **issue_tokens(user)}
+
+
 @router.get("/api/debug/users")
 async def list_users():
     db = get_database()
@@ -0,0 +1,102 @@
+"""
+Admin-only JSON views of this worker's in-process components.
+
+The numbers are also exported from ``/metrics``; these endpoints add the
+detail that does not fit a time series (pool options, the slow-query
+report) and are meant for an operator looking at one worker.
+"""
+
+from fastapi import APIRouter, Depends
+
+from ..auth_cache import principal_cache
+from ..browse_cache import browse_cache
+from ..database import get_database, pool_diagnostics
+from ..dependencies import get_current_admin
+from ..meal_index import nearby_meals
+from ..outbox import outbox_worker
+from ..password_pool import password_pool
+from ..search_index import meal_search
+from ..slow_queries import slow_query_log, slow_query_report
+from ..suggest_index import meal_suggest
+from ..view_counter import meal_views
+
+router = APIRouter(
+    prefix="/api/debug", tags=["Debug"], dependencies=[Depends(get_current_admin)]
+)
+
+
+def component_stats() -> dict:
+    """``stats()`` of every component exported from ``/metrics``, by metric prefix"""
+    return {
+        "password_pool": password_pool.stats(),
+        "email_outbox": outbox_worker.stats(),
+        "slow_queries": slow_query_log.stats(),
+        "nearby_index": nearby_meals.stats(),
+        "search_index": meal_search.stats(),
+        "suggest_index": meal_suggest.stats(),
+        "view_counter": meal_views.stats(),
+    }
+
+
+@router.get("/auth-cache")
+async def auth_cache_stats():
+    """Hit/miss counters for the authenticated-principal cache"""
+    return principal_cache.stats()
+
+
+@router.get("/browse-cache")
+async def browse_cache_stats():
+    """Hit ratio, memory footprint and invalidations of the meal browse cache"""
+    return browse_cache.stats()
+
+
+@router.get("/password-pool")
+async def password_pool_stats():
+    """Saturation metrics for the bcrypt worker pool"""
+    return password_pool.stats()
+
+
+@router.get("/email-outbox")
+async def email_outbox_stats():
+    """Delivery counters and circuit-breaker state for the email outbox"""
+    return outbox_worker.stats()
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    """MongoDB connection pool settings, checkout waits and pool-cleared events"""
+    return pool_diagnostics()
+
+
+@router.get("/slow-queries")
+async def slow_queries(limit: int = 50):
+    """Slow query shapes with explain flags (COLLSCAN etc.) and suggested indexes"""
+    db = get_database()
+    return {
+        "stats": slow_query_log.stats(),
+        "queries": await slow_query_report(db, limit),
+    }
+
+
+@router.get("/nearby-index")
+async def nearby_index_stats():
+    """Size, build time and query count of the in-process nearby-meal index"""
+    return nearby_meals.stats()
+
+
+@router.get("/search-index")
+async def search_index_stats():
+    """Size, build time and query count of the in-process meal search index"""
+    return meal_search.stats()
+
+
+@router.get("/suggest-index")
+async def suggest_index_stats():
+    """Size, build time and query count of the in-process meal suggest index"""
+    return meal_suggest.stats()
+
+
+@router.get("/view-counter")
+async def view_counter_stats():
+    """Buffered and flushed meal views of this worker"""
+    return meal_views.stats()
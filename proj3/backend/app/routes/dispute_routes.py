@@ -4,6 +4,7 @@ from datetime import datetime
 from bson import ObjectId
 from app.database import get_database
 from app.dependencies import get_current_user
+from app.serialization import model_list_response
 from app.models import (
     DisputeCreate,
     DisputeUpdate,
@@ -127,7 +128,7 @@ async def get_my_disputes(current_user: dict = Depends(get_current_user)):
             )
         )
 
-    return disputes
+    return model_list_response(disputes, DisputeResponse)
 
 
 @router.get("/disputes-against-me", response_model=List[DisputeResponse])
@@ -163,7 +164,7 @@ async def get_disputes_against_me(current_user: dict = Depends(get_current_user)
             )
         )
 
-    return disputes
+    return model_list_response(disputes, DisputeResponse)
 
 
 @router.get("/{dispute_id}", response_model=DisputeResponse)
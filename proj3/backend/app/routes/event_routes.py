@@ -1,17 +1,23 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
 from datetime import datetime
 from bson import ObjectId
-from typing import List
+from typing import List, Optional
 
 from ..models import NeighborhoodEventCreate, NeighborhoodEventResponse, EventDish
 from ..database import get_database
 from ..dependencies import get_current_user
+from ..loaders import Loaders, get_loaders
 
 router = APIRouter(prefix="/api/events", tags=["Events"])
 
 
+def _user_name(user) -> Optional[str]:
+    return (user.get("full_name") or user.get("email")) if user else None
+
+
 # Helper to serialize event doc
-async def event_to_response(event: dict, db) -> NeighborhoodEventResponse:
+async def event_to_response(event: dict, loaders: Loaders) -> NeighborhoodEventResponse:
     # Normalize dishes: ensure seller_id (and any ObjectId) become strings
     raw_dishes = event.get("dishes", []) or []
     processed_dishes = []
@@ -28,19 +34,6 @@ async def event_to_response(event: dict, db) -> NeighborhoodEventResponse:
                 pd["seller_id"] = str(pd["seller_id"])
             except Exception:
                 pd["seller_id"] = pd.get("seller_id")
-            # Try to resolve seller name from users collection
-            seller_name = None
-            try:
-                try:
-                    seller_user = await db.users.find_one({"_id": ObjectId(pd["seller_id"])})
-                except Exception:
-                    seller_user = await db.users.find_one({"_id": pd["seller_id"]})
-                if seller_user:
-                    seller_name = seller_user.get("full_name") or seller_user.get("email")
-            except Exception:
-                seller_name = None
-            if seller_name:
-                pd["seller_name"] = seller_name
         if pd.get("id") is not None:
             try:
                 pd["id"] = str(pd["id"])
@@ -48,30 +41,27 @@ async def event_to_response(event: dict, db) -> NeighborhoodEventResponse:
                 pd["id"] = pd.get("id")
         processed_dishes.append(pd)
 
-    # Resolve attendee names (if possible) into list of objects {id, name}
-    attendees_raw = event.get("attendees", []) or []
-    attendees_out = []
-    for a in attendees_raw:
-        # attendee may be an ObjectId or string
-        try:
-            aid = str(a)
-        except Exception:
-            aid = a
-
-        name = None
-        try:
-            # try to look up user by ObjectId
-            user = None
-            try:
-                user = await db.users.find_one({"_id": ObjectId(aid)})
-            except Exception:
-                user = await db.users.find_one({"_id": aid})
-            if user:
-                name = user.get("full_name") or user.get("email")
-        except Exception:
-            name = None
+    # attendee may be an ObjectId or string
+    attendee_ids = [str(a) for a in event.get("attendees", []) or []]
 
-        attendees_out.append({"id": aid, "name": name})
+    # Dish sellers and attendees in one batched users lookup
+    sellers, attendees = await asyncio.gather(
+        loaders.users.load_many(
+            pd["seller_id"] for pd in processed_dishes if pd.get("seller_id") is not None
+        ),
+        loaders.users.load_many(attendee_ids),
+    )
+    sellers = iter(sellers)
+    for pd in processed_dishes:
+        if pd.get("seller_id") is not None:
+            seller_name = _user_name(next(sellers))
+            if seller_name:
+                pd["seller_name"] = seller_name
+
+    # Resolve attendee names (if possible) into list of objects {id, name}
+    attendees_out = [
+        {"id": aid, "name": _user_name(user)} for aid, user in zip(attendee_ids, attendees)
+    ]
 
     return NeighborhoodEventResponse(
         id=str(event.get("_id")),
@@ -91,17 +81,19 @@ async def event_to_response(event: dict, db) -> NeighborhoodEventResponse:
 
 
 @router.get("/", response_model=List[NeighborhoodEventResponse])
-async def list_events():
+async def list_events(loaders: Loaders = Depends(get_loaders)):
     db = get_database()
     events = await db.events.find().to_list(length=100)
-    out = []
-    for e in events:
-        out.append(await event_to_response(e, db))
-    return out
+    # Concurrently, so every event's users land in the same batch
+    return await asyncio.gather(*(event_to_response(e, loaders) for e in events))
 
 
 @router.post("/", response_model=NeighborhoodEventResponse, status_code=status.HTTP_201_CREATED)
-async def create_event(event: NeighborhoodEventCreate, current_user: dict = Depends(get_current_user)):
+async def create_event(
+    event: NeighborhoodEventCreate,
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders),
+):
     db = get_database()
     now = datetime.utcnow()
     event_doc = event.dict()
@@ -115,11 +107,15 @@ async def create_event(event: NeighborhoodEventCreate, current_user: dict = Depe
     })
     result = await db.events.insert_one(event_doc)
     event_doc["_id"] = result.inserted_id
-    return await event_to_response(event_doc, db)
+    loaders.users.prime(current_user)
+    return await event_to_response(event_doc, loaders)
 
 
 @router.get("/mine", response_model=List[NeighborhoodEventResponse])
-async def my_events(current_user: dict = Depends(get_current_user)):
+async def my_events(
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders),
+):
     """Return events the current user organized or joined."""
     db = get_database()
     user_id = current_user.get("_id")
@@ -131,21 +127,19 @@ async def my_events(current_user: dict = Depends(get_current_user)):
         ]
     })
     events = await cursor.to_list(length=200)
-    out = []
-    for e in events:
-        out.append(await event_to_response(e, db))
-    return out
+    loaders.users.prime(current_user)
+    return await asyncio.gather(*(event_to_response(e, loaders) for e in events))
 
 
 @router.get("/{event_id}", response_model=NeighborhoodEventResponse)
-async def get_event(event_id: str):
+async def get_event(event_id: str, loaders: Loaders = Depends(get_loaders)):
     db = get_database()
     if not ObjectId.is_valid(event_id):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event ID")
     event = await db.events.find_one({"_id": ObjectId(event_id)})
     if not event:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
-    return await event_to_response(event, db)
+    return await event_to_response(event, loaders)
 
 
 @router.post("/{event_id}/join")
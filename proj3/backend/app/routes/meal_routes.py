@@ -1,17 +1,62 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, UploadFile, File
+from fastapi.responses import Response
 from datetime import datetime
 from bson import ObjectId
 from typing import List, Optional
+from itertools import islice
 import os
 import uuid
 import math
 
-from ..models import MealCreate, MealUpdate, MealResponse, MealStatus
+from ..models import MealCreate, MealUpdate, MealResponse, MealStatus, MealSuggestion
+from ..browse_cache import browse_cache
 from ..database import get_database
 from ..dependencies import get_current_user, get_optional_current_user
+from ..etags import MEAL_CACHE_CONTROL, etag, etag_matches, not_modified, set_etag
+from ..loaders import Loaders, get_loaders
+from ..meal_cards import (
+    SNAPSHOT_FIELD,
+    has_seller_snapshot,
+    load_seller_snapshot,
+    seller_snapshot,
+)
+from ..serialization import dump_model_list, model_list_response
+from ..geo import (
+    DISTANCE_FIELD,
+    METERS_PER_MILE,
+    geo_near_pipeline,
+    geo_point,
+    meters_to_miles,
+)
+from ..pagination import (
+    NEWEST_FIRST,
+    created_before,
+    created_position,
+    decode_created_cursor,
+    decode_cursor,
+    next_cursor_headers,
+)
+from ..meal_index import nearby_meals, point_filter
+from ..search_index import (
+    SCORE_FIELD,
+    meal_search,
+    search_terms,
+    text_search_pipeline,
+    within_distance,
+)
+from ..suggest_index import meal_suggest
+from ..view_counter import meal_views
+from ..allergens import allergen_exclusion, allergen_mask
+from ..dietary import dietary_tags, dietary_tags_filter
+from ..ingredients import ingredient_exclusion_filter, ingredient_tokens
 
 router = APIRouter(prefix="/api/meals", tags=["Meals"])
 
+# Uploaded photos are served by the StaticFiles mount at /static
+UPLOADS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "static", "uploads")
+)
+
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -47,123 +92,23 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     return round(distance, 1)  # Round to 1 decimal place
 
 
-# Helper function to get dietary restriction exclusion rules
-def get_dietary_exclusions(dietary_restriction: str):
-    """Get ingredients and allergens to exclude based on dietary restriction"""
-    rules = {
-        "vegetarian": {
-            "ingredients": [
-                "beef",
-                "pork",
-                "chicken",
-                "turkey",
-                "lamb",
-                "meat",
-                "fish",
-                "seafood",
-                "shrimp",
-                "salmon",
-                "tuna",
-            ],
-            "allergens": [],
-        },
-        "vegan": {
-            "ingredients": [
-                "beef",
-                "pork",
-                "chicken",
-                "turkey",
-                "lamb",
-                "meat",
-                "fish",
-                "seafood",
-                "shrimp",
-                "cheese",
-                "butter",
-                "cream",
-                "milk",
-                "yogurt",
-                "honey",
-                "egg",
-            ],
-            "allergens": ["dairy", "eggs", "milk"],
-        },
-        "pescatarian": {
-            "ingredients": ["beef", "pork", "chicken", "turkey", "lamb", "meat"],
-            "allergens": [],
-        },
-        "gluten-free": {
-            "ingredients": [
-                "wheat",
-                "flour",
-                "bread",
-                "pasta",
-                "barley",
-                "rye",
-                "noodles",
-            ],
-            "allergens": ["wheat", "gluten"],
-        },
-        "dairy-free": {
-            "ingredients": [
-                "cheese",
-                "butter",
-                "cream",
-                "milk",
-                "yogurt",
-                "whey",
-                "casein",
-            ],
-            "allergens": ["dairy", "milk"],
-        },
-        "nut-free": {
-            "ingredients": [
-                "peanut",
-                "almond",
-                "walnut",
-                "cashew",
-                "pecan",
-                "hazelnut",
-                "pistachio",
-            ],
-            "allergens": ["peanuts", "tree nuts", "nuts"],
-        },
-        "keto": {
-            "ingredients": [
-                "bread",
-                "pasta",
-                "rice",
-                "potato",
-                "sugar",
-                "flour",
-                "noodles",
-                "corn",
-            ],
-            "allergens": [],
-        },
-        "paleo": {
-            "ingredients": [
-                "bread",
-                "pasta",
-                "rice",
-                "bean",
-                "lentil",
-                "dairy",
-                "sugar",
-                "flour",
-            ],
-            "allergens": [],
-        },
-    }
-    return rules.get(dietary_restriction.lower(), {"ingredients": [], "allergens": []})
-
-
 # Helper function to serialize MongoDB meal
-def meal_to_response(meal: dict, seller: dict, user_lat: Optional[float] = None, user_lon: Optional[float] = None) -> MealResponse:
-    """Convert MongoDB meal document to MealResponse"""
-    # Calculate distance if user location and seller location are available
+def meal_to_response(
+    meal: dict,
+    seller: Optional[dict],
+    user_lat: Optional[float] = None,
+    user_lon: Optional[float] = None,
+) -> MealResponse:
+    """Convert MongoDB meal document to MealResponse.
+
+    With ``seller`` None the seller fields come from the meal's snapshot.
+    """
+    card = seller_snapshot(seller) if seller is not None else meal[SNAPSHOT_FIELD]
+    # $geoNear results carry the distance already; otherwise compute it
     distance = None
-    if user_lat is not None and user_lon is not None:
+    if meal.get(DISTANCE_FIELD) is not None:
+        distance = meters_to_miles(meal[DISTANCE_FIELD])
+    elif user_lat is not None and user_lon is not None:
         seller_location = meal.get("seller_location", {})
         seller_lat = seller_location.get("latitude")
         seller_lon = seller_location.get("longitude")
@@ -173,8 +118,8 @@ def meal_to_response(meal: dict, seller: dict, user_lat: Optional[float] = None,
     return MealResponse(
         id=str(meal["_id"]),
         seller_id=str(meal["seller_id"]),
-        seller_name=seller["full_name"],
-        seller_rating=seller.get("stats", {}).get("average_rating", 0.0),
+        seller_name=card["full_name"],
+        seller_rating=card["average_rating"],
         title=meal["title"],
         description=meal["description"],
         cuisine_type=meal["cuisine_type"],
@@ -194,32 +139,225 @@ def meal_to_response(meal: dict, seller: dict, user_lat: Optional[float] = None,
         pickup_instructions=meal.get("pickup_instructions"),
         average_rating=meal.get("average_rating", 0.0),
         total_reviews=meal.get("total_reviews", 0),
-        views=meal.get("views", 0),
+        views=meal.get("views", 0) + meal_views.pending(meal["_id"]),
         created_at=meal["created_at"],
         updated_at=meal["updated_at"],
         distance=distance,
     )
 
 
-def check_meal_matches_dietary_restriction(
-    meal: dict, dietary_restriction: str
-) -> bool:
-    """Check if a meal matches a dietary restriction"""
-    exclusions = get_dietary_exclusions(dietary_restriction)
+# Most batches an index-served page may fetch when MongoDB drops candidates
+MAX_PAGE_BATCHES = 5
+
+
+async def find_meals_recent(
+    db, query: dict, cursor: Optional[str], skip: int, limit: int
+):
+    """Newest-first page of meals keyed on (created_at, _id).
+
+    Returns the meals and the position to resume from, or None when there
+    are no more results.
+    """
+    after = decode_created_cursor(cursor) if cursor else None
+    if limit <= 0:
+        return [], None
+
+    page_query = query if after is None else {"$and": [query, created_before(*after)]}
+    meals = (
+        await db.meals.find(page_query)
+        .sort(NEWEST_FIRST)
+        .skip(skip if after is None else 0)
+        .limit(limit)
+        .to_list(length=None)
+    )
+    if len(meals) < limit:
+        return meals, None
+    return meals, created_position(meals[-1])
+
+
+async def find_meals_near(
+    db,
+    query: dict,
+    latitude: float,
+    longitude: float,
+    max_distance_miles: Optional[float],
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+):
+    """Nearest-first page of meals.
+
+    Served from the in-process nearby-meal index once it is built, else
+    from $geoNear. Returns the meals and the position to resume from, or
+    None when there are no more results.
+    """
+    after = None
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            after = (float(position["d"]), str(position["id"]))
+        except (KeyError, TypeError, ValueError):
+            after = None
+        if after is None or not ObjectId.is_valid(after[1]):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    if limit <= 0:
+        return [], None
+
+    if nearby_meals.ready:
+        return await _find_meals_indexed(
+            db, query, latitude, longitude, max_distance_miles, after, skip, limit
+        )
+
+    pipeline = geo_near_pipeline(
+        query, latitude, longitude, max_distance_miles, after, skip, limit
+    )
+    meals = await db.meals.aggregate(pipeline).to_list(length=None)
+    if len(meals) < limit:
+        return meals, None
+    return meals, {"d": meals[-1][DISTANCE_FIELD], "id": str(meals[-1]["_id"])}
+
+
+async def _find_meals_indexed(
+    db, query, latitude, longitude, max_distance_miles, after, skip, limit
+):
+    """find_meals_near using nearby_meals for ordering and distances.
 
-    # Check allergens
-    meal_allergens = meal.get("allergen_info", {}).get("contains", [])
-    for allergen in exclusions["allergens"]:
-        if any(allergen.lower() in ma.lower() for ma in meal_allergens):
-            return False
+    The index pre-filters on cuisine, meal type, price and dietary tags;
+    the candidates are then fetched by _id with the full query, so meals
+    changed by another worker since the last rebuild are still filtered.
+    """
+    max_distance = None
+    if max_distance_miles is not None:
+        max_distance = max_distance_miles * METERS_PER_MILE
+    nearest = nearby_meals.nearest(
+        latitude, longitude, max_distance, after, point_filter(query)
+    )
 
-    # Check ingredients (now a string)
-    meal_ingredients_str = meal.get("ingredients", "").lower()
-    for excluded_ing in exclusions["ingredients"]:
-        if excluded_ing in meal_ingredients_str:
-            return False
+    meals = []
+    for _ in range(MAX_PAGE_BATCHES):
+        batch = list(islice(nearest, limit))
+        if not batch:
+            return meals, None
+        ids = [ObjectId(point.id) for _, point in batch]
+        found = await db.meals.find({**query, "_id": {"$in": ids}}).to_list(length=None)
+        by_id = {str(meal["_id"]): meal for meal in found}
+        for distance, point in batch:
+            after = (distance, point.id)
+            meal = by_id.get(point.id)
+            if meal is None:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            meal[DISTANCE_FIELD] = distance
+            meals.append(meal)
+            if len(meals) == limit:
+                return meals, {"d": after[0], "id": after[1]}
+        if len(batch) < limit:
+            return meals, None
+    return meals, {"d": after[0], "id": after[1]}
+
+
+async def find_meals_matching(
+    db,
+    query: dict,
+    text: str,
+    latitude: Optional[float],
+    longitude: Optional[float],
+    max_distance: Optional[float],
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+):
+    """Best-first page of meals matching a search.
 
-    return True
+    Ranked by BM25 from the in-process search index once it is built, else
+    by MongoDB's $text score. The cursor records which engine ranked the
+    page, since their scores are not comparable. Returns the meals and the
+    position to resume from, or None when there are no more results.
+    """
+    after, engine = None, None
+    if cursor:
+        position = decode_cursor(cursor)
+        try:
+            after = (float(position["s"]), str(position["id"]))
+            engine = position["e"]
+        except (KeyError, TypeError, ValueError):
+            after = None
+        if after is None or not ObjectId.is_valid(after[1]) or engine not in ("bm25", "text"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+
+    terms = search_terms(text)
+    if limit <= 0 or not terms:
+        return [], None
+
+    if engine == "bm25" or (engine is None and meal_search.ready):
+        if not meal_search.ready:
+            # A later page landed on a worker that is still building its index
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Search is warming up, please try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        return await _find_meals_searched(
+            db, query, text, latitude, longitude, max_distance, after, skip, limit
+        )
+
+    if after is not None:
+        after = (after[0], ObjectId(after[1]))
+    pipeline = text_search_pipeline(
+        query, terms, latitude, longitude, max_distance, after, skip, limit
+    )
+    meals = await db.meals.aggregate(pipeline).to_list(length=None)
+    if len(meals) < limit:
+        return meals, None
+    return meals, {"s": meals[-1][SCORE_FIELD], "id": str(meals[-1]["_id"]), "e": "text"}
+
+
+async def _find_meals_searched(
+    db, query, text, latitude, longitude, max_distance, after, skip, limit
+):
+    """find_meals_matching using meal_search for ranking.
+
+    The index pre-filters like the nearby-meal index, plus the radius;
+    candidates are then fetched by _id with the full query.
+    """
+    filters = [f for f in (point_filter(query),) if f is not None]
+    if max_distance is not None:
+        filters.append(within_distance(latitude, longitude, max_distance))
+
+    def match(point):
+        return all(f(point) for f in filters)
+
+    ranked = meal_search.search(text, after, match if filters else None)
+
+    meals = []
+    for _ in range(MAX_PAGE_BATCHES):
+        batch = list(islice(ranked, limit))
+        if not batch:
+            return meals, None
+        ids = [ObjectId(point.id) for _, point in batch]
+        found = await db.meals.find({**query, "_id": {"$in": ids}}).to_list(length=None)
+        by_id = {str(meal["_id"]): meal for meal in found}
+        for score, point in batch:
+            after = (score, point.id)
+            meal = by_id.get(point.id)
+            if meal is None:
+                continue
+            if skip:
+                skip -= 1
+                continue
+            meals.append(meal)
+            if len(meals) == limit:
+                return meals, {"s": after[0], "id": after[1], "e": "bm25"}
+        if len(batch) < limit:
+            return meals, None
+    return meals, {"s": after[0], "id": after[1], "e": "bm25"}
 
 
 # Upload one or more photos for a meal. Returns list of accessible URLs.
@@ -232,8 +370,7 @@ async def upload_photos(
 
     Returns list of URLs that can be stored in the meal `photos` field.
     """
-    uploads_dir = os.path.join(os.path.dirname(__file__), "..", "static", "uploads")
-    uploads_dir = os.path.abspath(uploads_dir)
+    uploads_dir = UPLOADS_DIR
     os.makedirs(uploads_dir, exist_ok=True)
 
     saved_urls: List[str] = []
@@ -270,15 +407,19 @@ async def create_meal(meal: MealCreate, current_user: dict = Depends(get_current
 
     # Get seller's location from their profile for distance calculations
     seller_location = current_user.get("location", {})
+    meal_location = {
+        "latitude": seller_location.get("latitude"),
+        "longitude": seller_location.get("longitude"),
+        "city": seller_location.get("city"),
+        "state": seller_location.get("state"),
+    }
+    point = geo_point(meal_location["latitude"], meal_location["longitude"])
+    if point:
+        meal_location["geo"] = point
 
     meal_doc = {
         "seller_id": current_user["_id"],
-        "seller_location": {
-            "latitude": seller_location.get("latitude"),
-            "longitude": seller_location.get("longitude"),
-            "city": seller_location.get("city"),
-            "state": seller_location.get("state"),
-        },
+        "seller_location": meal_location,
         "title": meal.title,
         "description": meal.description,
         "cuisine_type": meal.cuisine_type,
@@ -302,18 +443,24 @@ async def create_meal(meal: MealCreate, current_user: dict = Depends(get_current
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
     }
+    meal_doc["dietary_tags"] = dietary_tags(meal_doc)
+    meal_doc["ingredient_tokens"] = ingredient_tokens(meal_doc)
+    meal_doc["allergen_mask"] = allergen_mask(meal_doc)
+    meal_doc[SNAPSHOT_FIELD] = await load_seller_snapshot(db, current_user)
 
     result = await db.meals.insert_one(meal_doc)
 
     # Fetch the created meal
     created_meal = await db.meals.find_one({"_id": result.inserted_id})
+    nearby_meals.upsert(created_meal)
+    meal_search.upsert(created_meal)
+    meal_suggest.upsert(created_meal)
+    browse_cache.invalidate_meal(created_meal)
 
-    return meal_to_response(created_meal, current_user)
+    return meal_to_response(created_meal, None)
 
 
-# Get all meals with filters
-@router.get("/", response_model=List[MealResponse])
-async def get_meals(
+def meal_filter_query(
     cuisine_type: Optional[str] = None,
     meal_type: Optional[str] = None,
     dietary_restriction: Optional[str] = Query(
@@ -331,16 +478,8 @@ async def get_meals(
         None, description="Comma-separated list of ingredients to exclude"
     ),
     min_rating: Optional[float] = None,
-    latitude: Optional[float] = Query(None, description="User's latitude for distance calculation"),
-    longitude: Optional[float] = Query(None, description="User's longitude for distance calculation"),
-    max_distance_miles: Optional[float] = Query(None, description="Maximum distance in miles from user's location"),
-    skip: int = 0,
-    limit: int = 20,
-):
-    """Get all available meals with optional filters"""
-    db = get_database()
-
-    # Build query filters
+) -> dict:
+    """MongoDB query for available meals matching the browse/search filters"""
     query = {"status": MealStatus.AVAILABLE}
 
     if cuisine_type:
@@ -356,68 +495,182 @@ async def get_meals(
     if min_rating is not None:
         query["average_rating"] = {"$gte": min_rating}
 
-    # Filter by specific allergens
+    # Exclude meals that contain (or may contain) any of these allergens
     if exclude_allergens:
-        allergen_list = [a.strip() for a in exclude_allergens.split(",")]
-        # Exclude meals that contain any of these allergens
-        for allergen in allergen_list:
-            if "allergen_info.contains" not in query:
-                query["allergen_info.contains"] = {"$nin": []}
-            query["allergen_info.contains"]["$nin"].append(allergen)
-
-    # Filter by specific ingredients (case-insensitive)
+        query.update(allergen_exclusion(exclude_allergens.split(",")))
+
+    # Filter by specific ingredients (normalized ingredient_tokens)
     if exclude_ingredients:
-        ingredient_list = [i.strip() for i in exclude_ingredients.split(",")]
-        # Create regex patterns for each ingredient
-        ingredient_patterns = [
-            {"ingredients.name": {"$not": {"$regex": ing, "$options": "i"}}}
-            for ing in ingredient_list
-        ]
-        if "$and" in query:
-            query["$and"].extend(ingredient_patterns)
-        else:
-            query["$and"] = ingredient_patterns
-
-    # Fetch meals
-    meals_cursor = db.meals.find(query).skip(skip).limit(limit * 2).sort("created_at", -1)  # Fetch more to account for distance filtering
-    meals = await meals_cursor.to_list(length=None)
-
-    # Apply dietary restriction filter (post-query filtering for complex logic)
+        excluded = ingredient_exclusion_filter(exclude_ingredients.split(","))
+        if excluded:
+            query["ingredient_tokens"] = excluded
+
+    # Filter on the dietary_tags stored by create_meal/update_meal
     if dietary_restriction:
-        meals = [
-            meal
-            for meal in meals
-            if check_meal_matches_dietary_restriction(meal, dietary_restriction)
-        ]
+        tags = dietary_tags_filter([dietary_restriction])
+        if tags:
+            query["dietary_tags"] = tags
+
+    return query
+
+
+async def with_sellers(
+    loaders: Loaders, meals: list, latitude=None, longitude=None
+) -> List[MealResponse]:
+    """MealResponses for meals whose seller still exists.
+
+    Meals carrying a seller snapshot need no lookup; sellers of the others
+    are fetched in one users query.
+    """
+    missing = [meal for meal in meals if not has_seller_snapshot(meal)]
+    sellers = await loaders.users.load_many(meal["seller_id"] for meal in missing)
+    found = {id(meal): seller for meal, seller in zip(missing, sellers)}
 
-    # Fetch sellers and calculate distances for each meal
     meal_responses = []
     for meal in meals:
-        seller = await db.users.find_one({"_id": meal["seller_id"]})
-        if seller:
-            meal_response = meal_to_response(meal, seller, latitude, longitude)
-
-            # Filter by distance if coordinates are provided
-            if max_distance_miles is not None and latitude is not None and longitude is not None:
-                # Only include meals within the max distance
-                if meal_response.distance is not None and meal_response.distance <= max_distance_miles:
-                    meal_responses.append(meal_response)
-            else:
-                meal_responses.append(meal_response)
-
-    # Sort by distance if user location is provided, otherwise by creation date
+        if id(meal) not in found:
+            meal_responses.append(meal_to_response(meal, None, latitude, longitude))
+        elif found[id(meal)]:
+            meal_responses.append(meal_to_response(meal, found[id(meal)], latitude, longitude))
+    return meal_responses
+
+
+async def find_browse_page(
+    db, query, latitude, longitude, max_distance_miles, cursor, skip, limit
+):
+    """Meals and next position for a get_meals page"""
     if latitude is not None and longitude is not None:
-        # Sort by distance (None values go to the end)
-        meal_responses.sort(key=lambda m: (m.distance is None, m.distance if m.distance is not None else float('inf')))
+        # Nearest first, from the nearby-meal index or $geoNear
+        return await find_meals_near(
+            db, query, latitude, longitude, max_distance_miles, cursor, skip, limit
+        )
+    # Newest first, resuming from the cursor's (created_at, _id)
+    return await find_meals_recent(db, query, cursor, skip, limit)
+
+
+# Get all meals with filters
+@router.get("/", response_model=List[MealResponse])
+async def get_meals(
+    query: dict = Depends(meal_filter_query),
+    latitude: Optional[float] = Query(None, description="User's latitude for distance calculation"),
+    longitude: Optional[float] = Query(None, description="User's longitude for distance calculation"),
+    max_distance_miles: Optional[float] = Query(None, description="Maximum distance in miles from user's location"),
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """Get all available meals with optional filters"""
+    db = get_database()
+
+    if not browse_cache.enabled or (latitude is not None and longitude is not None):
+        # Location pages are not cached: distances and the radius cut-off
+        # depend on the caller's exact point
+        meals, next_position = await find_browse_page(
+            db, query, latitude, longitude, max_distance_miles, cursor, skip, limit
+        )
+        meal_responses = await with_sellers(loaders, meals, latitude, longitude)
+        return model_list_response(
+            meal_responses, MealResponse, next_cursor_headers(next_position)
+        )
+
+    async def fill():
+        meals, next_position = await find_browse_page(
+            db, query, None, None, max_distance_miles, cursor, skip, limit
+        )
+        meal_responses = await with_sellers(loaders, meals, None, None)
+        return (
+            dump_model_list(meal_responses, MealResponse),
+            next_cursor_headers(next_position),
+            [meal["seller_id"] for meal in meals],
+        )
+
+    body, headers = await browse_cache.get_or_fill(
+        browse_cache.key(query, max_distance_miles, skip, limit, cursor),
+        query.get("cuisine_type"),
+        fill,
+    )
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Full-text search ranked by relevance
+@router.get("/search", response_model=List[MealResponse])
+async def search_meals(
+    q: str = Query(..., min_length=1, description="Words to search for"),
+    query: dict = Depends(meal_filter_query),
+    latitude: Optional[float] = Query(
+        None, description="User's latitude for distance calculation"
+    ),
+    longitude: Optional[float] = Query(
+        None, description="User's longitude for distance calculation"
+    ),
+    max_distance_miles: Optional[float] = Query(
+        None, description="Maximum distance in miles from user's location"
+    ),
+    skip: int = 0,
+    limit: int = 20,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    loaders: Loaders = Depends(get_loaders),
+):
+    """Search available meals by title, description, ingredients and cuisine"""
+    db = get_database()
+
+    max_distance = None
+    if latitude is not None and longitude is not None and max_distance_miles is not None:
+        max_distance = max_distance_miles * METERS_PER_MILE
+    meals, next_position = await find_meals_matching(
+        db, query, q, latitude, longitude, max_distance, cursor, skip, limit
+    )
+
+    meal_responses = await with_sellers(loaders, meals, latitude, longitude)
+    return model_list_response(
+        meal_responses, MealResponse, next_cursor_headers(next_position)
+    )
+
+
+# Type-ahead suggestions from the in-process prefix index
+@router.get("/suggest", response_model=List[MealSuggestion])
+async def suggest_meals(
+    prefix: str = Query(..., description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=25),
+):
+    """Meal titles, cuisines and ingredients starting with a prefix, most popular first"""
+    suggestions = [
+        MealSuggestion(text=s.text, kind=s.kind, meal_count=s.meals)
+        for s in meal_suggest.suggest(prefix, limit)
+    ]
+    return model_list_response(suggestions, MealSuggestion)
 
-    # Apply final limit
-    return meal_responses[:limit]
+
+# Fields a meal's ETag is derived from
+MEAL_VERSION_FIELDS = {"updated_at": 1, SNAPSHOT_FIELD: 1}
+
+
+def meal_etag(meal: dict, seller: Optional[dict] = None) -> str:
+    """ETag of a meal response.
+
+    Weak, because the view count is left out: it changes on every read.
+    ``seller`` is given for meals without a seller snapshot.
+    """
+    seller_version = seller and (seller.get("updated_at") or seller.get("created_at"))
+    return etag(
+        "meal", meal["_id"], meal.get("updated_at"), meal.get(SNAPSHOT_FIELD), seller_version,
+        weak=True,
+    )
 
 
 # Get meal by ID
 @router.get("/{meal_id}", response_model=MealResponse)
-async def get_meal_by_id(meal_id: str):
-    """Get a specific meal by ID"""
+async def get_meal_by_id(
+    meal_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get a specific meal by ID (304 if it matches ``If-None-Match``)"""
     db = get_database()
 
     if not ObjectId.is_valid(meal_id):
@@ -425,23 +678,39 @@ async def get_meal_by_id(meal_id: str):
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid meal ID"
         )
 
+    if if_none_match:
+        # An unchanged meal costs one read of its version fields
+        version = await db.meals.find_one({"_id": ObjectId(meal_id)}, MEAL_VERSION_FIELDS)
+        if version and has_seller_snapshot(version):
+            tag = meal_etag(version)
+            if etag_matches(if_none_match, tag):
+                meal_views.record(version["_id"])
+                meal_suggest.viewed(meal_id)
+                return not_modified(tag, MEAL_CACHE_CONTROL)
+
     meal = await db.meals.find_one({"_id": ObjectId(meal_id)})
     if not meal:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found"
         )
 
-    # Increment views
-    await db.meals.update_one({"_id": ObjectId(meal_id)}, {"$inc": {"views": 1}})
-    meal["views"] = meal.get("views", 0) + 1
+    # Count the view; it is written with the next batched flush
+    meal_views.record(meal["_id"])
+    meal_suggest.viewed(meal_id)
 
-    # Fetch seller
-    seller = await db.users.find_one({"_id": meal["seller_id"]})
-    if not seller:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found"
-        )
+    seller = None
+    if not has_seller_snapshot(meal):
+        # Fetch seller (meals listed before seller snapshots)
+        seller = await db.users.find_one({"_id": meal["seller_id"]})
+        if not seller:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Seller not found"
+            )
 
+    tag = meal_etag(meal, seller)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag, MEAL_CACHE_CONTROL)
+    set_etag(response, tag, MEAL_CACHE_CONTROL)
     return meal_to_response(meal, seller)
 
 
@@ -457,7 +726,7 @@ async def get_my_meals(current_user: dict = Depends(get_current_user)):
     meals = await meals_cursor.to_list(length=100)
 
     meal_responses = [meal_to_response(meal, current_user) for meal in meals]
-    return meal_responses
+    return model_list_response(meal_responses, MealResponse)
 
 
 # Get meals matching user's dietary preferences
@@ -469,6 +738,10 @@ async def get_recommended_meals(
     max_distance_miles: Optional[float] = Query(None, description="Maximum distance in miles from user's location"),
     skip: int = 0,
     limit: int = 20,
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor value from the previous page"
+    ),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """Get meals that match the user's dietary preferences"""
     db = get_database()
@@ -479,66 +752,38 @@ async def get_recommended_meals(
     query = {"status": MealStatus.AVAILABLE, "seller_id": {"$ne": current_user["_id"]}}
 
     # Exclude user's allergens
-    allergens = dietary_prefs.get("allergens", [])
-    if allergens:
-        for allergen in allergens:
-            if "allergen_info.contains" not in query:
-                query["allergen_info.contains"] = {"$nin": []}
-            query["allergen_info.contains"]["$nin"].append(allergen)
+    query.update(allergen_exclusion(dietary_prefs.get("allergens", [])))
 
     # Exclude user's avoided ingredients
-    avoid_ingredients = dietary_prefs.get("avoid_ingredients", [])
-    if avoid_ingredients:
-        ingredient_patterns = [
-            {"ingredients.name": {"$not": {"$regex": ing, "$options": "i"}}}
-            for ing in avoid_ingredients
-        ]
-        query["$and"] = ingredient_patterns
-
-    # Fetch meals (fetch more to account for distance filtering)
-    meals_cursor = db.meals.find(query).skip(skip).limit(limit * 2).sort("created_at", -1)
-    meals = await meals_cursor.to_list(length=None)
-
-    # Apply dietary restrictions filter
-    dietary_restrictions = dietary_prefs.get("dietary_restrictions", [])
-    if dietary_restrictions:
-        # Filter meals that match ALL dietary restrictions
-        for restriction in dietary_restrictions:
-            meals = [
-                meal
-                for meal in meals
-                if check_meal_matches_dietary_restriction(meal, restriction)
-            ]
-
-    # Prefer cuisine preferences if specified
-    cuisine_prefs = dietary_prefs.get("cuisine_preferences", [])
-    if cuisine_prefs:
-        preferred_meals = [m for m in meals if m.get("cuisine_type") in cuisine_prefs]
-        other_meals = [m for m in meals if m.get("cuisine_type") not in cuisine_prefs]
-        meals = preferred_meals + other_meals
-
-    # Fetch sellers and calculate distances for each meal
-    meal_responses = []
-    for meal in meals:
-        seller = await db.users.find_one({"_id": meal["seller_id"]})
-        if seller:
-            meal_response = meal_to_response(meal, seller, latitude, longitude)
-
-            # Filter by distance if coordinates are provided
-            if max_distance_miles is not None and latitude is not None and longitude is not None:
-                # Only include meals within the max distance
-                if meal_response.distance is not None and meal_response.distance <= max_distance_miles:
-                    meal_responses.append(meal_response)
-            else:
-                meal_responses.append(meal_response)
-
-    # Sort by distance if user location is provided
-    if latitude is not None and longitude is not None:
-        # Sort by distance (None values go to the end)
-        meal_responses.sort(key=lambda m: (m.distance is None, m.distance if m.distance is not None else float('inf')))
+    excluded = ingredient_exclusion_filter(dietary_prefs.get("avoid_ingredients", []))
+    if excluded:
+        query["ingredient_tokens"] = excluded
 
-    # Apply final limit
-    return meal_responses[:limit]
+    # Meals must match ALL of the user's dietary restrictions
+    tags = dietary_tags_filter(dietary_prefs.get("dietary_restrictions", []))
+    if tags:
+        query["dietary_tags"] = tags
+
+    if latitude is not None and longitude is not None:
+        # Nearest first, from the nearby-meal index or $geoNear
+        meals, next_position = await find_meals_near(
+            db, query, latitude, longitude, max_distance_miles, cursor, skip, limit
+        )
+    else:
+        # Newest first, resuming from the cursor's (created_at, _id)
+        meals, next_position = await find_meals_recent(db, query, cursor, skip, limit)
+
+        # Prefer cuisine preferences if specified (within the page)
+        cuisine_prefs = dietary_prefs.get("cuisine_preferences", [])
+        if cuisine_prefs:
+            preferred_meals = [m for m in meals if m.get("cuisine_type") in cuisine_prefs]
+            other_meals = [m for m in meals if m.get("cuisine_type") not in cuisine_prefs]
+            meals = preferred_meals + other_meals
+
+    meal_responses = await with_sellers(loaders, meals, latitude, longitude)
+    return model_list_response(
+        meal_responses, MealResponse, next_cursor_headers(next_position)
+    )
 
 
 # Update a meal
@@ -602,6 +847,13 @@ async def update_meal(
         update_data["status"] = meal_update.status
     if meal_update.pickup_instructions is not None:
         update_data["pickup_instructions"] = meal_update.pickup_instructions
+    if "ingredients" in update_data or "allergen_info" in update_data:
+        update_data["dietary_tags"] = dietary_tags({**meal, **update_data})
+    if "ingredients" in update_data:
+        update_data["ingredient_tokens"] = ingredient_tokens(update_data)
+    if "allergen_info" in update_data:
+        update_data["allergen_mask"] = allergen_mask(update_data)
+    update_data[SNAPSHOT_FIELD] = await load_seller_snapshot(db, current_user)
 
     # Update meal
     result = await db.meals.update_one(
@@ -615,7 +867,11 @@ async def update_meal(
 
     # Fetch updated meal
     updated_meal = await db.meals.find_one({"_id": ObjectId(meal_id)})
-    return meal_to_response(updated_meal, current_user)
+    nearby_meals.upsert(updated_meal)
+    meal_search.upsert(updated_meal)
+    meal_suggest.upsert(updated_meal)
+    browse_cache.invalidate_meal(meal, updated_meal)
+    return meal_to_response(updated_meal, None)
 
 
 # Delete a meal
@@ -649,5 +905,9 @@ async def delete_meal(meal_id: str, current_user: dict = Depends(get_current_use
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Meal not found"
         )
+    nearby_meals.remove(meal_id)
+    meal_search.remove(meal_id)
+    meal_suggest.remove(meal_id)
+    browse_cache.invalidate_meal(meal)
 
     return {"message": "Meal successfully deleted"}
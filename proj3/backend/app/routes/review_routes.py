@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Header, Response, status
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
@@ -10,6 +10,12 @@ from app.models import (
 )
 from app.database import get_database
 from app.dependencies import get_current_user
+from app.etags import REVIEWS_CACHE_CONTROL, etag, etag_matches, not_modified, set_etag
+from app.routes.user_routes import USER_VERSION_FIELDS, user_version
+from app.auth_cache import principal_cache
+from app.browse_cache import browse_cache
+from app.meal_cards import sync_seller_snapshot
+from app.serialization import model_list_response
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
@@ -97,21 +103,33 @@ async def create_review(
 
 @router.get("/user/{user_id}", response_model=UserReviewsSummary)
 async def get_user_reviews(
-    user_id: str, limit: int = 10, skip: int = 0
+    user_id: str,
+    response: Response,
+    limit: int = 10,
+    skip: int = 0,
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Get all reviews for a specific user (seller).
     This will be displayed on the user's bio page.
+
+    update_seller_stats sets the seller's updated_at on every review write,
+    so the seller's version fields are enough to answer If-None-Match.
     """
     db = get_database()
 
-    # Verify user exists
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    # Verify user exists (version fields only)
+    user = await db.users.find_one({"_id": ObjectId(user_id)}, USER_VERSION_FIELDS)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    tag = etag("reviews", user["_id"], user_version(user), skip, limit)
+    if etag_matches(if_none_match, tag):
+        return not_modified(tag, REVIEWS_CACHE_CONTROL)
+    set_etag(response, tag, REVIEWS_CACHE_CONTROL)
+
     # Get all reviews for this seller
     reviews_cursor = db.reviews.find({"seller_id": ObjectId(user_id)}).sort(
         "created_at", -1
@@ -170,7 +188,10 @@ async def get_meal_reviews(meal_id: str):
     )
     reviews = await reviews_cursor.to_list(length=None)
 
-    return [ReviewResponse(**serialize_review(review)) for review in reviews]
+    return model_list_response(
+        [ReviewResponse(**serialize_review(review)) for review in reviews],
+        ReviewResponse,
+    )
 
 
 @router.put("/{review_id}", response_model=ReviewResponse)
@@ -263,7 +284,10 @@ async def get_my_reviews(current_user: dict = Depends(get_current_user)):
     )
     reviews = await reviews_cursor.to_list(length=None)
 
-    return [ReviewResponse(**serialize_review(review)) for review in reviews]
+    return model_list_response(
+        [ReviewResponse(**serialize_review(review)) for review in reviews],
+        ReviewResponse,
+    )
 
 
 async def update_seller_stats(db, seller_id: str):
@@ -288,6 +312,13 @@ async def update_seller_stats(db, seller_id: str):
             "$set": {
                 "stats.average_rating": average_rating,
                 "stats.total_reviews": total_reviews,
+                # Also versions the seller's review summary (get_user_reviews ETag)
+                "updated_at": datetime.utcnow(),
             }
         },
     )
+
+    # Cached principals carry the old stats; drop them so /me reflects the new rating
+    principal_cache.invalidate_user(seller_id)
+    await sync_seller_snapshot(db, ObjectId(seller_id), average_rating=average_rating)
+    browse_cache.invalidate_seller(seller_id)
@@ -1,9 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
 from typing import List
 from datetime import datetime
 from bson import ObjectId
+from app.browse_cache import browse_cache
 from app.database import get_database
 from app.dependencies import get_current_user
+from app.loaders import Loaders, get_loaders
+from app.serialization import model_list_response
+from app.suggest_index import meal_suggest
 from app.models import (
     TransactionCreate,
     TransactionResponse,
@@ -57,6 +62,8 @@ async def create_transaction(
 
     result = await db.transactions.insert_one(transaction_doc)
     transaction_doc["_id"] = result.inserted_id
+    meal_suggest.sold(transaction_data.meal_id)
+    browse_cache.invalidate_meal(meal)
 
     return TransactionResponse(
         id=str(transaction_doc["_id"]),
@@ -74,7 +81,10 @@ async def create_transaction(
 
 
 @router.get("/my-orders", response_model=List[OrderHistoryResponse])
-async def get_my_orders(current_user: dict = Depends(get_current_user)):
+async def get_my_orders(
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders),
+):
     """
     Get all orders/transactions for the current user (as buyer).
     Returns transactions with meal details.
@@ -82,20 +92,24 @@ async def get_my_orders(current_user: dict = Depends(get_current_user)):
     db = get_database()
 
     orders = []
-    cursor = db.transactions.find({"buyer_id": str(current_user["_id"])}).sort(
-        "created_at", -1
+    transactions = await db.transactions.find(
+        {"buyer_id": str(current_user["_id"])}
+    ).sort("created_at", -1).to_list(length=None)
+
+    # Meals, and sellers not named in the transaction, one query each
+    meals, sellers = await asyncio.gather(
+        loaders.meals.load_many(t["meal_id"] for t in transactions),
+        loaders.users.load_many(
+            t["seller_id"] if not t.get("seller_name") else None for t in transactions
+        ),
     )
 
-    async for transaction in cursor:
-        # Get meal details
-        meal = await db.meals.find_one({"_id": ObjectId(transaction["meal_id"])})
-        
+    for transaction, meal, seller in zip(transactions, meals, sellers):
         # Get seller name if not in transaction
         seller_name = transaction.get("seller_name")
         if not seller_name:
-            seller = await db.users.find_one({"_id": ObjectId(transaction["seller_id"])})
             seller_name = seller.get("full_name", "Unknown Seller") if seller else "Unknown Seller"
-        
+
         order = OrderHistoryResponse(
             id=str(transaction["_id"]),
             transaction_id=str(transaction["_id"]),
@@ -116,31 +130,38 @@ async def get_my_orders(current_user: dict = Depends(get_current_user)):
         )
         orders.append(order)
 
-    return orders
+    return model_list_response(orders, OrderHistoryResponse)
 
 
 @router.get("/my-sales", response_model=List[OrderHistoryResponse])
-async def get_my_sales(current_user: dict = Depends(get_current_user)):
+async def get_my_sales(
+    current_user: dict = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders),
+):
     """
     Get all transactions where the current user is the seller.
     """
     db = get_database()
 
     sales = []
-    cursor = db.transactions.find({"seller_id": str(current_user["_id"])}).sort(
-        "created_at", -1
+    transactions = await db.transactions.find(
+        {"seller_id": str(current_user["_id"])}
+    ).sort("created_at", -1).to_list(length=None)
+
+    # Meals, and buyers not named in the transaction, one query each
+    meals, buyers = await asyncio.gather(
+        loaders.meals.load_many(t["meal_id"] for t in transactions),
+        loaders.users.load_many(
+            t["buyer_id"] if not t.get("buyer_name") else None for t in transactions
+        ),
     )
 
-    async for transaction in cursor:
-        # Get meal details
-        meal = await db.meals.find_one({"_id": ObjectId(transaction["meal_id"])})
-        
+    for transaction, meal, buyer in zip(transactions, meals, buyers):
         # Get buyer name if not in transaction
         buyer_name = transaction.get("buyer_name")
         if not buyer_name:
-            buyer = await db.users.find_one({"_id": ObjectId(transaction["buyer_id"])})
             buyer_name = buyer.get("full_name", "Unknown Buyer") if buyer else "Unknown Buyer"
-        
+
         sale = OrderHistoryResponse(
             id=str(transaction["_id"]),
             transaction_id=str(transaction["_id"]),
@@ -161,7 +182,7 @@ async def get_my_sales(current_user: dict = Depends(get_current_user)):
         )
         sales.append(sale)
 
-    return sales
+    return model_list_response(sales, OrderHistoryResponse)
 
 
 @router.get("/{transaction_id}", response_model=TransactionResponse)
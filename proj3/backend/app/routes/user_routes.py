@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Response
+from typing import Optional
 from datetime import datetime
 from bson import ObjectId
 
@@ -11,6 +12,13 @@ from ..models import (
 )
 from ..database import get_database
 from ..dependencies import get_current_user  # For authentication
+from ..etags import USER_CACHE_CONTROL, etag, etag_matches, not_modified, set_etag
+from ..auth_cache import principal_cache
+from ..browse_cache import browse_cache
+from ..meal_cards import sync_seller_snapshot
+from ..meal_index import nearby_meals
+from ..search_index import meal_search
+from ..suggest_index import meal_suggest
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
@@ -43,10 +51,22 @@ async def get_my_profile(current_user: dict = Depends(get_current_user)):
     return user_to_response(current_user)
 
 
+# Fields a user's ETag is derived from; every write to a user sets updated_at
+USER_VERSION_FIELDS = {"updated_at": 1, "created_at": 1}
+
+
+def user_version(user: dict):
+    return user.get("updated_at") or user.get("created_at")
+
+
 # Get user by ID (public profile)
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_by_id(user_id: str):
-    """Get a user's public profile by ID"""
+async def get_user_by_id(
+    user_id: str,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get a user's public profile by ID (304 if it matches ``If-None-Match``)"""
     db = get_database()
 
     if not ObjectId.is_valid(user_id):
@@ -54,12 +74,21 @@ async def get_user_by_id(user_id: str):
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user ID"
         )
 
+    if if_none_match:
+        # An unchanged profile costs one read of its version fields
+        version = await db.users.find_one({"_id": ObjectId(user_id)}, USER_VERSION_FIELDS)
+        if version:
+            tag = etag("user", version["_id"], user_version(version))
+            if etag_matches(if_none_match, tag):
+                return not_modified(tag, USER_CACHE_CONTROL)
+
     user = await db.users.find_one({"_id": ObjectId(user_id)})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
 
+    set_etag(response, etag("user", user["_id"], user_version(user)), USER_CACHE_CONTROL)
     return user_to_response(user)
 
 
@@ -101,6 +130,10 @@ async def update_my_profile(
 
     # Fetch updated user
     updated_user = await db.users.find_one({"_id": current_user["_id"]})
+    principal_cache.update_user(updated_user)
+    if updated_user.get("full_name") != current_user.get("full_name"):
+        await sync_seller_snapshot(db, current_user["_id"], full_name=updated_user.get("full_name"))
+        browse_cache.invalidate_seller(current_user["_id"])
     return user_to_response(updated_user)
 
 
@@ -129,6 +162,7 @@ async def update_dietary_preferences(
         )
 
     updated_user = await db.users.find_one({"_id": current_user["_id"]})
+    principal_cache.update_user(updated_user)
     return user_to_response(updated_user)
 
 
@@ -157,6 +191,7 @@ async def update_social_media(
         )
 
     updated_user = await db.users.find_one({"_id": current_user["_id"]})
+    principal_cache.update_user(updated_user)
     return user_to_response(updated_user)
 
 
@@ -168,12 +203,24 @@ async def delete_my_account(current_user: dict = Depends(get_current_user)):
 
     # Delete all user's meals
     await db.meals.delete_many({"seller_id": current_user["_id"]})
+    nearby_meals.remove_seller(current_user["_id"])
+    meal_search.remove_seller(current_user["_id"])
+    meal_suggest.remove_seller(current_user["_id"])
+    browse_cache.invalidate_seller(current_user["_id"])
+
+    # Delete all user's reviews, then recount the sellers they were about
+    # (also bumps their updated_at, which versions the review summary ETag)
+    from .review_routes import update_seller_stats  # review_routes imports this module
 
-    # Delete all user's reviews
+    reviewed = await db.reviews.distinct("seller_id", {"reviewer_id": current_user["_id"]})
     await db.reviews.delete_many({"reviewer_id": current_user["_id"]})
+    for seller_id in reviewed:
+        if seller_id is not None:
+            await update_seller_stats(db, str(seller_id))
 
     # Delete user
     result = await db.users.delete_one({"_id": current_user["_id"]})
+    principal_cache.invalidate_user(current_user["_id"])
 
     if result.deleted_count == 0:
         raise HTTPException(
@@ -0,0 +1,526 @@
+"""
+In-process full-text index of available meals, ranked with BM25.
+
+Each worker keeps an inverted index from normalized words (see
+``normalize_words``) to the meals that contain them, over ``title``,
+``description``, ``ingredients`` and ``cuisine_type``. Words in the title
+and cuisine count more than words in the other fields. Next to the
+postings it keeps the nearby-index ``MealPoint`` of every meal, so the
+simple filters of a search (cuisine, price, dietary tags, ingredients,
+allergens, distance) are applied before any meal is fetched.
+
+Like the nearby-meal index it is rebuilt from MongoDB at startup and every
+``SEARCH_INDEX_REFRESH_SECONDS``, and kept current by the meal write
+routes in between. Until the first build finishes, ``search_meals`` falls
+back to MongoDB's ``$text`` index.
+
+Queries of one word, or over short postings, walk impact-ordered postings
+in pure Python; longer multi-word queries are scored with NumPy when it is
+installed.
+"""
+
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+import os
+import sys
+import time
+from typing import Callable, Iterator, List, Optional
+
+from .geo import EARTH_RADIUS_METERS, GEO_FIELD
+from .ingredients import normalize_words
+from .meal_index import MealPoint
+from .models import MealStatus
+from .periodic import PeriodicTask
+
+try:
+    import numpy as np
+except ImportError:  # optional; every query walks impact-ordered postings
+    np = None
+
+SEARCH_INDEX_ENABLED = os.getenv("SEARCH_INDEX_ENABLED", "1") == "1"
+SEARCH_INDEX_REFRESH_SECONDS = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+
+# Searchable fields and how much one occurrence of a word in each counts
+FIELD_WEIGHTS = {"title": 3, "cuisine_type": 2, "ingredients": 1, "description": 1}
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Postings at least this long keep their impact order between queries
+IMPACT_MIN_POSTINGS = 256
+# Multi-word queries over at least this many postings are scored with NumPy
+NUMPY_MIN_POSTINGS = 1024
+
+# Relevance of each meal in $text fallback results
+SCORE_FIELD = "search_score"
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the to with".split()
+)
+
+# Fields read when building records from MongoDB
+_PROJECTION = {
+    "seller_id": 1,
+    "status": 1,
+    "seller_location.geo": 1,
+    "sale_price": 1,
+    "cuisine_type": 1,
+    "meal_type": 1,
+    "dietary_tags": 1,
+    "ingredient_tokens": 1,
+    "allergen_mask": 1,
+    **{field: 1 for field in FIELD_WEIGHTS},
+}
+
+
+def search_terms(text: str) -> List[str]:
+    """Distinct words of a search query, in order, without stop words"""
+    terms = []
+    for word in normalize_words(text):
+        if word not in STOP_WORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def _weighted_terms(meal: dict) -> dict:
+    """Weighted frequency of every word in the searchable fields"""
+    counts = {}
+    for field, weight in FIELD_WEIGHTS.items():
+        for word in normalize_words(meal.get(field) or ""):
+            if word not in STOP_WORDS:
+                counts[word] = counts.get(word, 0) + weight
+    return counts
+
+
+def text_search_pipeline(
+    query: dict,
+    terms: List[str],
+    latitude: Optional[float],
+    longitude: Optional[float],
+    max_distance: Optional[float],
+    after: Optional[tuple],
+    skip: int,
+    limit: int,
+) -> list:
+    """``$text`` aggregation ranking meals by MongoDB's text score.
+
+    ``max_distance`` is in meters (``$text`` cannot be combined with
+    ``$geoNear``, so the radius is a ``$geoWithin``). ``after`` is the
+    ``(score, _id)`` of the last meal already returned.
+    """
+    match = {**query, "$text": {"$search": " ".join(terms)}}
+    if max_distance is not None:
+        match[GEO_FIELD] = {
+            "$geoWithin": {
+                "$centerSphere": [[longitude, latitude], max_distance / EARTH_RADIUS_METERS]
+            }
+        }
+    pipeline = [
+        {"$match": match},
+        {"$addFields": {SCORE_FIELD: {"$meta": "textScore"}}},
+    ]
+    if after is not None:
+        score, meal_id = after
+        pipeline.append(
+            {
+                "$match": {
+                    "$or": [
+                        {SCORE_FIELD: {"$lt": score}},
+                        {SCORE_FIELD: score, "_id": {"$gt": meal_id}},
+                    ]
+                }
+            }
+        )
+    pipeline.append({"$sort": {SCORE_FIELD: -1, "_id": 1}})
+    if skip:
+        pipeline.append({"$skip": skip})
+    pipeline.append({"$limit": limit})
+    return pipeline
+
+
+def within_distance(latitude: float, longitude: float, max_distance: float):
+    """Filter keeping records within ``max_distance`` meters of a point"""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    cos_lat1 = math.cos(lat1)
+    # Compare haversine terms so each check skips the asin/sqrt
+    limit = math.sin(min(max_distance / EARTH_RADIUS_METERS, math.pi) / 2) ** 2
+
+    def match(point: MealPoint) -> bool:
+        if point.lat is None:
+            return False
+        lat2, lon2 = math.radians(point.lat), math.radians(point.lon)
+        a = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + cos_lat1 * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        )
+        return a <= limit
+
+    return match
+
+
+def _impact_position(negated: list, ids: list, weight: float, meal_id: str) -> int:
+    """Where ``(weight, meal_id)`` belongs in an impact-ordered posting"""
+    low = bisect_left(negated, -weight)
+    high = bisect_right(negated, -weight, low)
+    return bisect_left(ids, meal_id, low, high)
+
+
+class _Corpus:
+    """Postings, lengths and records of one generation of the index.
+
+    A posting maps each meal to its BM25 term weight
+    ``tf * (k1 + 1) / (tf + norm)``, so a query only multiplies by the
+    word's idf. Large postings also keep an impact-ordered copy (highest
+    weight first, ties by id) that is updated in place on writes, and a
+    cached pair of NumPy arrays (meal slots, weights) that is dropped on
+    writes.
+    """
+
+    def __init__(self):
+        self.postings = {}  # word -> {meal id: term weight}
+        self.impacts = {}  # word -> ([-weight, ...], [meal id, ...])
+        self.vectors = {}  # word -> (slot array, weight array)
+        self.slots = {}  # meal id -> slot in score arrays
+        self.slot_ids = []  # slot -> meal id (None once freed)
+        self._free = []
+        self.terms = {}  # meal id -> {word: weighted frequency}
+        self.lengths = {}  # meal id -> document length
+        self.points = {}  # meal id -> MealPoint
+        self.total_length = 0
+
+    def norm(self, length: int) -> float:
+        average = self.total_length / len(self.lengths) if self.lengths else length
+        return BM25_K1 * (1 - BM25_B + BM25_B * length / (average or 1))
+
+    def _post(self, meal_id: str, terms: dict, norm: float) -> None:
+        for word, tf in terms.items():
+            weight = tf * (BM25_K1 + 1) / (tf + norm)
+            self.postings.setdefault(word, {})[meal_id] = weight
+            self.vectors.pop(word, None)
+            impact = self.impacts.get(word)
+            if impact is not None:
+                negated, ids = impact
+                at = _impact_position(negated, ids, weight, meal_id)
+                negated.insert(at, -weight)
+                ids.insert(at, meal_id)
+
+    def add(self, meal: dict) -> None:
+        point = MealPoint.from_meal(meal, require_location=False)
+        if point is None:
+            self.remove(str(meal["_id"]))
+            return
+        self.remove(point.id)
+        terms = {sys.intern(word): tf for word, tf in _weighted_terms(meal).items()}
+        length = sum(terms.values())
+        self.terms[point.id] = terms
+        self.points[point.id] = point
+        slot = self._free.pop() if self._free else len(self.slot_ids)
+        if slot == len(self.slot_ids):
+            self.slot_ids.append(point.id)
+        else:
+            self.slot_ids[slot] = point.id
+        self.slots[point.id] = slot
+        self.total_length += length
+        self.lengths[point.id] = length
+        self._post(point.id, terms, self.norm(length))
+
+    def remove(self, meal_id: str) -> None:
+        terms = self.terms.pop(meal_id, None)
+        if terms is None:
+            return
+        for word in terms:
+            posting = self.postings.get(word)
+            if posting is None:
+                continue
+            weight = posting.pop(meal_id, None)
+            self.vectors.pop(word, None)
+            impact = self.impacts.get(word)
+            if impact is not None and weight is not None:
+                negated, ids = impact
+                at = _impact_position(negated, ids, weight, meal_id)
+                if at < len(ids) and ids[at] == meal_id:
+                    del negated[at], ids[at]
+            if not posting:
+                del self.postings[word]
+                self.impacts.pop(word, None)
+        del self.points[meal_id]
+        self.total_length -= self.lengths.pop(meal_id)
+        slot = self.slots.pop(meal_id)
+        self.slot_ids[slot] = None
+        self._free.append(slot)
+
+    def renormalize(self) -> None:
+        """Every term weight against the current average length"""
+        self.impacts = {}
+        self.vectors = {}
+        for meal_id, terms in self.terms.items():
+            self._post(meal_id, terms, self.norm(self.lengths[meal_id]))
+
+    def impact(self, word: str) -> tuple:
+        """``(negated weights, ids)`` of a word's posting, best first"""
+        cached = self.impacts.get(word)
+        if cached is not None:
+            return cached
+        posting = self.postings[word]
+        ordered = sorted(posting.items(), key=lambda item: (-item[1], item[0]))
+        impact = [-weight for _, weight in ordered], [meal_id for meal_id, _ in ordered]
+        if len(posting) >= IMPACT_MIN_POSTINGS:
+            self.impacts[word] = impact
+        return impact
+
+    def vector(self, word: str) -> tuple:
+        """``(slots, weights)`` arrays of a word's posting"""
+        cached = self.vectors.get(word)
+        if cached is not None:
+            return cached
+        posting = self.postings[word]
+        slots = self.slots
+        vector = (
+            np.fromiter((slots[meal_id] for meal_id in posting), dtype=np.intp, count=len(posting)),
+            np.fromiter(posting.values(), dtype=np.float64, count=len(posting)),
+        )
+        if len(posting) >= IMPACT_MIN_POSTINGS:
+            self.vectors[word] = vector
+        return vector
+
+
+class MealSearchIndex:
+    """BM25 inverted index of available meals for one worker.
+
+    Each meal's length normalization is computed against the average
+    length when it is indexed and refreshed on every rebuild. Writes that
+    arrive while a rebuild is reading MongoDB are journaled and replayed
+    onto the new corpus before it replaces the old one, as in
+    ``NearbyMealIndex``.
+    """
+
+    def __init__(self, refresh_seconds: float = 300.0):
+        self.refresh_seconds = refresh_seconds
+        self.ready = False
+        self._corpus = _Corpus()
+        self._journal = None
+        self._refresher = PeriodicTask(
+            "Meal search index rebuild", self._refresh, refresh_seconds
+        )
+        self.builds = 0
+        self.build_ms = 0.0
+        self.built_at = None
+        self.queries = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, meal: dict) -> None:
+        """Index a created/updated meal; drops it once it is no longer available"""
+        self._corpus.add(meal)
+        if self._journal is not None:
+            self._journal.append(("upsert", meal))
+
+    def remove(self, meal_id) -> None:
+        meal_id = str(meal_id)
+        self._corpus.remove(meal_id)
+        if self._journal is not None:
+            self._journal.append(("remove", meal_id))
+
+    def remove_seller(self, seller_id) -> None:
+        """Drop every meal of a seller (account deletion)"""
+        seller_id = str(seller_id)
+        points = self._corpus.points
+        for meal_id in [p.id for p in points.values() if p.seller_id == seller_id]:
+            self.remove(meal_id)
+
+    async def rebuild(self, db) -> int:
+        """Reload every available meal from MongoDB; returns the meal count"""
+        started = time.perf_counter()
+        corpus = _Corpus()
+        self._journal = []
+        try:
+            cursor = db.meals.find(
+                {"status": MealStatus.AVAILABLE}, _PROJECTION, batch_size=5000
+            )
+            async for meal in cursor:
+                corpus.add(meal)
+            for op, value in self._journal:
+                if op == "upsert":
+                    corpus.add(value)
+                else:
+                    corpus.remove(value)
+        finally:
+            self._journal = None
+        corpus.renormalize()
+
+        self._corpus = corpus
+        self.ready = True
+        self.builds += 1
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self.built_at = time.time()
+        return len(corpus.points)
+
+    def clear(self) -> None:
+        self._corpus = _Corpus()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._corpus.points)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def search(
+        self,
+        text: str,
+        after: Optional[tuple] = None,
+        match: Optional[Callable[[MealPoint], bool]] = None,
+    ) -> Iterator[tuple]:
+        """Yield ``(score, MealPoint)`` best first, ties by meal id.
+
+        ``after`` is the ``(score, meal id)`` of the last meal already
+        returned and ``match`` is applied to each candidate before it is
+        yielded. Both strategies produce the same scores and order.
+
+        Callers await MongoDB between pages, so writes can land while the
+        generator is paused: it ranks copies of the postings taken when it
+        starts and skips meals removed since.
+        """
+        self.queries += 1
+        corpus = self._corpus
+        count = len(corpus.points)
+        words = []
+        for word in search_terms(text):
+            posting = corpus.postings.get(word)
+            if posting:
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                words.append((idf, word, posting))
+        if not words:
+            return
+
+        last = None if after is None else (-after[0], after[1])
+        total = sum(len(posting) for _, _, posting in words)
+        if np is not None and len(words) > 1 and total >= NUMPY_MIN_POSTINGS:
+            yield from self._search_vectorized(corpus, words, last, match)
+        else:
+            yield from self._search_threshold(corpus, words, last, match)
+
+    def _search_threshold(self, corpus, words, last, match) -> Iterator[tuple]:
+        """Fagin's threshold algorithm over the impact-ordered postings.
+
+        The postings are read in step; every meal met is scored in full
+        from the posting dicts and is yielded once no meal further down the
+        lists can beat it, so a page of a common word reads only the top of
+        its list.
+        """
+        lists = []
+        for idf, word, posting in words:
+            # Writes edit the cached impact order in place
+            negated, ids = corpus.impact(word)
+            lists.append((idf, dict(posting), negated[:], ids[:]))
+        points = corpus.points
+        seen = set()
+        ready = []  # (-score, meal id) of meals that passed the filters
+        position, step = 0, 32
+        while True:
+            end = position + step
+            for _, _, _, ids in lists:
+                for meal_id in ids[position:end]:
+                    if meal_id in seen:
+                        continue
+                    seen.add(meal_id)
+                    score = 0.0
+                    for idf, posting, _, _ in lists:
+                        score += idf * posting.get(meal_id, 0.0)
+                    key = (-score, meal_id)
+                    if last is not None and key <= last:
+                        continue
+                    point = points.get(meal_id)
+                    if point is None or (match is not None and not match(point)):
+                        continue
+                    heapq.heappush(ready, key)
+            position, step = end, step * 2
+
+            # Best score any meal not met yet could still reach
+            threshold = 0.0
+            for idf, _, negated, _ in lists:
+                if position < len(negated):
+                    threshold -= idf * negated[position]
+            exhausted = threshold == 0.0
+            while ready and (exhausted or -ready[0][0] > threshold):
+                negative, meal_id = heapq.heappop(ready)
+                point = points.get(meal_id)
+                if point is not None:
+                    yield -negative, point
+            if exhausted:
+                return
+
+    def _search_vectorized(self, corpus, words, last, match) -> Iterator[tuple]:
+        """Accumulate every posting into one score array, then rank in chunks.
+
+        Each chunk is the next best slice of the scores (``np.partition``,
+        growing fourfold per round), sorted by (score, id) in Python, so a
+        page that the filters barely thin out sorts a few dozen meals.
+        """
+        scores = np.zeros(len(corpus.slot_ids))
+        for idf, word, _ in words:
+            slots, weights = corpus.vector(word)
+            scores[slots] += idf * weights
+        ranked = np.flatnonzero(scores)
+        if last is not None:
+            ranked = ranked[scores[ranked] <= -last[0]]
+
+        # Freed slots are reused by later meals
+        points, slot_ids = corpus.points, corpus.slot_ids[:]
+        step = 64
+        while len(ranked):
+            values = scores[ranked]
+            if len(ranked) > step:
+                kth = np.partition(values, len(values) - step)[len(values) - step]
+                take = values >= kth
+                chunk, ranked = ranked[take], ranked[~take]
+            else:
+                chunk, ranked = ranked, ranked[:0]
+            batch = sorted(
+                (-score, slot_ids[slot])
+                for score, slot in zip(scores[chunk].tolist(), chunk.tolist())
+            )
+            for key in batch:
+                if last is not None and key <= last:
+                    continue
+                point = points.get(key[1])
+                if point is None or (match is not None and not match(point)):
+                    continue
+                yield -key[0], point
+            step *= 4
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SEARCH_INDEX_ENABLED,
+            "ready": self.ready,
+            "meals": len(self._corpus.points),
+            "terms": len(self._corpus.postings),
+            "postings": sum(len(terms) for terms in self._corpus.terms.values()),
+            "builds": self.builds,
+            "last_build_ms": round(self.build_ms, 1),
+            "built_at": self.built_at,
+            "queries": self.queries,
+        }
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def start(self, get_database) -> None:
+        """Build now and then every ``refresh_seconds`` on the running loop"""
+        if SEARCH_INDEX_ENABLED:
+            self._refresher.start(get_database)
+
+    async def stop(self) -> None:
+        await self._refresher.stop()
+
+    async def _refresh(self, db) -> None:
+        count = await self.rebuild(db)
+        if self.builds == 1:
+            print(f"✅ Meal search index built: {count} meals in {self.build_ms:.0f} ms")
+
+
+meal_search = MealSearchIndex(refresh_seconds=SEARCH_INDEX_REFRESH_SECONDS)
@@ -1,8 +1,11 @@
+import os
+import sys
 from datetime import datetime, timedelta
 
 if __name__ == "__main__":
-    from database import get_database
-    from utils import hash_password
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.database import get_database
+    from app.utils import hash_password
 else:
     from .database import get_database
     from .utils import hash_password
@@ -978,7 +981,7 @@ async def seed():
 
 if __name__ == "__main__":
     import asyncio
-    from database import connect_to_mongo, close_mongo_connection
+    from app.database import connect_to_mongo, close_mongo_connection
 
     async def main():
         await connect_to_mongo()
@@ -0,0 +1,47 @@
+"""
+Fast JSON path for list endpoints.
+
+Handlers already build validated response models. Returned as-is, FastAPI
+validates the list again against ``response_model``, dumps every model to
+a dict and encodes the result with the stdlib ``json`` module. Returning a
+``Response`` from ``model_list_response`` instead serializes the models
+straight to JSON bytes with a cached pydantic ``TypeAdapter``. The route's
+``response_model`` still drives the OpenAPI schema.
+"""
+
+import os
+from functools import lru_cache
+from typing import List, Optional, Sequence, Type
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+# Set to 0 to fall back to FastAPI's own response validation and encoding
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "1") == "1"
+
+
+@lru_cache(maxsize=None)
+def list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    """TypeAdapter for ``List[model]``, built once per model"""
+    return TypeAdapter(List[model])
+
+
+def dump_model_list(items: Sequence[BaseModel], model: Type[BaseModel]) -> bytes:
+    """JSON bytes for validated models, matching FastAPI's output (by alias)"""
+    return list_adapter(model).dump_json(items, by_alias=True)
+
+
+def model_list_response(
+    items: Sequence[BaseModel], model: Type[BaseModel], headers: Optional[dict] = None
+):
+    """Response for a list of ``model`` instances built by the handler"""
+    if not FAST_JSON_RESPONSES:
+        if headers:
+            return JSONResponse(jsonable_encoder(items), headers=headers)
+        return items
+    return Response(
+        content=dump_model_list(items, model),
+        media_type="application/json",
+        headers=headers,
+    )
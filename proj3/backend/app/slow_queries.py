@@ -0,0 +1,455 @@
+"""
+Slow-query log with sampled ``explain`` capture and an index advisor.
+
+A pymongo command listener flags read commands slower than
+``SLOW_QUERY_MS`` and hands them to a background task on the event loop.
+That task re-runs a sampled subset through ``explain("executionStats")``
+(at most once per query shape per cooldown) and appends every slow query
+to the capped ``slow_queries`` collection. ``slow_query_report`` groups the
+log by query shape and suggests a compound index for each one.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from pymongo import monitoring
+from pymongo.errors import CollectionInvalid
+
+from .indexes import INDEXES
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Fraction of slow queries re-run through explain (0 disables explain)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.2"))
+# Explain a given query shape at most once per this many seconds
+SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS = float(
+    os.getenv("SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS", "600")
+)
+# docsExamined / nReturned above this is reported as an inefficient plan
+SLOW_QUERY_SCAN_RATIO = float(os.getenv("SLOW_QUERY_SCAN_RATIO", "10"))
+SLOW_QUERY_LOG_BYTES = int(os.getenv("SLOW_QUERY_LOG_BYTES", str(16 * 1024 * 1024)))
+
+SLOW_QUERY_COLLECTION = "slow_queries"
+
+# Commands that carry a query and can be explained
+_EXPLAINABLE = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Driver-added fields that explain rejects or that do not belong to the query
+_SESSION_FIELDS = {
+    "lsid", "$db", "$clusterTime", "$readPreference", "txnNumber", "apiVersion",
+    "apiStrict", "apiDeprecationErrors", "readConcern", "writeConcern",
+}
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists", "$not"}
+_MAX_QUEUE = 1000
+
+
+# ============================================================
+# QUERY SHAPES
+# ============================================================
+
+
+def _shape_value(value):
+    """Replace literal values with "?" while keeping operators and fields"""
+    if isinstance(value, dict):
+        return {key: _shape_value(val) for key, val in value.items()}
+    if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+        return [_shape_value(v) for v in value]
+    return "?"
+
+
+def _command_filter(command_name: str, command: dict) -> dict:
+    if command_name in ("find", "count", "distinct"):
+        return command.get("filter") or command.get("query") or {}
+    if command_name == "findAndModify":
+        return command.get("query") or {}
+    if command_name in ("update", "delete"):
+        statements = command.get("updates") or command.get("deletes") or [{}]
+        return statements[0].get("q") or {}
+    if command_name == "aggregate":
+        for stage in command.get("pipeline") or []:
+            if "$match" in stage:
+                return stage["$match"]
+            if "$geoNear" in stage:
+                return stage["$geoNear"].get("query") or {}
+    return {}
+
+
+def _command_sort(command_name: str, command: dict) -> list:
+    sort = None
+    if command_name in ("find", "findAndModify"):
+        sort = command.get("sort")
+    elif command_name == "aggregate":
+        for stage in command.get("pipeline") or []:
+            if "$sort" in stage:
+                sort = stage["$sort"]
+                break
+    return [[field, direction] for field, direction in (sort or {}).items()]
+
+
+def query_shape(collection: str, command_name: str, command: dict) -> dict:
+    """Literal-free description of a command used to group similar queries"""
+    return {
+        "collection": collection,
+        "command": command_name,
+        "filter": _shape_value(_command_filter(command_name, command)),
+        "sort": _command_sort(command_name, command),
+    }
+
+
+def shape_key(shape: dict) -> str:
+    return json.dumps(shape, sort_keys=True, default=str)
+
+
+# ============================================================
+# EXPLAIN PARSING
+# ============================================================
+
+
+def _plan_stages(plan: dict, stages: list, index_names: list) -> None:
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+        if plan.get("indexName"):
+            index_names.append(plan["indexName"])
+    for child_key in ("inputStage", "queryPlan"):
+        _plan_stages(plan.get(child_key), stages, index_names)
+    for child in plan.get("inputStages") or []:
+        _plan_stages(child, stages, index_names)
+
+
+def _find_explain_section(explain: dict) -> dict:
+    """Aggregations nest the query explain under the first $cursor stage"""
+    if "queryPlanner" in explain:
+        return explain
+    for stage in explain.get("stages") or []:
+        if "$cursor" in stage:
+            return stage["$cursor"]
+    return explain
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Winning plan stages, index used and scan counts from an explain result"""
+    section = _find_explain_section(explain)
+    stages, index_names = [], []
+    _plan_stages(section.get("queryPlanner", {}).get("winningPlan", {}), stages, index_names)
+
+    execution = section.get("executionStats", {})
+    returned = execution.get("nReturned", 0)
+    docs_examined = execution.get("totalDocsExamined", 0)
+    ratio = docs_examined / max(returned, 1)
+
+    flags = []
+    if "COLLSCAN" in stages:
+        flags.append("COLLSCAN")
+    if ratio >= SLOW_QUERY_SCAN_RATIO:
+        flags.append("HIGH_SCAN_RATIO")
+    if "SORT" in stages:
+        flags.append("IN_MEMORY_SORT")
+
+    return {
+        "stages": stages,
+        "indexes_used": index_names,
+        "n_returned": returned,
+        "docs_examined": docs_examined,
+        "keys_examined": execution.get("totalKeysExamined", 0),
+        "execution_ms": execution.get("executionTimeMillis"),
+        "scan_ratio": round(ratio, 2),
+        "flags": flags,
+    }
+
+
+# ============================================================
+# INDEX ADVISOR
+# ============================================================
+
+
+def _classify_fields(filter_shape: dict, equality: list, ranges: list) -> None:
+    for field, value in filter_shape.items():
+        if field.startswith("$"):
+            continue
+        operators = set(value) if isinstance(value, dict) else set()
+        if operators & _RANGE_OPERATORS:
+            target = ranges
+        else:
+            target = equality
+        if field not in equality and field not in ranges:
+            target.append(field)
+
+
+def suggest_indexes(shape: dict) -> list:
+    """Suggest compound index keys for a query shape.
+
+    Keys follow the equality, sort, range ordering; each ``$or`` branch
+    gets its own suggestion because MongoDB plans the branches separately.
+    """
+    filter_shape = shape.get("filter") or {}
+    sort = shape.get("sort") or []
+
+    branches = [filter_shape]
+    if isinstance(filter_shape.get("$or"), list):
+        shared = {k: v for k, v in filter_shape.items() if k != "$or"}
+        branches = [{**shared, **branch} for branch in filter_shape["$or"]]
+
+    suggestions = []
+    for branch in branches:
+        equality, ranges = [], []
+        _classify_fields(branch, equality, ranges)
+        keys = [[field, 1] for field in equality]
+        for field, direction in sort:
+            if field not in equality:
+                keys.append([field, direction])
+        sorted_fields = {field for field, _ in sort}
+        keys.extend([field, 1] for field in ranges if field not in sorted_fields)
+        if keys and keys not in suggestions:
+            suggestions.append(keys)
+    return suggestions
+
+
+def _is_covered(keys: list, existing: list) -> bool:
+    """True if an existing index starts with the suggested key fields"""
+    fields = [field for field, _ in keys]
+    for index_keys in existing:
+        index_fields = [field for field, _ in index_keys]
+        if index_fields[: len(fields)] == fields:
+            return True
+    return False
+
+
+def _declared_keys(collection: str) -> list:
+    return [list(model.document["key"].items()) for model in INDEXES.get(collection, [])]
+
+
+# ============================================================
+# LISTENER AND RECORDER
+# ============================================================
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Flags slow commands from driver events and logs them asynchronously.
+
+    Driver events arrive on Motor's executor threads; flagged commands are
+    passed to the event loop with ``call_soon_threadsafe`` so the listener
+    itself never blocks or does I/O. Counters are shared by those threads
+    and the loop, so they are updated under ``_lock``.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = SLOW_QUERY_MS,
+        sample_rate: float = SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        cooldown_seconds: float = SLOW_QUERY_EXPLAIN_COOLDOWN_SECONDS,
+        get_db: Optional[Callable] = None,
+    ):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.cooldown_seconds = cooldown_seconds
+        self._get_db = get_db
+        self._pending = {}
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._last_explained = {}
+        self._lock = threading.Lock()
+        self.flagged = 0
+        self.dropped = 0
+        self.explained = 0
+        self.explain_errors = 0
+        self.recorded = 0
+
+    # -- driver events (executor threads) --
+
+    def started(self, event):
+        if event.command_name in _EXPLAINABLE:
+            collection = event.command.get(event.command_name)
+            if isinstance(collection, str) and collection != SLOW_QUERY_COLLECTION:
+                self._pending[event.request_id] = (event.database_name, event.command)
+
+    def succeeded(self, event):
+        pending = self._pending.pop(event.request_id, None)
+        if pending is None or event.duration_micros < self.threshold_ms * 1000:
+            return
+        self._flag(pending, event.command_name, event.duration_micros / 1000)
+
+    def failed(self, event):
+        self._pending.pop(event.request_id, None)
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _flag(self, pending: tuple, command_name: str, duration_ms: float) -> None:
+        self._count("flagged")
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._count("dropped")
+            return
+        database_name, command = pending
+        item = (database_name, command_name, command, duration_ms, datetime.utcnow())
+        loop.call_soon_threadsafe(self._offer, item)
+
+    def _offer(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except (asyncio.QueueFull, AttributeError):
+            self._count("dropped")
+
+    # -- background recorder (event loop) --
+
+    def _should_explain(self, key: str) -> bool:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        now = time.monotonic()
+        last = self._last_explained.get(key)
+        if last is not None and now - last < self.cooldown_seconds:
+            return False
+        self._last_explained[key] = now
+        return True
+
+    async def _explain(self, db, command: dict) -> dict:
+        query = {k: v for k, v in command.items() if k not in _SESSION_FIELDS}
+        return await db.command({"explain": query, "verbosity": "executionStats"})
+
+    async def record(self, db, database_name, command_name, command, duration_ms, at):
+        """Append one slow query to the log, with a plan summary if sampled"""
+        collection = command.get(command_name)
+        shape = query_shape(collection, command_name, command)
+        key = shape_key(shape)
+        entry = {
+            "at": at,
+            "database": database_name,
+            "collection": collection,
+            "command": command_name,
+            "duration_ms": round(duration_ms, 3),
+            "shape": shape,
+            "shape_key": key,
+            "plan": None,
+        }
+        if self._should_explain(key):
+            try:
+                entry["plan"] = summarize_explain(await self._explain(db, command))
+                self._count("explained")
+            except Exception as e:
+                self._count("explain_errors")
+                entry["explain_error"] = str(e)
+        await db[SLOW_QUERY_COLLECTION].insert_one(entry)
+        self._count("recorded")
+
+    async def _ensure_collection(self, db) -> None:
+        try:
+            await db.create_collection(
+                SLOW_QUERY_COLLECTION, capped=True, size=SLOW_QUERY_LOG_BYTES
+            )
+        except CollectionInvalid:
+            pass  # already exists
+        except Exception as e:
+            # Keep logging into a regular collection rather than losing entries
+            print(f"⚠️ Could not create capped {SLOW_QUERY_COLLECTION} collection: {e}")
+
+    async def _run(self) -> None:
+        created = False
+        while True:
+            item = await self._queue.get()
+            db = self._get_db() if self._get_db else None
+            if db is None:
+                continue
+            try:
+                if not created:
+                    await self._ensure_collection(db)
+                    created = True
+                await self.record(db, *item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Slow query log error: {e}")
+
+    def start(self, get_db: Callable) -> None:
+        if self._task is None:
+            self._get_db = get_db
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=_MAX_QUEUE)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        self._loop = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._queue = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "threshold_ms": self.threshold_ms,
+                "explain_sample_rate": self.sample_rate,
+                "flagged": self.flagged,
+                "recorded": self.recorded,
+                "explained": self.explained,
+                "explain_errors": self.explain_errors,
+                "dropped": self.dropped,
+            }
+
+
+slow_query_log = SlowQueryLog()
+
+
+async def slow_query_report(db, limit: int = 50) -> list:
+    """Slow query shapes, slowest first, with plan flags and index suggestions"""
+    pipeline = [
+        {
+            "$group": {
+                "_id": "$shape_key",
+                "shape": {"$first": "$shape"},
+                "count": {"$sum": 1},
+                "avg_ms": {"$avg": "$duration_ms"},
+                "max_ms": {"$max": "$duration_ms"},
+                "last_seen": {"$max": "$at"},
+                "plans": {"$push": "$plan"},
+            }
+        },
+        {"$sort": {"max_ms": -1}},
+        {"$limit": limit},
+    ]
+    report = []
+    async for group in db[SLOW_QUERY_COLLECTION].aggregate(pipeline):
+        shape = group["shape"]
+        plans = [plan for plan in group["plans"] if plan]
+        plan = plans[-1] if plans else None
+
+        live = []
+        try:
+            async for spec in db[shape["collection"]].list_indexes():
+                live.append(list(spec["key"].items()))
+        except Exception:
+            pass
+        declared = _declared_keys(shape["collection"])
+
+        report.append(
+            {
+                "shape": shape,
+                "count": group["count"],
+                "avg_ms": round(group["avg_ms"], 3),
+                "max_ms": group["max_ms"],
+                "last_seen": group["last_seen"],
+                "flags": plan["flags"] if plan else [],
+                "plan": plan,
+                "suggested_indexes": [
+                    {
+                        "key": keys,
+                        "exists": _is_covered(keys, live),
+                        "declared": _is_covered(keys, declared),
+                    }
+                    for keys in suggest_indexes(shape)
+                ],
+            }
+        )
+    return report
@@ -0,0 +1,437 @@
+"""
+In-process prefix index for type-ahead suggestions.
+
+Each worker keeps the titles, cuisine types and ingredients of available,
+unexpired meals as suggestions. A suggestion is weighted by the popularity
+of the meals behind it: one per meal, plus its views, plus
+``SALE_WEIGHT`` per transaction. Suggestions are found by the start of
+any of their words ("cur" finds "Spicy Chicken Curry").
+
+Keys live in one sorted array with a max-tree over their weights, so a
+lookup is a bisect for the prefix range plus a best-first walk of the
+tree that stops after ``limit`` suggestions, however many keys share the
+prefix. Weights change in place. Suggestions that first appear after a
+build go to a small sorted side list until the next rebuild, which starts
+early once that list passes ``PENDING_MAX_KEYS`` keys.
+
+Like the other in-process indexes it is rebuilt from MongoDB at startup
+and every ``SUGGEST_INDEX_REFRESH_SECONDS``, and kept current by the meal
+write, view and transaction routes in between. Meals drop out when their
+``expires_date`` passes.
+"""
+
+import asyncio
+import heapq
+import os
+import re
+import sys
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from .models import MealStatus
+from .periodic import PeriodicTask
+
+SUGGEST_INDEX_ENABLED = os.getenv("SUGGEST_INDEX_ENABLED", "1") == "1"
+SUGGEST_INDEX_REFRESH_SECONDS = float(os.getenv("SUGGEST_INDEX_REFRESH_SECONDS", "300"))
+
+# One transaction counts as much as this many views
+SALE_WEIGHT = 10
+# Suggestions are found by the start of their first this-many words
+MAX_KEY_WORDS = 6
+# Keys added since the last build that trigger an early rebuild
+PENDING_MAX_KEYS = 4096
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Fields read when building records from MongoDB
+_PROJECTION = {
+    "seller_id": 1,
+    "status": 1,
+    "title": 1,
+    "cuisine_type": 1,
+    "ingredients": 1,
+    "views": 1,
+    "expires_date": 1,
+}
+
+
+def suggest_key(text: str) -> str:
+    """Lowercased words of a text, joined by single spaces"""
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def _word_starts(key: str) -> List[str]:
+    """The key from each of its first ``MAX_KEY_WORDS`` words on"""
+    words = key.split(" ")
+    return [" ".join(words[i:]) for i in range(min(len(words), MAX_KEY_WORDS))]
+
+
+def _expiry(meal: dict) -> Optional[datetime]:
+    """``expires_date`` as naive UTC (how the routes store it), or None"""
+    expires = meal.get("expires_date")
+    if not isinstance(expires, datetime):
+        return None
+    if expires.tzinfo is not None:
+        expires = expires.astimezone(timezone.utc).replace(tzinfo=None)
+    return expires
+
+
+class Suggestion:
+    """One suggested title, cuisine or ingredient and its combined weight"""
+
+    __slots__ = ("kind", "text", "keys", "weight", "meals", "positions")
+
+    def __init__(self, kind: str, text: str, keys: List[str]):
+        self.kind = kind
+        self.text = text
+        self.keys = keys
+        self.weight = 0
+        self.meals = 0
+        self.positions = ()  # leaves in the key array, once folded in
+
+
+def _meal_suggestions(meal: dict) -> List[tuple]:
+    """``(kind, display text, key)`` of everything a meal suggests"""
+    found = []
+    title = (meal.get("title") or "").strip()
+    if suggest_key(title):
+        found.append(("title", title, suggest_key(title)))
+    cuisine = (meal.get("cuisine_type") or "").strip()
+    if suggest_key(cuisine):
+        found.append(("cuisine", cuisine, suggest_key(cuisine)))
+    for name in (meal.get("ingredients") or "").split(","):
+        key = suggest_key(name)
+        if key:
+            found.append(("ingredient", key, key))
+    return found
+
+
+class _KeyArray:
+    """Sorted keys and a max-tree over the weights of their suggestions"""
+
+    def __init__(self, entries: List[tuple]):
+        entries.sort(key=lambda entry: entry[0])
+        self.keys = [key for key, _ in entries]
+        self.owners = [suggestion for _, suggestion in entries]
+        size = 1
+        while size < len(entries):
+            size *= 2
+        self.size = size
+        tree = [0] * (2 * size)
+        for position, suggestion in enumerate(self.owners):
+            tree[size + position] = suggestion.weight
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self.tree = tree
+
+    def set(self, position: int, weight: int) -> None:
+        tree = self.tree
+        node = position + self.size
+        tree[node] = weight
+        node //= 2
+        while node:
+            best = max(tree[2 * node], tree[2 * node + 1])
+            if tree[node] == best:
+                break
+            tree[node] = best
+            node //= 2
+
+    def best(self, prefix: str):
+        """Yield the suggestions of keys starting with ``prefix``, heaviest first"""
+        tree, size = self.tree, self.size
+        low = bisect_left(self.keys, prefix) + size
+        high = bisect_left(self.keys, prefix + "\uffff") + size
+        heap = []
+        while low < high:
+            if low & 1:
+                if tree[low]:
+                    heap.append((-tree[low], low))
+                low += 1
+            if high & 1:
+                high -= 1
+                if tree[high]:
+                    heap.append((-tree[high], high))
+            low //= 2
+            high //= 2
+        heapq.heapify(heap)
+        while heap:
+            _, node = heapq.heappop(heap)
+            if node >= size:
+                yield self.owners[node - size]
+                continue
+            for child in (2 * node, 2 * node + 1):
+                if tree[child]:
+                    heapq.heappush(heap, (-tree[child], child))
+
+
+class _Suggestions:
+    """Suggestions, meal records and keys of one generation of the index"""
+
+    def __init__(self, building: bool = False):
+        self.suggestions = {}  # (kind, key) -> Suggestion
+        self.meals = {}  # meal id -> [popularity, suggestions, expires, seller id]
+        self.expiries = []  # heap of (expires, meal id)
+        self.sales = {}  # meal id -> transactions
+        # None while a rebuild loads meals; fold() creates it
+        self.array = None if building else _KeyArray([])
+        self.pending = []  # sorted (key, id(suggestion), suggestion) since the build
+
+    def _reweigh(self, suggestion: Suggestion, delta: int) -> None:
+        suggestion.weight += delta
+        for position in suggestion.positions:
+            self.array.set(position, suggestion.weight)
+
+    def add(self, meal: dict, now: datetime) -> None:
+        meal_id = str(meal["_id"])
+        self.remove(meal_id)
+        expires = _expiry(meal)
+        if meal.get("status") != MealStatus.AVAILABLE or (expires is not None and expires <= now):
+            return
+        popularity = 1 + (meal.get("views") or 0) + SALE_WEIGHT * self.sales.get(meal_id, 0)
+        attached = []
+        for kind, text, key in _meal_suggestions(meal):
+            suggestion = self.suggestions.get((kind, key))
+            if suggestion is None:
+                starts = [sys.intern(start) for start in _word_starts(key)]
+                suggestion = Suggestion(kind, sys.intern(text), starts)
+                self.suggestions[(kind, key)] = suggestion
+                if self.array is not None:
+                    for start in suggestion.keys:
+                        insort(self.pending, (start, id(suggestion), suggestion))
+            elif suggestion in attached:
+                continue
+            suggestion.meals += 1
+            self._reweigh(suggestion, popularity)
+            attached.append(suggestion)
+        self.meals[meal_id] = [popularity, attached, expires, str(meal.get("seller_id"))]
+        if expires is not None:
+            heapq.heappush(self.expiries, (expires, meal_id))
+
+    def remove(self, meal_id: str) -> None:
+        record = self.meals.pop(meal_id, None)
+        if record is None:
+            return
+        popularity, attached = record[0], record[1]
+        for suggestion in attached:
+            suggestion.meals -= 1
+            self._reweigh(suggestion, -popularity)
+            if not suggestion.meals:
+                # Left in the array with weight 0 until the next fold
+                del self.suggestions[(suggestion.kind, suggestion.keys[0])]
+
+    def bump(self, meal_id: str, delta: int) -> None:
+        record = self.meals.get(meal_id)
+        if record is None:
+            return
+        record[0] += delta
+        for suggestion in record[1]:
+            self._reweigh(suggestion, delta)
+
+    def expire(self, now: datetime) -> None:
+        expiries = self.expiries
+        while expiries and expiries[0][0] <= now:
+            expires, meal_id = heapq.heappop(expiries)
+            record = self.meals.get(meal_id)
+            if record is not None and record[2] == expires:
+                self.remove(meal_id)
+
+    def fold(self) -> None:
+        """Build the key array from the live suggestions"""
+        entries = []
+        for suggestion in self.suggestions.values():
+            for key in suggestion.keys:
+                entries.append((key, suggestion))
+        self.array = _KeyArray(entries)
+        for suggestion in self.suggestions.values():
+            suggestion.positions = []
+        for position, suggestion in enumerate(self.array.owners):
+            suggestion.positions.append(position)
+        self.pending = []
+
+    def best(self, prefix: str):
+        """Yield distinct suggestions matching ``prefix``, heaviest first"""
+        low = bisect_left(self.pending, (prefix,))
+        high = bisect_left(self.pending, (prefix + "\uffff",))
+        recent = sorted(
+            (entry[2] for entry in self.pending[low:high] if entry[2].meals),
+            key=lambda suggestion: (-suggestion.weight, suggestion.text),
+        )
+        seen = set()
+        for suggestion in heapq.merge(
+            self.array.best(prefix), recent, key=lambda suggestion: -suggestion.weight
+        ):
+            if id(suggestion) not in seen:
+                seen.add(id(suggestion))
+                yield suggestion
+
+    def key_count(self) -> int:
+        return len(self.array.keys) + len(self.pending)
+
+
+class MealSuggestIndex:
+    """Prefix index of meal titles, cuisines and ingredients for one worker.
+
+    Writes that arrive while a rebuild is reading MongoDB are journaled and
+    replayed onto the new generation before it replaces the old one, as in
+    ``NearbyMealIndex``.
+    """
+
+    def __init__(self, refresh_seconds: float = 300.0):
+        self.refresh_seconds = refresh_seconds
+        self.ready = False
+        self._data = _Suggestions()
+        self._journal = None
+        self._refresher = PeriodicTask(
+            "Meal suggest index rebuild", self._refresh, refresh_seconds
+        )
+        self.builds = 0
+        self.build_ms = 0.0
+        self.built_at = None
+        self.queries = 0
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def upsert(self, meal: dict) -> None:
+        """Index a created/updated meal; drops it once it is no longer available"""
+        self._data.add(meal, datetime.utcnow())
+        if self._journal is not None:
+            self._journal.append(("upsert", meal))
+        elif len(self._data.pending) > PENDING_MAX_KEYS:
+            self._refresher.wake()
+
+    def remove(self, meal_id) -> None:
+        meal_id = str(meal_id)
+        self._data.remove(meal_id)
+        if self._journal is not None:
+            self._journal.append(("remove", meal_id))
+
+    def remove_seller(self, seller_id) -> None:
+        """Drop every meal of a seller (account deletion)"""
+        seller_id = str(seller_id)
+        meals = self._data.meals
+        for meal_id in [m for m, record in meals.items() if record[3] == seller_id]:
+            self.remove(meal_id)
+
+    def viewed(self, meal_id) -> None:
+        """Count one view of a meal"""
+        self._bump(str(meal_id), 1, "viewed")
+
+    def sold(self, meal_id) -> None:
+        """Count one transaction for a meal"""
+        meal_id = str(meal_id)
+        data = self._data
+        data.sales[meal_id] = data.sales.get(meal_id, 0) + 1
+        self._bump(meal_id, SALE_WEIGHT, "sold")
+
+    def _bump(self, meal_id: str, delta: int, op: str) -> None:
+        self._data.bump(meal_id, delta)
+        if self._journal is not None:
+            self._journal.append((op, meal_id))
+
+    async def rebuild(self, db) -> int:
+        """Reload every available meal and sales counts; returns the meal count"""
+        started = time.perf_counter()
+        data = _Suggestions(building=True)
+        self._journal = []
+        try:
+            async for row in db.transactions.aggregate(
+                [{"$group": {"_id": "$meal_id", "count": {"$sum": 1}}}]
+            ):
+                data.sales[str(row["_id"])] = row["count"]
+            now = datetime.utcnow()
+            cursor = db.meals.find(
+                {"status": MealStatus.AVAILABLE}, _PROJECTION, batch_size=5000
+            )
+            async for meal in cursor:
+                data.add(meal, now)
+            # Sorting a few hundred thousand keys takes a while; keep the loop free
+            await asyncio.to_thread(data.fold)
+            for op, value in self._journal:
+                if op == "upsert":
+                    data.add(value, now)
+                elif op == "remove":
+                    data.remove(value)
+                elif op == "viewed":
+                    data.bump(value, 1)
+                else:
+                    data.sales[value] = data.sales.get(value, 0) + 1
+                    data.bump(value, SALE_WEIGHT)
+        finally:
+            self._journal = None
+
+        self._data = data
+        self.ready = True
+        self.builds += 1
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self.built_at = time.time()
+        return len(data.meals)
+
+    def clear(self) -> None:
+        self._data = _Suggestions()
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self._data.meals)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[Suggestion]:
+        """Up to ``limit`` suggestions for a typed prefix, most popular first.
+
+        A trailing space ends the last word: "corn " matches "corn salsa"
+        but not "cornbread".
+        """
+        self.queries += 1
+        key = suggest_key(prefix)
+        if not key or limit <= 0:
+            return []
+        if prefix[-1:].isspace():
+            key += " "
+        data = self._data
+        data.expire(datetime.utcnow())
+        found = []
+        for suggestion in data.best(key):
+            found.append(suggestion)
+            if len(found) == limit:
+                break
+        return found
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SUGGEST_INDEX_ENABLED,
+            "ready": self.ready,
+            "meals": len(self._data.meals),
+            "suggestions": len(self._data.suggestions),
+            "keys": self._data.key_count(),
+            "pending_keys": len(self._data.pending),
+            "builds": self.builds,
+            "last_build_ms": round(self.build_ms, 1),
+            "built_at": self.built_at,
+            "queries": self.queries,
+        }
+
+    # ------------------------------------------------------------------
+    # Background refresh
+    # ------------------------------------------------------------------
+
+    def start(self, get_database) -> None:
+        """Build now and then every ``refresh_seconds`` on the running loop"""
+        if SUGGEST_INDEX_ENABLED:
+            self._refresher.start(get_database)
+
+    async def stop(self) -> None:
+        await self._refresher.stop()
+
+    async def _refresh(self, db) -> None:
+        count = await self.rebuild(db)
+        if self.builds == 1:
+            print(f"✅ Meal suggest index built: {count} meals in {self.build_ms:.0f} ms")
+
+
+meal_suggest = MealSuggestIndex(refresh_seconds=SUGGEST_INDEX_REFRESH_SECONDS)
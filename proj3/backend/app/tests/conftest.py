@@ -10,8 +10,11 @@ import os
 from motor.motor_asyncio import AsyncIOMotorClient
 from httpx import AsyncClient, ASGITransport
 from unittest.mock import patch
+from contextlib import contextmanager
 import sys
 
+from app.query_accounting import query_accounting, track_queries
+
 
 # Test MongoDB configuration
 # Use the production MongoDB Atlas URL with a separate test database
@@ -32,7 +35,11 @@ async def mongo_client():
     Create a MongoDB client for each test function.
     This ensures each test uses the correct event loop.
     """
-    client = AsyncIOMotorClient(TEST_MONGO_URL, serverSelectionTimeoutMS=5000)
+    client = AsyncIOMotorClient(
+        TEST_MONGO_URL,
+        serverSelectionTimeoutMS=5000,
+        event_listeners=[query_accounting],
+    )
 
     # Verify connection
     try:
@@ -149,3 +156,55 @@ async def clean_test_database(mongo_client):
     await db.users.delete_many({})
     await db.reviews.delete_many({})
     await db.verification_tokens.delete_many({})
+
+
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Users are recreated between tests, so never reuse cached principals"""
+    from app.auth_cache import principal_cache
+
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def uploads_dir(tmp_path, monkeypatch):
+    """Keep files saved by upload tests out of app/static/uploads"""
+    directory = tmp_path / "uploads"
+    monkeypatch.setattr("app.routes.meal_routes.UPLOADS_DIR", str(directory))
+    return directory
+
+
+@pytest.fixture(autouse=True)
+def clear_browse_cache():
+    """Tests write meals straight to the database, bypassing invalidation"""
+    from app.browse_cache import browse_cache
+
+    browse_cache.clear()
+    yield
+    browse_cache.clear()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail if a block issues more than ``limit`` MongoDB commands.
+
+        with query_budget(3):
+            response = await client.get("/api/meals/")
+
+    Use it on list endpoints with fixtures of different sizes to catch
+    per-item (N+1) lookups.
+    """
+
+    @contextmanager
+    def budget(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"{stats.count} MongoDB commands issued, budget is {limit}: "
+            f"{stats.describe()}"
+        )
+
+    return budget
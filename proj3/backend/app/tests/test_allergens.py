@@ -0,0 +1,46 @@
+"""
+Tests for the canonical allergen vocabulary and allergen_mask.
+"""
+
+from app.allergens import (
+    ALLERGEN_BITS,
+    ALLERGENS,
+    allergen_bits,
+    allergen_exclusion,
+    allergen_mask,
+    allergen_names,
+)
+
+
+def test_every_allergen_has_its_own_bit():
+    bits = list(ALLERGEN_BITS.values())
+    assert len(set(bits)) == len(ALLERGENS)
+    assert all(bit & (bit - 1) == 0 for bit in bits)
+    # Bit order is stored in MongoDB and must never change
+    assert ALLERGENS[:4] == ("dairy", "eggs", "fish", "shellfish")
+
+
+def test_names_fold_case_plurals_and_synonyms():
+    assert allergen_bits("Dairy") == allergen_bits("dairy") == allergen_bits("milk")
+    assert allergen_bits("Egg") == allergen_bits("eggs")
+    assert allergen_bits(" Tree Nuts ") == allergen_bits("walnuts")
+    assert allergen_names(allergen_bits("nuts")) == ["peanuts", "tree nuts"]
+    assert allergen_names(allergen_bits("wheat")) == ["wheat", "gluten"]
+    assert allergen_bits("durian") == 0
+
+
+def test_meal_mask_covers_contains_and_may_contain():
+    meal = {"allergen_info": {"contains": ["Gluten", "SOY"], "may_contain": ["sesame", "kiwi"]}}
+    assert allergen_names(allergen_mask(meal)) == ["gluten", "soy", "sesame"]
+    assert allergen_mask({"allergen_info": {"contains": []}}) == 0
+    assert allergen_mask({}) == 0
+
+
+def test_exclusion_builds_one_mask_and_keeps_unknown_names():
+    clauses = allergen_exclusion(["Peanuts", "Shellfish", " ", "durian", "durian"])
+    assert clauses == {
+        "allergen_mask": {"$bitsAllClear": allergen_bits("peanuts") | allergen_bits("shellfish")},
+        "allergen_info.contains": {"$nin": ["durian"]},
+    }
+    assert allergen_exclusion([]) == {}
+    assert allergen_exclusion(None) == {}
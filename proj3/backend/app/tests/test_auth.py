@@ -7,6 +7,7 @@ import pytest
 import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from datetime import datetime
+from unittest.mock import patch
 
 TEST_DB_NAME = "test_meal_db"
 
@@ -307,6 +308,72 @@ async def test_login_returns_user_info(async_client, registered_user, sample_use
     assert data["full_name"] == registered_user["full_name"]
 
 
+@pytest.mark.asyncio
+async def test_login_returns_signed_tokens(
+    async_client, registered_user, sample_user_data
+):
+    """Test that login issues access and refresh tokens usable as bearers"""
+    response = await async_client.post(
+        "/api/auth/login",
+        json={
+            "email": sample_user_data["email"],
+            "password": sample_user_data["password"],
+        },
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    assert data["access_token"]
+    assert data["refresh_token"]
+
+    me = await async_client.get(
+        "/api/users/me",
+        headers={"Authorization": f"Bearer {data['access_token']}"},
+    )
+    assert me.status_code == 200
+    assert me.json()["email"] == sample_user_data["email"]
+
+    refreshed = await async_client.post(
+        "/api/auth/refresh", json={"refresh_token": data["refresh_token"]}
+    )
+    assert refreshed.status_code == 200
+    assert refreshed.json()["access_token"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_access_token(
+    async_client, registered_user, sample_user_data
+):
+    """Test that an access token cannot be used as a refresh token"""
+    response = await async_client.post(
+        "/api/auth/login",
+        json={
+            "email": sample_user_data["email"],
+            "password": sample_user_data["password"],
+        },
+    )
+    access_token = response.json()["access_token"]
+
+    refreshed = await async_client.post(
+        "/api/auth/refresh", json={"refresh_token": access_token}
+    )
+    assert refreshed.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_email_bearer_can_be_turned_off(async_client, registered_user):
+    """Test that the legacy email-as-bearer scheme is rejected once disabled"""
+    headers = {"Authorization": f"Bearer {registered_user['email']}"}
+
+    response = await async_client.get("/api/users/me", headers=headers)
+    assert response.status_code == 200
+
+    with patch("app.dependencies.ALLOW_EMAIL_TOKENS", False):
+        response = await async_client.get("/api/users/me", headers=headers)
+    assert response.status_code == 401
+
+
 @pytest.mark.asyncio
 async def test_login_case_sensitive_email(
     async_client, registered_user, sample_user_data
@@ -0,0 +1,83 @@
+"""
+Tests for the authenticated-principal cache used by get_current_user
+"""
+
+from bson import ObjectId
+
+from app.auth_cache import PrincipalCache
+
+
+def make_user(email="cached@example.com"):
+    return {"_id": ObjectId(), "email": email, "full_name": "Cached User"}
+
+
+def test_miss_then_hit():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = make_user()
+
+    assert cache.get(user["email"]) is None
+    cache.set(user["email"], user)
+    assert cache.get(user["email"]) is user
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_expired_entry_is_a_miss():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = make_user()
+    cache.set(user["email"], user)
+
+    # Force expiry without sleeping
+    expires_at, cached = cache._entries[user["email"]]
+    cache._entries[user["email"]] = (0, cached)
+
+    assert cache.get(user["email"]) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_evicts_least_recently_used():
+    cache = PrincipalCache(ttl_seconds=60, max_size=2)
+    a, b, c = make_user("a@x.com"), make_user("b@x.com"), make_user("c@x.com")
+    cache.set("a@x.com", a)
+    cache.set("b@x.com", b)
+    cache.get("a@x.com")
+    cache.set("c@x.com", c)
+
+    assert cache.get("b@x.com") is None
+    assert cache.get("a@x.com") is a
+    assert cache.stats()["evictions"] == 1
+
+
+def test_update_user_writes_through():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = make_user()
+    cache.set(user["email"], user)
+
+    updated = dict(user, full_name="Renamed")
+    cache.update_user(updated)
+
+    assert cache.get(user["email"])["full_name"] == "Renamed"
+
+
+def test_invalidate_user_drops_all_tokens():
+    cache = PrincipalCache(ttl_seconds=60, max_size=10)
+    user = make_user()
+    cache.set("token-1", user)
+    cache.set("token-2", user)
+
+    cache.invalidate_user(user["_id"])
+
+    assert cache.get("token-1") is None
+    assert cache.get("token-2") is None
+
+
+def test_zero_ttl_disables_cache():
+    cache = PrincipalCache(ttl_seconds=0, max_size=10)
+    user = make_user()
+    cache.set(user["email"], user)
+
+    assert cache.get(user["email"]) is None
+    assert cache.stats()["enabled"] is False
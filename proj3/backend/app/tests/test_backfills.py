@@ -0,0 +1,167 @@
+"""
+Tests for resumable derived-field backfills
+"""
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+
+from app.allergens import allergen_names
+from app.backfills import BACKFILLS, PROGRESS_COLLECTION, run_backfill
+
+TEST_DB_NAME = "test_meal_db"
+
+
+@pytest_asyncio.fixture
+async def backfill_db(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    await db.meals.delete_many({})
+    await db[PROGRESS_COLLECTION].delete_many({})
+    yield db
+    await db.meals.delete_many({})
+    await db[PROGRESS_COLLECTION].delete_many({})
+
+
+@pytest.mark.asyncio
+async def test_meal_geo_backfill_adds_points(backfill_db):
+    await backfill_db.meals.insert_many(
+        [
+            {"title": "Raleigh", "seller_location": {"latitude": 35.78, "longitude": -78.64}},
+            {"title": "No location", "seller_location": {"latitude": None, "longitude": None}},
+            {"title": "Bad coords", "seller_location": {"latitude": 135.0, "longitude": 0.0}},
+        ]
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-geo"], batch_size=2)
+
+    assert progress["done"] is True
+    assert progress["updated"] == 1
+    meal = await backfill_db.meals.find_one({"title": "Raleigh"})
+    assert meal["seller_location"]["geo"] == {"type": "Point", "coordinates": [-78.64, 35.78]}
+    assert "geo" not in (await backfill_db.meals.find_one({"title": "Bad coords"}))[
+        "seller_location"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backfill_resumes_from_checkpoint(backfill_db):
+    result = await backfill_db.meals.insert_many(
+        [
+            {"title": f"meal {i}", "seller_location": {"latitude": 35.0, "longitude": -78.0}}
+            for i in range(5)
+        ]
+    )
+    ids = result.inserted_ids
+
+    # A previous run stopped after the first two meals
+    await backfill_db[PROGRESS_COLLECTION].insert_one(
+        {"_id": "meal-geo", "last_id": ids[1], "scanned": 2, "updated": 2, "done": False}
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-geo"], batch_size=10)
+
+    assert progress["scanned"] == 5
+    assert progress["updated"] == 5
+    for meal_id in ids[:2]:
+        meal = await backfill_db.meals.find_one({"_id": meal_id})
+        assert "geo" not in meal["seller_location"]
+    for meal_id in ids[2:]:
+        meal = await backfill_db.meals.find_one({"_id": meal_id})
+        assert meal["seller_location"]["geo"]["type"] == "Point"
+
+
+@pytest.mark.asyncio
+async def test_meal_dietary_tags_backfill(backfill_db):
+    await backfill_db.meals.insert_many(
+        [
+            {
+                "title": "Tofu bowl",
+                "ingredients": "tofu, rice",
+                "allergen_info": {"contains": ["soy"]},
+            },
+            {
+                "title": "Burger",
+                "ingredients": "beef, bun",
+                "allergen_info": {"contains": ["wheat"]},
+            },
+            {"title": "Tagged", "ingredients": "beef", "dietary_tags": ["keto"]},
+        ]
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-dietary-tags"])
+
+    assert progress["updated"] == 2
+    tofu = await backfill_db.meals.find_one({"title": "Tofu bowl"})
+    assert {"vegan", "vegetarian", "gluten-free"} <= set(tofu["dietary_tags"])
+    burger = await backfill_db.meals.find_one({"title": "Burger"})
+    assert "vegetarian" not in burger["dietary_tags"]
+    assert "gluten-free" not in burger["dietary_tags"]
+    # Already tagged meals are left alone
+    assert (await backfill_db.meals.find_one({"title": "Tagged"}))["dietary_tags"] == ["keto"]
+
+
+@pytest.mark.asyncio
+async def test_meal_ingredient_tokens_backfill(backfill_db):
+    await backfill_db.meals.insert_many(
+        [
+            {"title": "Satay", "ingredients": "Chicken, Peanut Butter"},
+            {"title": "Plain", "ingredients": ""},
+            {"title": "Tokenized", "ingredients": "beef", "ingredient_tokens": ["beef"]},
+        ]
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-ingredient-tokens"])
+
+    assert progress["updated"] == 2
+    satay = await backfill_db.meals.find_one({"title": "Satay"})
+    assert satay["ingredient_tokens"] == ["chicken", "peanut butter", "peanut", "butter"]
+    assert (await backfill_db.meals.find_one({"title": "Plain"}))["ingredient_tokens"] == []
+
+
+@pytest.mark.asyncio
+async def test_meal_allergen_mask_backfill(backfill_db):
+    await backfill_db.meals.insert_many(
+        [
+            {
+                "title": "Pad Thai",
+                "allergen_info": {"contains": ["Peanuts"], "may_contain": ["Shrimp"]},
+            },
+            {"title": "No info"},
+        ]
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-allergen-mask"])
+
+    assert progress["updated"] == 2
+    pad_thai = await backfill_db.meals.find_one({"title": "Pad Thai"})
+    assert allergen_names(pad_thai["allergen_mask"]) == ["shellfish", "peanuts"]
+    assert (await backfill_db.meals.find_one({"title": "No info"}))["allergen_mask"] == 0
+
+
+@pytest.mark.asyncio
+async def test_meal_seller_snapshot_backfill(backfill_db):
+    sellers = await backfill_db.users.insert_many(
+        [
+            {"full_name": "Ada Cook", "stats": {"average_rating": 4.5}},
+            {"full_name": "New Seller"},
+        ]
+    )
+    ada, new = sellers.inserted_ids
+    await backfill_db.meals.insert_many(
+        [
+            {"title": "Soup", "seller_id": ada},
+            {"title": "Stew", "seller_id": ada},
+            {"title": "Pie", "seller_id": new},
+            {"title": "Orphan", "seller_id": ObjectId()},
+        ]
+    )
+
+    progress = await run_backfill(backfill_db, BACKFILLS["meal-seller-snapshot"], batch_size=3)
+
+    assert progress["updated"] == 3
+    stew = await backfill_db.meals.find_one({"title": "Stew"})
+    assert stew["seller_snapshot"] == {"full_name": "Ada Cook", "average_rating": 4.5}
+    pie = await backfill_db.meals.find_one({"title": "Pie"})
+    assert pie["seller_snapshot"] == {"full_name": "New Seller", "average_rating": 0.0}
+    assert "seller_snapshot" not in await backfill_db.meals.find_one({"title": "Orphan"})
+    await backfill_db.users.delete_many({"_id": {"$in": [ada, new]}})
@@ -0,0 +1,164 @@
+"""
+Tests for the cache of serialized meal browse pages.
+"""
+
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+from app.browse_cache import BrowseCache
+
+class Filler:
+    """Page fill that counts its calls and can be held open"""
+
+    def __init__(self, body=b"[]", sellers=()):
+        self.body = body
+        self.sellers = sellers
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        return self.body, {"X-Next-Cursor": "abc"}, self.sellers
+
+
+def meal(cuisine="Italian"):
+    return {"cuisine_type": cuisine}
+
+
+async def fill(cache, key, filler, cuisine=None):
+    return await cache.get_or_fill(key, cuisine, filler)
+
+
+# ============================================================
+# LOOKUPS AND SINGLE FLIGHT
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_repeated_pages_are_served_from_cache():
+    cache = BrowseCache()
+    filler = Filler(b'[{"id": "1"}]')
+
+    first = await fill(cache, ("k",), filler)
+    second = await fill(cache, ("k",), filler)
+
+    assert first == second == (b'[{"id": "1"}]', {"X-Next-Cursor": "abc"})
+    assert filler.calls == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["bytes"] == len(b'[{"id": "1"}]') + len("X-Next-Cursor") + len("abc")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_fill():
+    cache = BrowseCache()
+    filler = Filler()
+    filler.release.clear()
+
+    waiters = [asyncio.ensure_future(fill(cache, ("k",), filler)) for _ in range(5)]
+    await asyncio.sleep(0)
+    filler.release.set()
+    pages = await asyncio.gather(*waiters)
+
+    assert filler.calls == 1
+    assert len(set(body for body, _ in pages)) == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_fill_reaches_waiters_and_is_not_cached():
+    cache = BrowseCache()
+
+    async def broken():
+        await asyncio.sleep(0)
+        raise RuntimeError("connection reset")
+
+    results = await asyncio.gather(
+        *(cache.get_or_fill(("k",), None, broken) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_expired_pages_and_disabled_cache_refill():
+    cache = BrowseCache(ttl_seconds=0.01)
+    filler = Filler()
+    await fill(cache, ("k",), filler)
+    await asyncio.sleep(0.02)
+    await fill(cache, ("k",), filler)
+    assert filler.calls == 2
+
+    disabled = BrowseCache(ttl_seconds=0)
+    await fill(disabled, ("k",), filler)
+    await fill(disabled, ("k",), filler)
+    assert filler.calls == 4
+    assert disabled.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_least_recently_used_pages_are_evicted_by_bytes():
+    body = b"x" * 100
+    cache = BrowseCache(max_bytes=350)
+    for name in ("a", "b", "c"):
+        await fill(cache, (name,), Filler(body))
+    await fill(cache, ("a",), Filler(body))  # a is now the most recent
+    await fill(cache, ("d",), Filler(body))
+
+    assert list(cache._entries) == [("c",), ("a",), ("d",)]
+    assert cache.stats()["evictions"] == 1
+    assert cache.bytes <= 350
+
+
+# ============================================================
+# INVALIDATION
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_meal_writes_drop_pages_of_their_cuisine():
+    cache = BrowseCache()
+    pages = {("any",): None, ("italian",): "Italian", ("thai",): "Thai"}
+    for key, cuisine in pages.items():
+        await fill(cache, key, Filler(), cuisine)
+
+    cache.invalidate_meal(meal("Italian"))
+
+    assert set(cache._entries) == {("thai",)}
+    assert cache.stats()["invalidations"] == 2
+
+
+@pytest.mark.asyncio
+async def test_seller_changes_drop_pages_showing_the_seller():
+    cache = BrowseCache()
+    seller, other = ObjectId(), ObjectId()
+    await fill(cache, ("a",), Filler(sellers=[seller, other]))
+    await fill(cache, ("b",), Filler(sellers=[other]))
+
+    cache.invalidate_seller(str(seller))
+
+    assert set(cache._entries) == {("b",)}
+
+
+@pytest.mark.asyncio
+async def test_writes_during_a_fill_keep_its_page_out_of_the_cache():
+    cache = BrowseCache()
+    filler = Filler()
+    filler.release.clear()
+
+    pending = asyncio.ensure_future(fill(cache, ("k",), filler, "Italian"))
+    await asyncio.sleep(0)
+    cache.invalidate_meal(meal("Italian"))
+    filler.release.set()
+    await pending
+
+    assert cache.stats()["size"] == 0
+    await fill(cache, ("k",), filler, "Italian")
+    assert filler.calls == 2
@@ -0,0 +1,90 @@
+"""
+Tests for the compiled dietary restriction matcher.
+"""
+
+from app.dietary import (
+    DIETARY_RESTRICTIONS,
+    DIETARY_RULES,
+    DietaryMatcher,
+    check_meal_matches_dietary_restriction,
+    dietary_matcher,
+    dietary_tags,
+    dietary_tags_filter,
+    meal_matches_restrictions,
+)
+
+
+def meal(ingredients, allergens=()):
+    return {"ingredients": ingredients, "allergen_info": {"contains": list(allergens)}}
+
+
+def substring_rules_match(meal_doc, restriction):
+    """The original nested substring scan, for comparison"""
+    rules = DIETARY_RULES[restriction]
+    allergens = meal_doc["allergen_info"]["contains"]
+    if any(a in m.lower() for a in rules["allergens"] for m in allergens):
+        return False
+    text = meal_doc["ingredients"].lower()
+    return not any(term in text for term in rules["ingredients"])
+
+
+def test_matches_substring_rules_on_whole_words():
+    meals = [
+        meal("Chicken, rice, broccoli"),
+        meal("tofu, quinoa, spinach", ["soy"]),
+        meal("pasta, tomato, basil", ["wheat"]),
+        meal("salmon, lemon, potato", ["fish"]),
+        meal("black bean, corn, salsa"),
+        meal("steak, butter, garlic", ["milk"]),
+        meal("greek yogurt, honey, walnut", ["Dairy", "Tree Nuts"]),
+        meal("lentil soup, carrots", []),
+    ]
+    for meal_doc in meals:
+        for restriction in DIETARY_RESTRICTIONS:
+            assert check_meal_matches_dietary_restriction(meal_doc, restriction) == (
+                substring_rules_match(meal_doc, restriction)
+            ), (meal_doc, restriction)
+
+
+def test_terms_match_at_word_start_only():
+    # Plurals and compounds still count
+    assert not check_meal_matches_dietary_restriction(meal("eggs, flour"), "vegan")
+    assert not check_meal_matches_dietary_restriction(meal("Meatballs"), "vegetarian")
+    assert not check_meal_matches_dietary_restriction(meal("breadcrumbs"), "gluten-free")
+    # Terms inside other words no longer do
+    assert check_meal_matches_dietary_restriction(meal("licorice"), "keto")
+    assert check_meal_matches_dietary_restriction(meal("peppercorn steak"), "keto")
+
+
+def test_overlapping_terms_report_every_broken_restriction():
+    matcher = DietaryMatcher(["vegan", "dairy-free", "nut-free"])
+    # "peanut" and "butter" hit different restrictions in one scan
+    assert matcher.violated(meal("peanut butter")) == {"vegan", "dairy-free", "nut-free"}
+    assert matcher.satisfied(meal("apple slices")) == ["vegan", "dairy-free", "nut-free"]
+
+
+def test_dietary_tags_lists_every_restriction_kept():
+    assert dietary_tags(meal("tofu, quinoa, spinach", ["soy"])) == list(DIETARY_RESTRICTIONS)
+    tags = dietary_tags(meal("cheese pizza", ["milk", "wheat"]))
+    assert "vegetarian" in tags
+    assert not {"vegan", "dairy-free", "gluten-free"} & set(tags)
+
+
+def test_matcher_is_cached_per_restriction_combination():
+    assert dietary_matcher(["Vegan", "keto"]) is dietary_matcher(["keto", "vegan", "vegan"])
+    assert dietary_matcher(["vegan"]) is not dietary_matcher(["vegan", "keto"])
+    # Unknown names have no rules and never exclude anything
+    assert meal_matches_restrictions(meal("beef"), ["carnivore"])
+    assert not meal_matches_restrictions(meal("beef"), ["carnivore", "vegetarian"])
+
+
+def test_missing_fields_match_everything():
+    assert dietary_tags({}) == list(DIETARY_RESTRICTIONS)
+    assert dietary_tags({"ingredients": None, "allergen_info": None}) == list(DIETARY_RESTRICTIONS)
+
+
+def test_dietary_tags_filter():
+    assert dietary_tags_filter(["Vegan", "keto", "vegan", "unknown"]) == {
+        "$all": ["vegan", "keto"]
+    }
+    assert dietary_tags_filter(["unknown"]) is None
@@ -0,0 +1,122 @@
+"""
+Tests for ETags and conditional GETs on user and review resources.
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from fastapi import Response
+
+from app.etags import etag, etag_matches, not_modified
+
+TEST_DB_NAME = "test_meal_db"
+
+
+@pytest_asyncio.fixture
+async def seller(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    user = {
+        "email": "seller@example.com",
+        "full_name": "Etag Seller",
+        "location": {"address": "1 Main St", "city": "Raleigh", "state": "NC", "zip_code": "27601"},
+        "role": "user",
+        "status": "active",
+        "stats": {"average_rating": 0.0, "total_reviews": 0},
+        "created_at": datetime(2026, 1, 1),
+    }
+    user["_id"] = (await db.users.insert_one(user)).inserted_id
+    with patch("app.routes.user_routes.get_database", return_value=db), patch(
+        "app.routes.review_routes.get_database", return_value=db
+    ):
+        yield db, user
+
+
+# ============================================================
+# HELPERS
+# ============================================================
+
+
+def test_etag_is_stable_and_version_specific():
+    assert etag("user", 1, "v1") == etag("user", 1, "v1")
+    assert etag("user", 1, "v1") != etag("user", 1, "v2")
+    assert etag("meal", 1, weak=True).startswith('W/"')
+
+
+def test_if_none_match_uses_weak_comparison():
+    tag = etag("meal", 1, weak=True)
+    opaque = tag.removeprefix("W/")
+
+    assert etag_matches(tag, tag)
+    assert etag_matches(opaque, tag)
+    assert etag_matches(f'"other", {opaque}', tag)
+    assert etag_matches("*", tag)
+    assert not etag_matches('"other"', tag)
+    assert not etag_matches(None, tag)
+
+    response = not_modified(tag, "no-cache")
+    assert response.status_code == 304
+    assert response.headers["ETag"] == tag
+    assert response.body == b""
+
+
+# ============================================================
+# CONDITIONAL GETS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_user_profile_not_modified_until_it_changes(seller):
+    from app.models import UserUpdate
+    from app.routes.user_routes import get_user_by_id, update_my_profile
+
+    db, user = seller
+    response = Response()
+    profile = await get_user_by_id(str(user["_id"]), response, if_none_match=None)
+    tag = response.headers["ETag"]
+    assert profile.full_name == "Etag Seller"
+    assert response.headers["Cache-Control"].startswith("private")
+
+    unchanged = await get_user_by_id(str(user["_id"]), Response(), if_none_match=tag)
+    assert unchanged.status_code == 304
+
+    await update_my_profile(UserUpdate(bio="Now with a bio"), current_user=user)
+    response = Response()
+    changed = await get_user_by_id(str(user["_id"]), response, if_none_match=tag)
+    assert changed.bio == "Now with a bio"
+    assert response.headers["ETag"] != tag
+
+
+@pytest.mark.asyncio
+async def test_review_summary_not_modified_until_a_review_changes(seller):
+    from app.routes.review_routes import get_user_reviews, update_seller_stats
+
+    db, user = seller
+    response = Response()
+    await get_user_reviews(str(user["_id"]), response, if_none_match=None)
+    tag = response.headers["ETag"]
+
+    unchanged = await get_user_reviews(str(user["_id"]), Response(), if_none_match=tag)
+    assert unchanged.status_code == 304
+    other_page = await get_user_reviews(str(user["_id"]), Response(), skip=10, if_none_match=tag)
+    assert other_page.total_reviews == 0
+
+    await db.reviews.insert_one(
+        {
+            "seller_id": user["_id"],
+            "reviewer_id": user["_id"],
+            "reviewer_name": "Reviewer",
+            "reviewer_profile_picture": None,
+            "meal_id": user["_id"],
+            "meal_title": "Soup",
+            "rating": 5,
+            "comment": None,
+            "transaction_type": "sale",
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow(),
+        }
+    )
+    await update_seller_stats(db, str(user["_id"]))
+    summary = await get_user_reviews(str(user["_id"]), Response(), if_none_match=tag)
+    assert summary.total_reviews == 1
@@ -0,0 +1,65 @@
+"""
+Tests for the batch distance helpers, checked against the scalar
+calculate_distance reference.
+"""
+
+import random
+
+import pytest
+
+from app import geo
+from app.geo import METERS_PER_MILE, batch_distances, nearest_within
+from app.routes.meal_routes import calculate_distance
+
+USER = (35.7796, -78.6382)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """Run each test vectorized (if NumPy is installed) and on the fallback"""
+    if request.param == "numpy":
+        if geo.np is None:
+            pytest.skip("NumPy not installed")
+        monkeypatch.setattr(geo, "NUMPY_MIN_BATCH", 0)
+    else:
+        monkeypatch.setattr(geo, "np", None)
+    return request.param
+
+
+def random_points(count, seed=3):
+    rng = random.Random(seed)
+    lats = [USER[0] + rng.uniform(-3, 3) for _ in range(count)]
+    lons = [USER[1] + rng.uniform(-3, 3) for _ in range(count)]
+    return lats, lons
+
+
+def test_batch_distances_match_scalar_reference(engine):
+    lats, lons = random_points(200)
+    distances = batch_distances(*USER, lats, lons)
+    for distance, lat, lon in zip(distances, lats, lons):
+        # calculate_distance uses a 3959 mile radius and rounds to 0.1 mile
+        assert distance / METERS_PER_MILE == pytest.approx(
+            calculate_distance(*USER, lat, lon), rel=2e-3, abs=0.06
+        )
+
+
+def test_nearest_within_masks_and_sorts(engine):
+    lats, lons = random_points(300)
+    order, distances = nearest_within(
+        *USER, lats, lons, max_distance=80 * METERS_PER_MILE, min_distance=20 * METERS_PER_MILE
+    )
+
+    expected = sorted(
+        (i for i, d in enumerate(distances) if 20 * METERS_PER_MILE < d <= 80 * METERS_PER_MILE),
+        key=lambda i: distances[i],
+    )
+    assert order == expected
+    assert 0 < len(order) < len(lats)
+    scalar = sorted(order, key=lambda i: calculate_distance(*USER, lats[i], lons[i]))
+    assert [round(distances[i] / METERS_PER_MILE) for i in order] == [
+        round(distances[i] / METERS_PER_MILE) for i in scalar
+    ]
+
+
+def test_nearest_within_empty_input(engine):
+    assert nearest_within(*USER, [], []) == ([], [])
@@ -0,0 +1,106 @@
+"""
+Tests for the declarative index registry and drift report
+"""
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.indexes import INDEXES, diff_indexes, ensure_indexes, index_report
+
+TEST_DB_NAME = "test_meal_db"
+
+
+def test_registry_declares_query_shaped_compound_indexes():
+    declared = {
+        name: [list(model.document["key"].items()) for model in models]
+        for name, models in INDEXES.items()
+    }
+
+    assert [("status", 1), ("created_at", -1), ("_id", -1)] in declared["meals"]
+    assert [("buyer_id", 1), ("created_at", -1)] in declared["transactions"]
+    assert [("seller_id", 1), ("created_at", -1)] in declared["reviews"]
+
+    unique_review = [
+        m.document for m in INDEXES["reviews"] if m.document.get("unique")
+    ]
+    assert list(unique_review[0]["key"].items()) == [
+        ("meal_id", 1),
+        ("reviewer_id", 1),
+    ]
+
+
+def test_diff_reports_missing_extra_and_unused():
+    declared = [
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)]).document,
+        IndexModel([("email", ASCENDING)], unique=True).document,
+    ]
+    live = [
+        {"name": "_id_", "key": {"_id": 1}},
+        {"name": "status_1_created_at_-1", "key": {"status": 1, "created_at": -1}},
+        # Same key but missing the unique option counts as drift
+        {"name": "email_1", "key": {"email": 1}},
+    ]
+    usage = {"status_1_created_at_-1": 0, "email_1": 12}
+
+    diff = diff_indexes(declared, live, usage)
+
+    assert [m["key"] for m in diff["missing"]] == [[("email", 1)]]
+    assert [e["name"] for e in diff["extra"]] == ["email_1"]
+    assert diff["unused"] == ["status_1_created_at_-1"]
+
+
+def test_diff_clean_when_live_matches():
+    declared = [IndexModel([("meal_id", ASCENDING)]).document]
+    live = [
+        {"name": "_id_", "key": {"_id": 1}},
+        {"name": "meal_id_1", "key": {"meal_id": 1}},
+    ]
+
+    diff = diff_indexes(declared, live)
+
+    assert diff == {"missing": [], "extra": [], "unused": []}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_then_report_has_nothing_missing(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    registry = {"meals": INDEXES["meals"], "transactions": INDEXES["transactions"]}
+
+    results = await ensure_indexes(db, registry)
+    assert all(r["error"] is None for r in results)
+
+    report = await index_report(db, registry)
+    assert report["meals"]["missing"] == []
+    assert report["transactions"]["missing"] == []
+
+
+def test_diff_compares_text_indexes_by_fields_and_weights():
+    declared = [m.document for m in INDEXES["meals"] if m.document.get("name") == "meal_text"]
+    weights = dict(declared[0]["weights"])
+    # MongoDB lists text indexes by internal key, with every field's weight
+    live = [{"name": "meal_text", "key": {"_fts": "text", "_ftsx": 1}, "weights": weights}]
+
+    assert diff_indexes(declared, live) == {"missing": [], "extra": [], "unused": []}
+
+    live[0]["weights"] = dict(weights, title=1)
+    diff = diff_indexes(declared, live)
+    assert [m["name"] for m in diff["missing"]] == ["meal_text"]
+    assert [e["name"] for e in diff["extra"]] == ["meal_text"]
+
+
+@pytest.mark.asyncio
+async def test_duplicate_reviews_only_block_the_unique_index(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    await db.reviews.delete_many({})
+    await db.reviews.drop_indexes()
+    review = {"meal_id": ObjectId(), "reviewer_id": ObjectId(), "rating": 5}
+    await db.reviews.insert_many([dict(review), dict(review)])
+    registry = {"reviews": INDEXES["reviews"]}
+
+    [result] = await ensure_indexes(db, registry)
+
+    assert result["error"].startswith("meal_id_1_reviewer_id_1:")
+    assert len(result["created"]) == len(INDEXES["reviews"]) - 1
+    missing = (await index_report(db, registry))["reviews"]["missing"]
+    assert [spec["name"] for spec in missing] == ["meal_id_1_reviewer_id_1"]
@@ -0,0 +1,58 @@
+"""
+Tests for normalized ingredient tokens.
+"""
+
+from app.ingredients import (
+    ingredient_exclusion_filter,
+    ingredient_tokens,
+    normalize_ingredient,
+)
+
+
+def test_normalize_lowercases_strips_punctuation_and_plurals():
+    assert normalize_ingredient("  Tomatoes ") == "tomato"
+    assert normalize_ingredient("Peanut-Butter") == "peanut butter"
+    assert normalize_ingredient("berries") == "berry"
+    assert normalize_ingredient("eggs") == "egg"
+    # Words that only look plural are kept
+    assert normalize_ingredient("hummus") == "hummus"
+    assert normalize_ingredient("Swiss cheese") == "swiss cheese"
+    assert normalize_ingredient("!!") == ""
+
+
+def test_tokens_cover_every_word_run_once():
+    tokens = ingredient_tokens(
+        {"ingredients": "Extra Virgin Olive Oil, olive oil, Eggs, , egg"}
+    )
+    assert tokens[0] == "extra virgin olive oil"
+    assert {"olive oil", "virgin olive", "olive", "oil", "egg"} <= set(tokens)
+    assert len(tokens) == len(set(tokens))
+    assert ingredient_tokens({"ingredients": None}) == []
+    assert ingredient_tokens({}) == []
+
+
+def test_long_names_keep_their_full_phrase():
+    tokens = ingredient_tokens({"ingredients": "slow roasted sweet red bell peppers"})
+    assert "slow roasted sweet red bell pepper" in tokens
+    assert "red bell pepper" in tokens
+
+
+def test_exclusion_matches_tokens_not_substrings():
+    meal_tokens = set(ingredient_tokens({"ingredients": "licorice, peanut butter, rice noodles"}))
+
+    def excluded(*names):
+        return not meal_tokens.isdisjoint(ingredient_exclusion_filter(names)["$nin"])
+
+    assert excluded("Peanuts")
+    assert excluded("rice")
+    assert excluded("Rice Noodles")
+    assert not excluded("ice")
+    assert not excluded("peanut oil")
+
+
+def test_exclusion_filter_dedupes_and_skips_blanks():
+    assert ingredient_exclusion_filter(["Eggs", "egg", " ", "Olive  Oil"]) == {
+        "$nin": ["egg", "olive oil"]
+    }
+    assert ingredient_exclusion_filter([]) is None
+    assert ingredient_exclusion_filter(None) is None
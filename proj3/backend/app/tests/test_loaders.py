@@ -0,0 +1,94 @@
+"""
+Tests for the request-scoped batched document loaders.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+
+from app.loaders import DocumentLoader
+
+TEST_DB_NAME = "test_meal_db"
+
+
+class CountingCollection:
+    """Collection wrapper recording the _ids of every find"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.finds = []
+
+    def find(self, query, *args, **kwargs):
+        self.finds.append(list(query["_id"]["$in"]))
+        return self.collection.find(query, *args, **kwargs)
+
+
+@pytest_asyncio.fixture
+async def users(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    docs = [{"_id": ObjectId(), "full_name": f"User {i}"} for i in range(5)]
+    await db.users.insert_many(docs)
+    yield docs
+    await db.users.delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_share_one_query(mongo_client, users):
+    collection = CountingCollection(mongo_client[TEST_DB_NAME].users)
+    loader = DocumentLoader(collection)
+    missing = ObjectId()
+
+    async def name(user_id):
+        user = await loader.load(user_id)
+        return user and user["full_name"]
+
+    names = await asyncio.gather(
+        name(users[0]["_id"]), name(str(users[1]["_id"])), name(missing), name(users[0]["_id"])
+    )
+
+    assert names == ["User 0", "User 1", None, "User 0"]
+    assert collection.finds == [[users[0]["_id"], users[1]["_id"], missing]]
+    assert loader.batches == 1
+
+
+@pytest.mark.asyncio
+async def test_memoizes_per_loader_and_skips_none(mongo_client, users):
+    collection = CountingCollection(mongo_client[TEST_DB_NAME].users)
+    loader = DocumentLoader(collection)
+
+    first = await loader.load_many([u["_id"] for u in users[:3]])
+    again = await loader.load_many([users[2]["_id"], None, users[3]["_id"]])
+
+    assert [u["full_name"] for u in first] == ["User 0", "User 1", "User 2"]
+    assert [u and u["full_name"] for u in again] == ["User 2", None, "User 3"]
+    assert collection.finds == [[u["_id"] for u in users[:3]], [users[3]["_id"]]]
+
+
+@pytest.mark.asyncio
+async def test_primed_documents_are_not_fetched(mongo_client, users):
+    collection = CountingCollection(mongo_client[TEST_DB_NAME].users)
+    loader = DocumentLoader(collection)
+    loader.prime(users[0])
+
+    found = await loader.load_many([users[0]["_id"], users[1]["_id"]])
+
+    assert found == users[:2]
+    assert collection.finds == [[users[1]["_id"]]]
+
+
+@pytest.mark.asyncio
+async def test_failures_reach_every_waiter_and_are_not_memoized(mongo_client, users):
+    class Flaky(CountingCollection):
+        def find(self, query, *args, **kwargs):
+            if not self.finds:
+                self.finds.append(None)
+                raise RuntimeError("connection reset")
+            return super().find(query, *args, **kwargs)
+
+    loader = DocumentLoader(Flaky(mongo_client[TEST_DB_NAME].users))
+    with pytest.raises(RuntimeError):
+        await loader.load_many([users[0]["_id"], users[1]["_id"]])
+
+    assert (await loader.load(users[0]["_id"]))["full_name"] == "User 0"
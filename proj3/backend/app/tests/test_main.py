@@ -8,6 +8,7 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from fastapi.testclient import TestClient
 from datetime import datetime
+from unittest.mock import AsyncMock, patch
 
 TEST_DB_NAME = "test_meal_db"
 
@@ -622,12 +623,19 @@ async def test_startup_event_creates_all_indexes(mongo_client):
 
 
 @pytest.mark.asyncio
-async def test_shutdown_event_closes_connection(mongo_client):
-    """Test that shutdown event properly closes database connection"""
-    from app.main import shutdown_event
+async def test_shutdown_closes_connection(mongo_client):
+    """Test that leaving the lifespan closes the database connection"""
+    from app.main import app, lifespan
 
-    # This should not raise an error
-    await shutdown_event()
+    with patch("app.main.connect_to_mongo", AsyncMock()), patch(
+        "app.main.startup_event", AsyncMock()
+    ), patch("app.main.password_pool.shutdown"), patch(
+        "app.main.close_mongo_connection", AsyncMock()
+    ) as close:
+        async with lifespan(app):
+            close.assert_not_awaited()
+
+    close.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -0,0 +1,217 @@
+"""
+Tests for the in-process nearby-meal index.
+"""
+
+import random
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.geo import geo_point
+from app.meal_index import NearbyMealIndex, point_filter
+from app.routes.meal_routes import calculate_distance
+
+MILES = 1609.344
+
+
+def make_meal(lat, lon, **fields):
+    meal = {
+        "_id": ObjectId(),
+        "seller_id": ObjectId(),
+        "status": "available",
+        "seller_location": {"latitude": lat, "longitude": lon, "geo": geo_point(lat, lon)},
+        "sale_price": 10.0,
+        "cuisine_type": "Italian",
+        "meal_type": "dinner",
+    }
+    meal.update(fields)
+    return meal
+
+
+def filled_index(meals, **kwargs):
+    index = NearbyMealIndex(**kwargs)
+    for meal in meals:
+        index.upsert(meal)
+    return index
+
+
+# ============================================================
+# NEAREST / RADIUS QUERIES
+# ============================================================
+
+
+def test_nearest_matches_brute_force_order():
+    rng = random.Random(7)
+    meals = [
+        make_meal(35 + rng.uniform(-2, 2), -78 + rng.uniform(-2, 2)) for _ in range(500)
+    ]
+    index = filled_index(meals)
+
+    results = list(index.nearest(35.5, -78.3))
+    assert len(results) == len(meals)
+    distances = [d for d, _ in results]
+    assert distances == sorted(distances)
+
+    expected = sorted(
+        meals,
+        key=lambda m: calculate_distance(
+            35.5, -78.3, m["seller_location"]["latitude"], m["seller_location"]["longitude"]
+        ),
+    )
+    assert [p.id for _, p in results[:5]] == [str(m["_id"]) for m in expected[:5]]
+    for distance, point in results[:20]:
+        # Haversine in miles (3959 mi radius) vs meters (6378.1 km radius)
+        reference = calculate_distance(35.5, -78.3, point.lat, point.lon)
+        assert distance / MILES == pytest.approx(reference, abs=0.2)
+
+
+def test_radius_returns_exactly_the_meals_inside():
+    rng = random.Random(11)
+    meals = [make_meal(40 + rng.uniform(-1, 1), -74 + rng.uniform(-1, 1)) for _ in range(300)]
+    index = filled_index(meals)
+
+    inside = {p.id for _, p in index.nearest(40.0, -74.0, max_distance=20 * MILES)}
+    brute = {p.id for d, p in index.nearest(40.0, -74.0) if d <= 20 * MILES}
+    assert inside == brute
+    assert 0 < len(inside) < len(meals)
+
+
+def test_nearest_resumes_after_position():
+    meals = [make_meal(35 + i * 0.01, -78.0) for i in range(30)]
+    index = filled_index(meals)
+
+    everything = list(index.nearest(35.0, -78.0))
+    distance, point = everything[9]
+    rest = list(index.nearest(35.0, -78.0, after=(distance, point.id)))
+    assert [p.id for _, p in rest] == [p.id for _, p in everything[10:]]
+
+
+def test_same_distance_ties_break_on_id():
+    meals = [make_meal(35.0, -78.0) for _ in range(5)]
+    index = filled_index(meals)
+    ids = [p.id for _, p in index.nearest(35.1, -78.0)]
+    assert ids == sorted(str(m["_id"]) for m in meals)
+
+
+def test_nearest_across_the_antimeridian():
+    west = make_meal(0.0, 179.95)
+    east = make_meal(0.0, -179.95)
+    far = make_meal(0.0, 170.0)
+    index = filled_index([west, east, far])
+
+    found = [p.id for _, p in index.nearest(0.0, 179.99, max_distance=20 * MILES)]
+    assert found == [str(west["_id"]), str(east["_id"])]
+
+
+def test_point_filter_uses_simple_clauses():
+    index = filled_index(
+        [
+            make_meal(35.0, -78.0, cuisine_type="Mexican"),
+            make_meal(35.0, -78.01, sale_price=30.0),
+            make_meal(35.0, -78.02),
+        ]
+    )
+    cheap = list(index.nearest(35.0, -78.0))[2][1]
+    match = point_filter(
+        {"status": "available", "cuisine_type": "Italian", "sale_price": {"$lte": 15}}
+    )
+    assert [p.id for _, p in index.nearest(35.0, -78.0, match=match)] == [cheap.id]
+    assert point_filter({"status": "available", "average_rating": {"$gte": 4}}) is None
+
+
+def test_point_filter_requires_all_dietary_tags():
+    index = filled_index(
+        [
+            make_meal(35.0, -78.0, dietary_tags=["vegetarian"]),
+            make_meal(35.0, -78.01, dietary_tags=["vegan", "vegetarian"]),
+        ]
+    )
+    vegan = list(index.nearest(35.0, -78.0))[1][1]
+    match = point_filter({"dietary_tags": {"$all": ["vegan", "vegetarian"]}})
+    assert [p.id for _, p in index.nearest(35.0, -78.0, match=match)] == [vegan.id]
+
+
+def test_point_filter_excludes_ingredient_tokens():
+    index = filled_index(
+        [
+            make_meal(35.0, -78.0, ingredient_tokens=["peanut butter", "peanut", "butter"]),
+            make_meal(35.0, -78.01, ingredient_tokens=["rice"]),
+            make_meal(35.0, -78.02),
+        ]
+    )
+    kept = [p for _, p in index.nearest(35.0, -78.0)][1:]
+    match = point_filter({"ingredient_tokens": {"$nin": ["peanut", "egg"]}})
+    assert [p.id for _, p in index.nearest(35.0, -78.0, match=match)] == [p.id for p in kept]
+
+
+def test_point_filter_requires_clear_allergen_bits():
+    index = filled_index(
+        [
+            make_meal(35.0, -78.0, allergen_mask=0b101),
+            make_meal(35.0, -78.01, allergen_mask=0b010),
+            make_meal(35.0, -78.02),
+        ]
+    )
+    clear = list(index.nearest(35.0, -78.0))[1][1]
+    match = point_filter({"allergen_mask": {"$bitsAllClear": 0b100}})
+    assert [p.id for _, p in index.nearest(35.0, -78.0, match=match)] == [clear.id]
+
+
+# ============================================================
+# WRITES AND REBUILD
+# ============================================================
+
+
+def test_upsert_moves_and_removes_meals():
+    meal = make_meal(35.0, -78.0)
+    index = filled_index([meal])
+
+    meal["seller_location"] = {"latitude": 40.0, "longitude": -74.0, "geo": geo_point(40.0, -74.0)}
+    index.upsert(meal)
+    assert len(index) == 1
+    assert not list(index.nearest(35.0, -78.0, max_distance=10 * MILES))
+    assert len(list(index.nearest(40.0, -74.0, max_distance=10 * MILES))) == 1
+
+    meal["status"] = "sold"
+    index.upsert(meal)
+    assert len(index) == 0
+    assert index.stats()["cells"] == 0
+
+
+def test_remove_seller_drops_all_their_meals():
+    seller = ObjectId()
+    index = filled_index(
+        [make_meal(35.0, -78.0, seller_id=seller), make_meal(35.1, -78.0, seller_id=seller),
+         make_meal(35.2, -78.0)]
+    )
+    index.remove_seller(seller)
+    assert len(index) == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_loads_available_meals_and_replays_writes(mongo_client):
+    db = mongo_client["test_meal_db"]
+    await db.meals.insert_many(
+        [
+            make_meal(35.0, -78.0, dietary_tags=["vegan", "vegetarian"]),
+            make_meal(35.1, -78.0, dietary_tags=[]),
+            make_meal(35.2, -78.0, status="sold"),
+        ]
+    )
+    index = NearbyMealIndex()
+    late = make_meal(35.3, -78.0)
+
+    class WriteDuringRebuild:
+        """meals collection that sees a meal created while it is being read"""
+
+        def find(self, *args, **kwargs):
+            index.upsert(late)
+            return db.meals.find(*args, **kwargs)
+
+    count = await index.rebuild(SimpleNamespace(meals=WriteDuringRebuild()))
+
+    assert index.ready
+    assert count == 3
+    vegan = [p for _, p in index.nearest(35.0, -78.0) if "vegan" in p.dietary]
+    assert len(vegan) == 1
@@ -9,6 +9,11 @@ from datetime import datetime, timedelta
 from bson import ObjectId
 from unittest.mock import patch
 
+from app.allergens import allergen_mask, allergen_names
+from app.dietary import dietary_tags
+from app.geo import geo_point
+from app.ingredients import ingredient_tokens
+
 
 # Test configuration
 TEST_DB_NAME = "test_meal_db"
@@ -19,6 +24,20 @@ TEST_DB_NAME = "test_meal_db"
 # ============================================================
 
 
+def with_dietary_tags(*meals):
+    """Meals with the dietary_tags create_meal stores"""
+    return [dict(meal, dietary_tags=dietary_tags(meal)) for meal in meals]
+
+
+def meal_location(user):
+    """seller_location as create_meal stores it, including the GeoJSON point"""
+    location = user["location"]
+    return {
+        **location,
+        "geo": geo_point(location["latitude"], location["longitude"]),
+    }
+
+
 @pytest_asyncio.fixture
 async def test_user(mongo_client):
     """Create a test user in MongoDB"""
@@ -248,7 +267,7 @@ async def multiple_meals(mongo_client, test_user, second_user):
         user = test_user if config["seller_id"] == test_user["_id"] else second_user
         meal_doc = {
             **config,
-            "seller_location": user["location"],
+            "seller_location": meal_location(user),
             "description": f"Delicious {config['title']}",
             "photos": [],
             "allergen_info": {"contains": [], "may_contain": []},
@@ -267,6 +286,7 @@ async def multiple_meals(mongo_client, test_user, second_user):
             "created_at": datetime.utcnow(),
             "updated_at": datetime.utcnow(),
         }
+        meal_doc["dietary_tags"] = dietary_tags(meal_doc)
         result = await db.meals.insert_one(meal_doc)
         meal_doc["_id"] = result.inserted_id
         meals.append(meal_doc)
@@ -521,7 +541,7 @@ async def test_get_meals_with_distance_filter(
         "expires_date": datetime.utcnow() + timedelta(days=2),
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
-        "seller_location": user_far_away["location"],
+        "seller_location": meal_location(user_far_away),
     }
     result = await db.meals.insert_one(meal_doc)
 
@@ -601,7 +621,7 @@ async def test_get_recommendations_with_distance_filter(
         "expires_date": datetime.utcnow() + timedelta(days=2),
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow(),
-        "seller_location": user_far_away["location"],
+        "seller_location": meal_location(user_far_away),
     }
     result = await db.meals.insert_one(meal_doc)
 
@@ -1642,7 +1662,7 @@ async def test_delete_meal_already_deleted(
 
 
 @pytest.mark.asyncio
-async def test_upload_photos_single(meal_async_client):
+async def test_upload_photos_single(meal_async_client, uploads_dir):
     """Upload a single photo returns one URL and saves the file."""
     files = [("files", ("test1.txt", b"hello", "text/plain"))]
     resp = await meal_async_client.post("/api/meals/upload", files=files)
@@ -1650,6 +1670,8 @@ async def test_upload_photos_single(meal_async_client):
     urls = resp.json()
     assert isinstance(urls, list) and len(urls) == 1
     assert urls[0].startswith("/static/uploads/")
+    saved = uploads_dir / urls[0].rsplit("/", 1)[1]
+    assert saved.read_bytes() == b"hello"
 
 
 @pytest.mark.asyncio
@@ -1799,7 +1821,7 @@ async def test_dietary_filter_vegetarian_excludes_meat(
         "updated_at": datetime.utcnow(),
     }
     veg = dict(meal_meat, title="Veggie", ingredients="tofu, vegetables")
-    await db.meals.insert_many([meal_meat, veg])
+    await db.meals.insert_many(with_dietary_tags(*[meal_meat, veg]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=vegetarian")
     titles = [m["title"] for m in resp.json()]
     assert "Veggie" in titles and "Chicken Dish" not in titles
@@ -1833,7 +1855,7 @@ async def test_dietary_filter_vegan_excludes_dairy(
         allergen_info={"contains": []},
         ingredients="quinoa, beans",
     )
-    await db.meals.insert_many([dairy, plant])
+    await db.meals.insert_many(with_dietary_tags(*[dairy, plant]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=vegan")
     titles = [m["title"] for m in resp.json()]
     assert "Vegan Bowl" in titles and "Cheesy" not in titles
@@ -1867,7 +1889,7 @@ async def test_dietary_filter_gluten_free_excludes_wheat(
         allergen_info={"contains": []},
         ingredients="eggs, avocado",
     )
-    await db.meals.insert_many([wheat, gf])
+    await db.meals.insert_many(with_dietary_tags(*[wheat, gf]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=gluten-free")
     titles = [m["title"] for m in resp.json()]
     assert "Gluten Free" in titles and "Bread Basket" not in titles
@@ -1901,7 +1923,7 @@ async def test_dietary_filter_dairy_free_excludes_milk(
         allergen_info={"contains": []},
         ingredients="strawberries, banana",
     )
-    await db.meals.insert_many([milk, alt])
+    await db.meals.insert_many(with_dietary_tags(*[milk, alt]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=dairy-free")
     titles = [m["title"] for m in resp.json()]
     assert "Fruit Cup" in titles and "Milkshake" not in titles
@@ -1932,7 +1954,7 @@ async def test_dietary_filter_nut_free_excludes_peanuts(
     safe = dict(
         nuts, title="Oat Bar", allergen_info={"contains": []}, ingredients="oats, honey"
     )
-    await db.meals.insert_many([nuts, safe])
+    await db.meals.insert_many(with_dietary_tags(*[nuts, safe]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=nut-free")
     titles = [m["title"] for m in resp.json()]
     assert "Oat Bar" in titles and "Peanut Bar" not in titles
@@ -1961,12 +1983,65 @@ async def test_dietary_filter_keto_excludes_bread(
         "updated_at": datetime.utcnow(),
     }
     keto = dict(carb, title="Keto Plate", ingredients="steak, broccoli")
-    await db.meals.insert_many([carb, keto])
+    await db.meals.insert_many(with_dietary_tags(*[carb, keto]))
     resp = await meal_async_client.get("/api/meals/?dietary_restriction=keto")
     titles = [m["title"] for m in resp.json()]
     assert "Keto Plate" in titles and "Pasta Plate" not in titles
 
 
+@pytest.mark.asyncio
+async def test_create_and_update_meal_store_dietary_tags(
+    authenticated_meal_client, mongo_client, sample_meal_data
+):
+    db = mongo_client[TEST_DB_NAME]
+    data = dict(sample_meal_data, ingredients="tofu, rice, broccoli")
+    data["allergen_info"] = {"contains": ["soy"], "may_contain": []}
+    created = await authenticated_meal_client.post("/api/meals/", json=data)
+    meal_id = ObjectId(created.json()["id"])
+    tags = (await db.meals.find_one({"_id": meal_id}))["dietary_tags"]
+    assert {"vegan", "vegetarian", "dairy-free"} <= set(tags)
+
+    await authenticated_meal_client.put(
+        f"/api/meals/{meal_id}", json={"ingredients": "tofu, rice, cheese"}
+    )
+    tags = (await db.meals.find_one({"_id": meal_id}))["dietary_tags"]
+    assert "vegan" not in tags and "dairy-free" not in tags
+    assert "vegetarian" in tags
+
+
+@pytest.mark.asyncio
+async def test_dietary_filter_returns_full_pages(
+    meal_async_client, mongo_client, test_user
+):
+    """Dietary filtering runs in the query, so pages are filled to limit"""
+    db = mongo_client[TEST_DB_NAME]
+    now = datetime.utcnow()
+    meals = [
+        {
+            "seller_id": test_user["_id"],
+            "title": f"{'Veg' if i % 3 == 0 else 'Meat'} {i}",
+            "description": "desc" * 5,
+            "cuisine_type": "Any",
+            "meal_type": "Dinner",
+            "ingredients": "rice, beans" if i % 3 == 0 else "rice, chicken",
+            "allergen_info": {"contains": []},
+            "portion_size": "1",
+            "available_for_sale": True,
+            "sale_price": 5.0,
+            "status": "available",
+            "created_at": now - timedelta(minutes=i),
+            "preparation_date": now,
+            "expires_date": now + timedelta(days=1),
+            "updated_at": now,
+        }
+        for i in range(12)
+    ]
+    await db.meals.insert_many(with_dietary_tags(*meals))
+
+    resp = await meal_async_client.get("/api/meals/?dietary_restriction=vegetarian&limit=3")
+    assert [m["title"] for m in resp.json()] == ["Veg 0", "Veg 3", "Veg 6"]
+
+
 @pytest.mark.asyncio
 async def test_recommendations_exclude_user_allergens(
     authenticated_meal_client, mongo_client, test_user
@@ -2019,13 +2094,111 @@ async def test_recommendations_exclude_user_allergens(
     good = dict(
         bad, title="Veg Soup", allergen_info={"contains": []}, ingredients="veggies"
     )
-    await db.meals.insert_many([bad, good])
+    await db.meals.insert_many([dict(m, allergen_mask=allergen_mask(m)) for m in (bad, good)])
     resp = await authenticated_meal_client.get("/api/meals/my/recommendations")
     assert resp.status_code == 200
     titles = [m["title"] for m in resp.json()]
     assert "Veg Soup" in titles and "Peanut Soup" not in titles
 
 
+@pytest.mark.asyncio
+async def test_exclude_allergens_uses_allergen_mask(
+    authenticated_meal_client, mongo_client, sample_meal_data
+):
+    db = mongo_client[TEST_DB_NAME]
+    for title, contains, may_contain in [
+        ("Cheese Board", ["Dairy"], []),
+        ("Almond Cake", ["eggs"], ["Almonds"]),
+        ("Plain Rice", [], []),
+        ("Durian Pudding", ["durian"], []),
+    ]:
+        data = dict(sample_meal_data, title=title)
+        data["allergen_info"] = {"contains": contains, "may_contain": may_contain}
+        assert (await authenticated_meal_client.post("/api/meals/", json=data)).status_code == 201
+    cake = await db.meals.find_one({"title": "Almond Cake"})
+    assert allergen_names(cake["allergen_mask"]) == ["eggs", "tree nuts"]
+
+    async def titles(exclude):
+        resp = await authenticated_meal_client.get(f"/api/meals/?exclude_allergens={exclude}")
+        assert resp.status_code == 200
+        return sorted(m["title"] for m in resp.json())
+
+    # Case and synonyms no longer slip through; may_contain counts too
+    assert await titles("milk") == ["Almond Cake", "Durian Pudding", "Plain Rice"]
+    assert await titles("NUTS") == ["Cheese Board", "Durian Pudding", "Plain Rice"]
+    # Names outside the vocabulary are still excluded by exact name
+    assert await titles("dairy,durian") == ["Almond Cake", "Plain Rice"]
+
+    await authenticated_meal_client.put(
+        f"/api/meals/{cake['_id']}",
+        json={"allergen_info": {"contains": ["eggs"], "may_contain": []}},
+    )
+    assert "Almond Cake" in await titles("nuts")
+@pytest.mark.asyncio
+async def test_exclude_ingredients_uses_ingredient_tokens(
+    authenticated_meal_client, mongo_client, sample_meal_data
+):
+    db = mongo_client[TEST_DB_NAME]
+    for title, ingredients in [
+        ("Satay", "Chicken, Peanut Butter, soy sauce"),
+        ("Licorice Tart", "licorice, flour, sugar"),
+        ("Fried Rice", "rice, eggs, scallions"),
+    ]:
+        data = dict(sample_meal_data, title=title, ingredients=ingredients)
+        assert (await authenticated_meal_client.post("/api/meals/", json=data)).status_code == 201
+    satay = await db.meals.find_one({"title": "Satay"})
+    assert {"chicken", "peanut butter", "peanut", "soy sauce"} <= set(satay["ingredient_tokens"])
+
+    async def titles(exclude):
+        resp = await authenticated_meal_client.get(f"/api/meals/?exclude_ingredients={exclude}")
+        assert resp.status_code == 200
+        return sorted(m["title"] for m in resp.json())
+
+    assert await titles("peanuts") == ["Fried Rice", "Licorice Tart"]
+    # Whole tokens only: "rice" does not exclude licorice
+    assert await titles("Rice,egg") == ["Licorice Tart", "Satay"]
+
+    await authenticated_meal_client.put(
+        f"/api/meals/{satay['_id']}", json={"ingredients": "chicken, coconut milk"}
+    )
+    assert await titles("peanuts") == ["Fried Rice", "Licorice Tart", "Satay"]
+
+
+@pytest.mark.asyncio
+async def test_recommendations_exclude_avoided_ingredients(
+    authenticated_meal_client, mongo_client, test_user, second_user
+):
+    db = mongo_client[TEST_DB_NAME]
+    test_user.setdefault("dietary_preferences", {})["avoid_ingredients"] = ["Cilantro"]
+    now = datetime.utcnow()
+    base = {
+        "seller_id": second_user["_id"],
+        "description": "desc" * 5,
+        "cuisine_type": "Mexican",
+        "meal_type": "Dinner",
+        "allergen_info": {"contains": []},
+        "portion_size": "1",
+        "available_for_sale": True,
+        "sale_price": 7.0,
+        "status": "available",
+        "created_at": now,
+        "preparation_date": now,
+        "expires_date": now + timedelta(days=1),
+        "updated_at": now,
+    }
+    meals = [
+        dict(base, title="Salsa Verde", ingredients="tomatillo, cilantro, lime"),
+        dict(base, title="Black Beans", ingredients="black beans, onion"),
+    ]
+    await db.meals.insert_many(
+        [dict(m, ingredient_tokens=ingredient_tokens(m)) for m in meals]
+    )
+
+    resp = await authenticated_meal_client.get("/api/meals/my/recommendations")
+    assert resp.status_code == 200
+    assert [m["title"] for m in resp.json()] == ["Black Beans"]
+
+
 @pytest.mark.asyncio
 async def test_meal_to_response_defaults_when_missing(mongo_client, test_user):
     """Missing optional numeric fields default in response."""
@@ -2086,3 +2259,650 @@ async def test_update_meal_ignores_seller_id_change(
     assert resp.status_code in [200, 400]  # 400 if no changes applied
     updated = await db.meals.find_one({"_id": ins.inserted_id})
     assert str(updated["seller_id"]) == str(test_user["_id"])  # unchanged
+
+
+# ============================================================
+# GEO SEARCH TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_create_meal_stores_geojson_point(
+    authenticated_meal_client, mongo_client, test_user, sample_meal_data
+):
+    """create_meal stores the seller position as a GeoJSON point"""
+    response = await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    assert response.status_code == 201
+
+    db = mongo_client[TEST_DB_NAME]
+    meal = await db.meals.find_one({"_id": ObjectId(response.json()["id"])})
+    assert meal["seller_location"]["geo"] == {
+        "type": "Point",
+        "coordinates": [test_user["location"]["longitude"], test_user["location"]["latitude"]],
+    }
+    assert meal["seller_location"]["latitude"] == test_user["location"]["latitude"]
+
+
+@pytest.mark.asyncio
+async def test_get_meals_cursor_pages_by_distance(meal_async_client, multiple_meals):
+    """Following X-Next-Cursor visits every nearby meal once, nearest first"""
+    seen, distances = [], []
+    url = "/api/meals/?latitude=35.7796&longitude=-78.6382&limit=2"
+    cursor = None
+    for _ in range(10):
+        response = await meal_async_client.get(
+            url + (f"&cursor={cursor}" if cursor else "")
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(m["id"] for m in page)
+        distances.extend(m["distance"] for m in page)
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert sorted(seen) == sorted(str(m["_id"]) for m in multiple_meals)
+    assert distances == sorted(distances)
+
+
+@pytest.mark.asyncio
+async def test_get_meals_rejects_invalid_cursor(meal_async_client):
+    response = await meal_async_client.get(
+        "/api/meals/?latitude=35.7796&longitude=-78.6382&cursor=not-a-cursor"
+    )
+    assert response.status_code == 400
+
+
+def test_geo_near_pipeline_resumes_after_cursor():
+    from app.geo import geo_near_pipeline
+
+    last_id = ObjectId()
+    pipeline = geo_near_pipeline(
+        {"status": "available"}, 35.0, -78.0, 10, after=(1200.5, str(last_id)), limit=5
+    )
+
+    geo_near = pipeline[0]["$geoNear"]
+    assert geo_near["near"]["coordinates"] == [-78.0, 35.0]
+    assert geo_near["minDistance"] == 1200.5
+    assert geo_near["maxDistance"] == pytest.approx(16093.44)
+    assert pipeline[1]["$match"]["$or"][1] == {
+        "distance_meters": 1200.5,
+        "_id": {"$gt": last_id},
+    }
+    assert pipeline[-1] == {"$limit": 5}
+
+
+@pytest_asyncio.fixture
+async def nearby_index(mongo_client):
+    """Serve location searches from the in-process index for one test"""
+    from app.meal_index import nearby_meals
+
+    async def build():
+        await nearby_meals.rebuild(mongo_client[TEST_DB_NAME])
+        return nearby_meals
+
+    yield build
+    nearby_meals.clear()
+
+
+@pytest.mark.asyncio
+async def test_nearby_index_pages_like_geo_near(
+    meal_async_client, multiple_meals, user_far_away, mongo_client, nearby_index
+):
+    """Index-served pages return the same meals and order as $geoNear"""
+    url = "/api/meals/?latitude=35.7796&longitude=-78.6382&limit=2"
+    expected = (await meal_async_client.get(url.replace("limit=2", "limit=50"))).json()
+
+    index = await nearby_index()
+    seen, cursor = [], None
+    for _ in range(10):
+        response = await meal_async_client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert [m["id"] for m in seen] == [m["id"] for m in expected]
+    assert [m["distance"] for m in seen] == [m["distance"] for m in expected]
+    assert index.queries > 0
+
+
+@pytest.mark.asyncio
+async def test_nearby_index_follows_meal_writes(
+    authenticated_meal_client, sample_meal_data, test_user, nearby_index
+):
+    """create/update/delete keep the index in step without a rebuild"""
+    index = await nearby_index()
+    location = test_user["location"]
+    url = (
+        f"/api/meals/?latitude={location['latitude']}&longitude={location['longitude']}"
+        "&max_distance_miles=5"
+    )
+
+    created = await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    meal_id = created.json()["id"]
+    assert len(index) == 1
+    assert [m["id"] for m in (await authenticated_meal_client.get(url)).json()] == [meal_id]
+
+    await authenticated_meal_client.put(f"/api/meals/{meal_id}", json={"status": "sold"})
+    assert len(index) == 0
+    assert (await authenticated_meal_client.get(url)).json() == []
+
+    await authenticated_meal_client.put(f"/api/meals/{meal_id}", json={"status": "available"})
+    assert len(index) == 1
+    await authenticated_meal_client.delete(f"/api/meals/{meal_id}")
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_nearby_index_applies_dietary_and_query_filters(
+    meal_async_client, multiple_meals, nearby_index
+):
+    """Filters the index cannot evaluate are still applied by MongoDB"""
+    base = "/api/meals/?latitude=35.7796&longitude=-78.6382"
+    urls = [
+        base + "&cuisine_type=Italian&min_rating=0",
+        base + "&dietary_restriction=vegetarian",
+        base + "&max_price=12&available_for_swap=true",
+    ]
+    expected = [(await meal_async_client.get(url)).json() for url in urls]
+
+    await nearby_index()
+    assert [(await meal_async_client.get(url)).json() for url in urls] == expected
+
+
+# ============================================================
+# CURSOR PAGINATION TESTS
+# ============================================================
+
+
+async def follow_cursors(client, url, pages=20):
+    """Collect every meal by following X-Next-Cursor from ``url``"""
+    seen, cursor = [], None
+    for _ in range(pages):
+        separator = "&" if "?" in url else "?"
+        response = await client.get(url + (f"{separator}cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return seen
+    raise AssertionError("cursor never ran out")
+
+
+@pytest.mark.asyncio
+async def test_get_meals_cursor_pages_newest_first(
+    meal_async_client, mongo_client, test_user
+):
+    """Pages share no meals, even when several have the same created_at"""
+    db = mongo_client[TEST_DB_NAME]
+    now = datetime.utcnow().replace(microsecond=0)
+    await db.meals.insert_many(
+        [
+            {
+                "seller_id": test_user["_id"],
+                "seller_location": meal_location(test_user),
+                "title": f"Meal {i}",
+                "description": "Cursor test",
+                "cuisine_type": "Italian",
+                "meal_type": "dinner",
+                "ingredients": "pasta",
+                "allergen_info": {"contains": [], "may_contain": []},
+                "portion_size": "1",
+                "available_for_sale": True,
+                "sale_price": 10.0,
+                "status": "available",
+                "preparation_date": now,
+                "expires_date": now + timedelta(days=1),
+                "created_at": now - timedelta(minutes=i // 3),
+                "updated_at": now,
+            }
+            for i in range(11)
+        ]
+    )
+
+    seen = await follow_cursors(meal_async_client, "/api/meals/?limit=4")
+
+    assert len(seen) == 11
+    assert len({m["id"] for m in seen}) == 11
+    created = [m["created_at"] for m in seen]
+    assert created == sorted(created, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_get_meals_cursor_is_stable_when_meals_are_added(
+    meal_async_client, mongo_client, multiple_meals, test_user
+):
+    """A meal listed after the first page does not shift later pages"""
+    first = await meal_async_client.get("/api/meals/?limit=2")
+    cursor = first.headers["x-next-cursor"]
+
+    db = mongo_client[TEST_DB_NAME]
+    newest = dict(multiple_meals[0], _id=ObjectId(), created_at=datetime.utcnow())
+    await db.meals.insert_one(newest)
+
+    rest = await follow_cursors(meal_async_client, f"/api/meals/?limit=2&cursor={cursor}")
+    ids = [m["id"] for m in first.json()] + [m["id"] for m in rest]
+    assert str(newest["_id"]) not in ids
+    assert sorted(ids) == sorted(
+        str(m["_id"]) for m in multiple_meals if m["status"] == "available"
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_meals_cursor_fills_pages_after_dietary_filter(
+    meal_async_client, multiple_meals
+):
+    """Dietary filtering no longer leaves short pages before the end"""
+    everything = (
+        await meal_async_client.get("/api/meals/?dietary_restriction=vegetarian&limit=50")
+    ).json()
+    paged = await follow_cursors(
+        meal_async_client, "/api/meals/?dietary_restriction=vegetarian&limit=1"
+    )
+    assert [m["id"] for m in paged] == [m["id"] for m in everything]
+
+
+@pytest.mark.asyncio
+async def test_get_meals_rejects_distance_cursor_without_location(meal_async_client):
+    from app.pagination import encode_cursor
+
+    cursor = encode_cursor({"d": 120.5, "id": str(ObjectId())})
+    response = await meal_async_client.get(f"/api/meals/?cursor={cursor}")
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_meals_skip_still_supported(meal_async_client, multiple_meals):
+    everything = (await meal_async_client.get("/api/meals/")).json()
+    response = await meal_async_client.get("/api/meals/?skip=1&limit=2")
+    assert [m["id"] for m in response.json()] == [m["id"] for m in everything[1:3]]
+
+
+# ============================================================
+# SEARCH TESTS
+# ============================================================
+
+
+@pytest_asyncio.fixture
+async def search_index(mongo_client):
+    """Serve searches from the in-process BM25 index for one test"""
+    from app.search_index import meal_search
+
+    async def build():
+        await meal_search.rebuild(mongo_client[TEST_DB_NAME])
+        return meal_search
+
+    meal_search.clear()
+    yield build
+    meal_search.clear()
+
+
+async def text_index(db):
+    """The $text index search falls back to before the BM25 index is built"""
+    from app.indexes import INDEXES
+
+    await db.meals.create_indexes(
+        [m for m in INDEXES["meals"] if m.document.get("name") == "meal_text"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_ranks_by_relevance(meal_async_client, multiple_meals, search_index):
+    await search_index()
+
+    response = await meal_async_client.get("/api/meals/search?q=tacos")
+    assert response.status_code == 200
+    assert [m["title"] for m in response.json()] == ["Mexican Tacos"]
+
+    # Every description says "Delicious <title>"; the title decides the order
+    response = await meal_async_client.get("/api/meals/search?q=delicious dumplings")
+    titles = [m["title"] for m in response.json()]
+    assert titles[0] == "Chinese Dumplings"
+    assert len(titles) == len(multiple_meals)
+
+    response = await meal_async_client.get("/api/meals/search?q=the")
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_composes_with_filters(
+    meal_async_client, multiple_meals, search_index
+):
+    await search_index()
+
+    async def titles(params):
+        response = await meal_async_client.get(f"/api/meals/search?q=delicious&{params}")
+        assert response.status_code == 200
+        return sorted(m["title"] for m in response.json())
+
+    assert await titles("max_price=12") == ["French Croissant", "Mexican Tacos"]
+    assert await titles("cuisine_type=Chinese") == ["Chinese Dumplings"]
+    assert await titles("available_for_swap=true&min_rating=0") == [
+        "Mexican Tacos", "Swap Only Meal",
+    ]
+    # Raleigh sellers only; the Durham seller is about 20 miles away
+    near = "latitude=35.7796&longitude=-78.6382&max_distance_miles=10"
+    assert await titles(near) == ["Italian Lasagna", "Mexican Tacos", "Swap Only Meal"]
+    assert await titles("latitude=34.05&longitude=-118.24&max_distance_miles=10") == []
+
+    response = await meal_async_client.get(f"/api/meals/search?q=tacos&{near}")
+    assert response.json()[0]["distance"] is not None
+
+
+@pytest.mark.asyncio
+async def test_search_pages_with_cursor(meal_async_client, multiple_meals, search_index):
+    await search_index()
+    everything = (await meal_async_client.get("/api/meals/search?q=delicious&limit=50")).json()
+
+    paged = await follow_cursors(meal_async_client, "/api/meals/search?q=delicious&limit=2")
+    assert [m["id"] for m in paged] == [m["id"] for m in everything]
+
+
+@pytest.mark.asyncio
+async def test_search_sees_writes_without_rebuild(
+    authenticated_meal_client, sample_meal_data, search_index
+):
+    index = await search_index()
+    data = dict(sample_meal_data, title="Shakshuka", ingredients="eggs, tomatoes")
+    created = await authenticated_meal_client.post("/api/meals/", json=data)
+    meal_id = created.json()["id"]
+
+    found = (await authenticated_meal_client.get("/api/meals/search?q=shakshuka")).json()
+    assert [m["id"] for m in found] == [meal_id]
+
+    await authenticated_meal_client.delete(f"/api/meals/{meal_id}")
+    assert len(index) == 0
+    assert (await authenticated_meal_client.get("/api/meals/search?q=shakshuka")).json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_text_index(
+    meal_async_client, mongo_client, multiple_meals, search_index
+):
+    """Until the BM25 index is built, $text ranks the results"""
+    await text_index(mongo_client[TEST_DB_NAME])
+
+    response = await meal_async_client.get("/api/meals/search?q=delicious tacos&max_price=12")
+    assert response.status_code == 200
+    titles = [m["title"] for m in response.json()]
+    assert titles[0] == "Mexican Tacos"
+    assert set(titles) == {"Mexican Tacos", "French Croissant"}
+
+    paged = await follow_cursors(meal_async_client, "/api/meals/search?q=delicious&limit=2")
+    assert len({m["id"] for m in paged}) == len(multiple_meals)
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_foreign_cursors(
+    meal_async_client, multiple_meals, search_index
+):
+    from app.pagination import encode_cursor
+
+    meal_id = str(multiple_meals[0]["_id"])
+    location_cursor = encode_cursor({"d": 10.0, "id": meal_id})
+    response = await meal_async_client.get(f"/api/meals/search?q=tacos&cursor={location_cursor}")
+    assert response.status_code == 400
+
+    # A BM25 page cannot be continued by a worker still building its index
+    bm25_cursor = encode_cursor({"s": 1.0, "id": meal_id, "e": "bm25"})
+    response = await meal_async_client.get(f"/api/meals/search?q=tacos&cursor={bm25_cursor}")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+# ============================================================
+# SUGGEST TESTS
+# ============================================================
+
+
+@pytest_asyncio.fixture
+async def suggest_index(mongo_client):
+    """Serve suggestions from a freshly built in-process prefix index"""
+    from app.suggest_index import meal_suggest
+
+    meal_suggest.clear()
+    await meal_suggest.rebuild(mongo_client[TEST_DB_NAME])
+    yield meal_suggest
+    meal_suggest.clear()
+
+
+@pytest.mark.asyncio
+async def test_suggest_titles_and_cuisines(meal_async_client, multiple_meals, suggest_index):
+    response = await meal_async_client.get("/api/meals/suggest?prefix=ta")
+    assert response.status_code == 200
+    assert response.json() == [{"text": "Mexican Tacos", "kind": "title", "meal_count": 1}]
+
+    response = await meal_async_client.get("/api/meals/suggest?prefix=mex")
+    assert sorted((s["text"], s["kind"]) for s in response.json()) == [
+        ("Mexican", "cuisine"), ("Mexican Tacos", "title"),
+    ]
+
+    response = await meal_async_client.get("/api/meals/suggest?prefix=zzz")
+    assert response.json() == []
+    response = await meal_async_client.get("/api/meals/suggest?prefix=ta&limit=100")
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_suggest_follows_writes_and_views(
+    authenticated_meal_client, sample_meal_data, suggest_index
+):
+    data = dict(sample_meal_data, title="Shakshuka", ingredients="eggs, tomatoes")
+    created = await authenticated_meal_client.post("/api/meals/", json=data)
+    meal_id = created.json()["id"]
+
+    response = await authenticated_meal_client.get("/api/meals/suggest?prefix=shak")
+    assert response.json() == [{"text": "Shakshuka", "kind": "title", "meal_count": 1}]
+
+    await authenticated_meal_client.get(f"/api/meals/{meal_id}")
+    assert suggest_index.suggest("shak")[0].weight == 2
+
+    await authenticated_meal_client.delete(f"/api/meals/{meal_id}")
+    assert (await authenticated_meal_client.get("/api/meals/suggest?prefix=shak")).json() == []
+
+
+# ============================================================
+# MEAL CARD (SELLER SNAPSHOT) TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_meal_cards_render_from_seller_snapshot(
+    authenticated_meal_client, sample_meal_data, mongo_client, test_user
+):
+    db = mongo_client[TEST_DB_NAME]
+    created = await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    meal_id = created.json()["id"]
+
+    meal = await db.meals.find_one({"_id": ObjectId(meal_id)})
+    assert meal["seller_snapshot"] == {"full_name": "Test User", "average_rating": 4.5}
+
+    # Cards come from the snapshot, not from the users collection
+    await db.users.update_one({"_id": test_user["_id"]}, {"$set": {"full_name": "Unsynced"}})
+    listed = (await authenticated_meal_client.get("/api/meals/")).json()
+    assert [(m["seller_name"], m["seller_rating"]) for m in listed] == [("Test User", 4.5)]
+    single = (await authenticated_meal_client.get(f"/api/meals/{meal_id}")).json()
+    assert single["seller_name"] == "Test User"
+
+
+@pytest.mark.asyncio
+async def test_seller_changes_reach_meal_snapshots(
+    authenticated_meal_client, sample_meal_data, mongo_client, test_user
+):
+    from app.models import UserUpdate
+    from app.routes.review_routes import update_seller_stats
+    from app.routes.user_routes import update_my_profile
+
+    db = mongo_client[TEST_DB_NAME]
+    for title in ("Pasta", "Pesto"):
+        meal_data = dict(sample_meal_data, title=title)
+        await authenticated_meal_client.post("/api/meals/", json=meal_data)
+
+    with patch("app.routes.user_routes.get_database", return_value=db):
+        await update_my_profile(UserUpdate(full_name="Renamed Cook"), current_user=test_user)
+    await db.reviews.insert_many(
+        [{"seller_id": test_user["_id"], "rating": rating} for rating in (5, 4, 4)]
+    )
+    await update_seller_stats(db, str(test_user["_id"]))
+
+    listed = (await authenticated_meal_client.get("/api/meals/")).json()
+    assert {(m["seller_name"], m["seller_rating"]) for m in listed} == {("Renamed Cook", 4.3)}
+    await db.reviews.delete_many({"seller_id": test_user["_id"]})
+
+
+@pytest.mark.asyncio
+async def test_meal_writes_take_the_rating_from_users_not_the_principal(
+    authenticated_meal_client, sample_meal_data, mongo_client, test_user
+):
+    db = mongo_client[TEST_DB_NAME]
+    # Synced by another worker; this worker's cached principal still says 4.5
+    await db.users.update_one({"_id": test_user["_id"]}, {"$set": {"stats.average_rating": 3.2}})
+
+    created = await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    assert created.json()["seller_rating"] == 3.2
+
+    await db.users.update_one({"_id": test_user["_id"]}, {"$set": {"stats.average_rating": 3.8}})
+    meal_id = created.json()["id"]
+    await authenticated_meal_client.put(f"/api/meals/{meal_id}", json={"title": "Renamed"})
+    meal = await db.meals.find_one({"_id": ObjectId(meal_id)})
+    assert meal["seller_snapshot"]["average_rating"] == 3.8
+
+
+# ============================================================
+# BROWSE CACHE TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_browse_pages_are_cached_until_a_meal_write(
+    authenticated_meal_client, multiple_meals, sample_meal_data, mongo_client
+):
+    from app.browse_cache import browse_cache
+
+    hits = browse_cache.hits
+    first = await authenticated_meal_client.get("/api/meals/?cuisine_type=Italian")
+    # Written behind the cache's back: the cached page is served
+    await mongo_client[TEST_DB_NAME].meals.update_many({}, {"$set": {"title": "Renamed"}})
+    again = await authenticated_meal_client.get("/api/meals/?cuisine_type=Italian")
+    assert again.content == first.content
+    assert browse_cache.hits == hits + 1
+
+    await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    fresh = await authenticated_meal_client.get("/api/meals/?cuisine_type=Italian")
+    assert {m["title"] for m in fresh.json()} == {"Renamed", "Delicious Pasta"}
+
+
+@pytest.mark.asyncio
+async def test_location_pages_use_the_exact_point(meal_async_client, multiple_meals):
+    from app.browse_cache import browse_cache
+
+    hits, misses = browse_cache.hits, browse_cache.misses
+    near = await meal_async_client.get("/api/meals/?latitude=35.7796&longitude=-78.6382")
+    nearer = await meal_async_client.get("/api/meals/?latitude=35.7796&longitude=-78.6382")
+    moved = await meal_async_client.get("/api/meals/?latitude=35.7896&longitude=-78.6382")
+
+    # Not cached: distances and the radius cut-off follow the caller's point
+    assert (browse_cache.hits, browse_cache.misses) == (hits, misses)
+    assert near.json() == nearer.json()
+    assert [m["distance"] for m in moved.json()] != [
+        m["distance"] for m in near.json()
+    ]
+
+
+# ============================================================
+# VIEW COUNTER TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_meal_views_are_buffered_and_shown(meal_async_client, sample_meal, mongo_client):
+    from app.view_counter import meal_views
+
+    db = mongo_client[TEST_DB_NAME]
+    url = f"/api/meals/{sample_meal['_id']}"
+
+    assert (await meal_async_client.get(url)).json()["views"] == 1
+    assert (await meal_async_client.get(url)).json()["views"] == 2
+    assert (await db.meals.find_one({"_id": sample_meal["_id"]}))["views"] == 0
+
+    await meal_views.flush(db)
+    assert (await db.meals.find_one({"_id": sample_meal["_id"]}))["views"] == 2
+    assert (await meal_async_client.get(url)).json()["views"] == 3
+
+
+# ============================================================
+# CONDITIONAL GET TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_unchanged_meal_is_not_modified(
+    authenticated_meal_client, sample_meal_data, query_budget
+):
+    from app.view_counter import meal_views
+
+    created = await authenticated_meal_client.post("/api/meals/", json=sample_meal_data)
+    url = f"/api/meals/{created.json()['id']}"
+    first = await authenticated_meal_client.get(url)
+    tag = first.headers["ETag"]
+    assert tag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    with query_budget(1):
+        unchanged = await authenticated_meal_client.get(url, headers={"If-None-Match": tag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == tag
+    # A revalidated view is still a view
+    assert meal_views.pending(created.json()["id"]) == 2
+
+    await authenticated_meal_client.put(url, json={"title": "Even Better Pasta"})
+    changed = await authenticated_meal_client.get(url, headers={"If-None-Match": tag})
+    assert changed.status_code == 200
+    assert changed.json()["title"] == "Even Better Pasta"
+    assert changed.headers["ETag"] != tag
+
+
+@pytest.mark.asyncio
+async def test_meal_without_seller_snapshot_still_revalidates(meal_async_client, sample_meal):
+    url = f"/api/meals/{sample_meal['_id']}"
+    tag = (await meal_async_client.get(url)).headers["ETag"]
+
+    unchanged = await meal_async_client.get(url, headers={"If-None-Match": tag})
+    assert unchanged.status_code == 304
+
+
+# ============================================================
+# QUERY BUDGET TESTS
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_get_meal_by_id_query_budget(meal_async_client, sample_meal, query_budget):
+    """Meal lookup and seller lookup; the view is buffered, not written"""
+    with query_budget(2):
+        response = await meal_async_client.get(f"/api/meals/{sample_meal['_id']}")
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_get_meals_query_budget(meal_async_client, multiple_meals, query_budget):
+    """The meal page and its sellers must not cost one query per meal"""
+    with query_budget(3):
+        response = await meal_async_client.get("/api/meals/")
+    assert response.status_code == 200
+    assert len(response.json()) == len(multiple_meals)
+
+
+@pytest.mark.asyncio
+async def test_recommendations_query_budget(
+    authenticated_meal_client, multiple_meals, query_budget
+):
+    """Recommended meals and their sellers in one page query and one users query"""
+    with query_budget(3):
+        response = await authenticated_meal_client.get("/api/meals/my/recommendations")
+    assert response.status_code == 200
+    assert {m["seller_name"] for m in response.json()} == {"Second User"}
@@ -0,0 +1,211 @@
+"""
+Tests for request/MongoDB command metrics and the /metrics endpoint
+"""
+
+import threading
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pymongo import monitoring
+
+import app.database as database_module
+from app.metrics import (
+    CommandMetricsListener,
+    HistogramFamily,
+    MetricsMiddleware,
+    http_request_duration,
+    mongodb_command_duration,
+    mongodb_reply_size,
+    render_metrics,
+    reset_metrics,
+)
+
+ADDRESS = ("localhost", 27017)
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+# ============================================================
+# HISTOGRAMS
+# ============================================================
+
+
+def test_histogram_buckets_are_inclusive_upper_bounds():
+    family = HistogramFamily("t", "test", ("k",), (1, 5))
+    for value in (0.5, 1, 3, 5, 9):
+        family.observe(("a",), value)
+
+    counts, total = family.collect()[("a",)]
+    # <=1, <=5, overflow
+    assert counts == [2, 2, 1]
+    assert total == 18.5
+
+
+def test_histogram_merges_observations_from_every_thread():
+    family = HistogramFamily("t", "test", ("k",), (1,))
+
+    def record():
+        for _ in range(1000):
+            family.observe(("a",), 0.5)
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    family.observe(("a",), 0.5)
+
+    counts, _ = family.collect()[("a",)]
+    assert sum(counts) == 4001
+
+
+# ============================================================
+# MONGODB COMMAND LISTENER
+# ============================================================
+
+
+def test_command_listener_records_collection_duration_and_reply_size():
+    listener = CommandMetricsListener(reply_sample_every=1)
+    listener.started(
+        monitoring.CommandStartedEvent(
+            {"find": "meals", "filter": {}}, "myapp", 7, ADDRESS, 1
+        )
+    )
+    listener.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(milliseconds=3),
+            {"cursor": {"firstBatch": [{"title": "Pad Thai"}], "id": 0}, "ok": 1},
+            "find",
+            7,
+            ADDRESS,
+            1,
+        )
+    )
+
+    counts, total = mongodb_command_duration.collect()[("meals", "find", "ok")]
+    assert sum(counts) == 1
+    assert total == pytest.approx(0.003)
+    sizes, _ = mongodb_reply_size.collect()[("meals", "find")]
+    assert sum(sizes) == 1
+
+
+def test_command_listener_labels_get_more_and_failures():
+    listener = CommandMetricsListener(reply_sample_every=0)
+    listener.started(
+        monitoring.CommandStartedEvent(
+            {"getMore": 123, "collection": "reviews"}, "myapp", 8, ADDRESS, 2
+        )
+    )
+    listener.failed(
+        monitoring.CommandFailedEvent(
+            timedelta(milliseconds=1), {"ok": 0}, "getMore", 8, ADDRESS, 2
+        )
+    )
+
+    assert ("reviews", "getMore", "error") in mongodb_command_duration.collect()
+    assert mongodb_reply_size.collect() == {}
+
+
+def test_client_options_register_command_listener():
+    options = database_module.client_options()
+    assert database_module.command_metrics in options["event_listeners"]
+
+
+# ============================================================
+# MIDDLEWARE AND EXPORT
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://testserver"
+    ) as client:
+        await client.get("/items/1")
+        await client.get("/items/2")
+        await client.get("/nope")
+
+    recorded = http_request_duration.collect()
+    counts, _ = recorded[("GET", "/items/{item_id}", 200)]
+    assert sum(counts) == 2
+    assert ("GET", "unmatched", 404) in recorded
+
+
+def test_metrics_endpoint_exports_prometheus_text(test_client):
+    test_client.get("/health")
+    response = test_client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/health",status="200"} 1'
+        in body
+    )
+    assert 'le="+Inf"' in body
+    assert "password_pool_in_flight" in body
+    assert "http_requests_in_flight" in render_metrics()
+
+
+def test_metrics_export_cache_stats():
+    body = render_metrics(
+        {
+            "browse": {"hits": 9, "misses": 1, "hit_ratio": 0.9, "size": 4, "bytes": 2048},
+            "auth": {"hits": 3, "misses": 1, "hit_ratio": 0.75, "size": 2},
+        }
+    )
+
+    assert "# TYPE cache_hits_total counter" in body
+    assert 'cache_hit_ratio{cache="browse"} 0.9' in body
+    assert 'cache_hit_ratio{cache="auth"} 0.75' in body
+    assert 'cache_bytes{cache="browse"} 2048' in body
+    assert 'cache_bytes{cache="auth"}' not in body
+    assert "cache_invalidations_total" not in body
+
+
+def test_metrics_export_component_stats():
+    body = render_metrics(
+        components={
+            "email_outbox": {"running": True, "sent": 12, "breaker_state": "closed"},
+            "view_counter": {
+                "pending_views": 40,
+                "flushes": 7,
+                "last_flush_ms": 3.2,
+                "note": None,
+            },
+        }
+    )
+
+    assert "# TYPE email_outbox_sent_total counter" in body
+    assert "email_outbox_sent_total 12" in body
+    assert "# TYPE email_outbox_running gauge" in body
+    assert "email_outbox_running 1" in body
+    assert 'email_outbox_breaker_state{state="closed"} 1' in body
+    assert "# TYPE view_counter_pending_views gauge" in body
+    assert "view_counter_flushes_total 7" in body
+    assert "view_counter_last_flush_ms 3.2" in body
+    assert "view_counter_note" not in body
+
+
+def test_component_counters_name_real_stats_fields():
+    from app.metrics import COMPONENT_COUNTERS
+    from app.routes.debug_routes import component_stats
+
+    stats = component_stats()
+    for component, counters in COMPONENT_COUNTERS.items():
+        assert counters <= set(stats[component]), component
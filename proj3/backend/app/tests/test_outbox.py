@@ -0,0 +1,252 @@
+"""
+Tests for the email outbox: backoff, circuit breaker, pooled SMTP session,
+and draining the Mongo-backed queue against a local stand-in SMTP server.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from app.outbox import (
+    CircuitBreaker,
+    OutboxWorker,
+    SMTPSession,
+    backoff_seconds,
+    enqueue_email,
+    STATUS_FAILED,
+    STATUS_PENDING,
+    STATUS_SENT,
+)
+
+TEST_DB_NAME = "test_meal_db"
+
+
+# ============================================================
+# FIXTURES
+# ============================================================
+
+
+class SMTPSink:
+    """Minimal SMTP server that accepts every message and records it"""
+
+    def __init__(self):
+        self.messages = []
+        self.connections = 0
+        self.server = None
+        self.port = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 sink ready\r\n")
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                writer.write(b"250-sink\r\n250 OK\r\n")
+            elif command == "DATA":
+                writer.write(b"354 end with <CRLF>.<CRLF>\r\n")
+                await writer.drain()
+                data = []
+                while True:
+                    chunk = await reader.readline()
+                    if chunk in (b".\r\n", b""):
+                        break
+                    data.append(chunk)
+                self.messages.append(b"".join(data).decode())
+                writer.write(b"250 queued\r\n")
+            elif command == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def settings(self):
+        return {
+            "server": "127.0.0.1",
+            "port": self.port,
+            "sender_email": "noreply@tastebuddiez.test",
+            "sender_password": None,
+            "use_ssl": False,
+            "use_tls": False,
+        }
+
+
+@pytest_asyncio.fixture
+async def smtp_sink():
+    sink = SMTPSink()
+    await sink.start()
+    yield sink
+    await sink.stop()
+
+
+@pytest_asyncio.fixture
+async def outbox_db(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    await db.email_outbox.delete_many({})
+    yield db
+    await db.email_outbox.delete_many({})
+
+
+def sample_message(to="buyer@example.com"):
+    return {
+        "to": to,
+        "subject": "Verify your Taste Buddiez account",
+        "text": "Please verify your email",
+        "html": "<p>Please verify your email</p>",
+    }
+
+
+# ============================================================
+# BACKOFF AND CIRCUIT BREAKER
+# ============================================================
+
+
+def test_backoff_grows_exponentially_and_caps():
+    assert backoff_seconds(2) == 2 * backoff_seconds(1)
+    assert backoff_seconds(3) == 4 * backoff_seconds(1)
+    assert backoff_seconds(100) == backoff_seconds(200)
+
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, cooldown=30, clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 31
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+    # A failed probe re-opens immediately
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    now[0] = 62
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+# ============================================================
+# SMTP SESSION
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_smtp_session_reuses_connection(smtp_sink):
+    session = SMTPSession(smtp_sink.settings())
+    loop = asyncio.get_running_loop()
+
+    for i in range(3):
+        await loop.run_in_executor(None, session.send, sample_message(f"u{i}@x.com"))
+    await loop.run_in_executor(None, session.close)
+
+    assert len(smtp_sink.messages) == 3
+    assert smtp_sink.connections == 1
+    assert session.connections_opened == 1
+
+
+# ============================================================
+# OUTBOX WORKER
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_enqueue_does_not_send_inline(outbox_db, smtp_sink):
+    await enqueue_email(outbox_db, **sample_message())
+
+    doc = await outbox_db.email_outbox.find_one({})
+    assert doc["status"] == STATUS_PENDING
+    assert smtp_sink.messages == []
+
+
+@pytest.mark.asyncio
+async def test_drain_delivers_batch_over_one_connection(outbox_db, smtp_sink):
+    for i in range(5):
+        await enqueue_email(outbox_db, **sample_message(f"user{i}@example.com"))
+
+    worker = OutboxWorker(
+        get_db=lambda: outbox_db,
+        session_factory=lambda: SMTPSession(smtp_sink.settings()),
+        batch_size=10,
+    )
+    processed = await worker.drain_once()
+    await worker.stop()
+
+    assert processed == 5
+    assert len(smtp_sink.messages) == 5
+    assert smtp_sink.connections == 1
+    assert await outbox_db.email_outbox.count_documents({"status": STATUS_SENT}) == 5
+
+
+@pytest.mark.asyncio
+async def test_drain_backs_off_and_opens_breaker_on_failure(outbox_db):
+    class FailingSession:
+        def send(self, message):
+            raise ConnectionRefusedError("smtp down")
+
+        def close(self):
+            pass
+
+    for i in range(3):
+        await enqueue_email(outbox_db, **sample_message(f"user{i}@example.com"))
+
+    worker = OutboxWorker(
+        get_db=lambda: outbox_db,
+        session_factory=FailingSession,
+        breaker=CircuitBreaker(threshold=2, cooldown=60),
+    )
+    processed = await worker.drain_once()
+    await worker.stop()
+
+    # Breaker opened after two failures, leaving the third message untouched
+    assert processed == 2
+    assert worker.breaker.state == "open"
+
+    retried = await outbox_db.email_outbox.find({"attempts": 1}).to_list(None)
+    assert len(retried) == 2
+    for doc in retried:
+        assert doc["status"] == STATUS_PENDING
+        assert doc["next_attempt_at"] > datetime.utcnow() + timedelta(seconds=1)
+
+
+@pytest.mark.asyncio
+async def test_drain_marks_failed_after_max_attempts(outbox_db):
+    class FailingSession:
+        def send(self, message):
+            raise ConnectionRefusedError("smtp down")
+
+        def close(self):
+            pass
+
+    await enqueue_email(outbox_db, **sample_message())
+    await outbox_db.email_outbox.update_many({}, {"$set": {"attempts": 5}})
+
+    worker = OutboxWorker(
+        get_db=lambda: outbox_db, session_factory=FailingSession, max_attempts=6
+    )
+    await worker.drain_once()
+    await worker.stop()
+
+    doc = await outbox_db.email_outbox.find_one({})
+    assert doc["status"] == STATUS_FAILED
+    assert worker.failed == 1
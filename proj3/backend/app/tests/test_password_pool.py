@@ -0,0 +1,77 @@
+"""
+Tests for the bounded bcrypt worker pool and async password helpers
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.password_pool import PasswordHashPool, PasswordPoolSaturated
+from app.utils import hash_password_async, verify_password_async
+
+
+@pytest.mark.asyncio
+async def test_async_hash_and_verify_round_trip():
+    hashed = await hash_password_async("SecurePass123!")
+
+    assert hashed != "SecurePass123!"
+    assert await verify_password_async("SecurePass123!", hashed)
+    assert not await verify_password_async("WrongPass123!", hashed)
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_queue_is_full():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    blocked = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(PasswordPoolSaturated):
+        await pool.run(lambda: True)
+
+    stats = pool.stats()
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 1
+    assert stats["queued"] == 1
+    assert stats["saturation"] == 1.0
+
+    release.set()
+    await asyncio.gather(*blocked)
+    pool.shutdown()
+
+    assert pool.stats()["completed"] == 2
+    assert pool.stats()["peak_pending"] == 2
+
+
+@pytest.mark.asyncio
+async def test_pool_does_not_block_event_loop():
+    pool = PasswordHashPool(workers=1, max_queue=4)
+    release = threading.Event()
+
+    blocked = asyncio.ensure_future(pool.run(release.wait))
+
+    # The loop keeps scheduling other coroutines while the worker is busy
+    ticks = 0
+    for _ in range(5):
+        await asyncio.sleep(0)
+        ticks += 1
+    assert ticks == 5
+    assert not blocked.done()
+
+    release.set()
+    await blocked
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_counters_stay_exact_under_concurrent_calls():
+    pool = PasswordHashPool(workers=8, max_queue=200)
+
+    await asyncio.gather(*(pool.run(lambda: None) for _ in range(200)))
+    pool.shutdown()
+
+    stats = pool.stats()
+    assert stats["submitted"] == stats["completed"] == 200
+    assert stats["in_flight"] == stats["queued"] == 0
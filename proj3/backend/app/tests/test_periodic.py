@@ -0,0 +1,74 @@
+"""
+Tests for the periodic background task helper.
+"""
+
+import asyncio
+
+import pytest
+
+from app.periodic import PeriodicTask
+
+
+class Steps:
+    """Step that records its calls and can be made to fail or block"""
+
+    def __init__(self, fail_first=False):
+        self.calls = 0
+        self.fail_first = fail_first
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self, db):
+        self.calls += 1
+        await self.release.wait()
+        if self.fail_first and self.calls == 1:
+            raise RuntimeError("boom")
+
+
+@pytest.mark.asyncio
+async def test_runs_at_start_and_early_on_wake(capsys):
+    step = Steps(fail_first=True)
+    task = PeriodicTask("Test step", step, interval=3600)
+
+    task.start(lambda: "db")
+    await asyncio.sleep(0.01)
+    assert step.calls == 1
+    assert "⚠️ Test step failed: boom" in capsys.readouterr().out
+
+    task.wake()
+    await asyncio.sleep(0.01)
+    assert step.calls == 2
+
+    await task.stop()
+    assert not task.running
+    assert step.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_steps_skip_without_a_database():
+    step = Steps()
+    task = PeriodicTask("Test step", step, interval=3600)
+
+    task.start(lambda: None)
+    await asyncio.sleep(0.01)
+    await task.stop()
+
+    assert step.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_run_on_stop_finishes_the_step_under_way_then_runs_once_more():
+    step = Steps()
+    task = PeriodicTask("Test step", step, interval=3600, run_at_start=False, run_on_stop=True)
+    task.start(lambda: "db")
+
+    step.release.clear()
+    task.wake()
+    await asyncio.sleep(0.01)
+    stopping = asyncio.ensure_future(task.stop())
+    await asyncio.sleep(0.01)
+    assert not stopping.done()  # not cancelled mid-step
+
+    step.release.set()
+    await stopping
+    assert step.calls == 2
@@ -0,0 +1,60 @@
+"""
+Tests for MongoDB pool configuration and CMAP pool metrics
+"""
+
+from pymongo import monitoring
+
+import app.database as database_module
+from app.pool_metrics import PoolMetricsListener
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_checkout_wait_and_in_use_tracking():
+    listener = PoolMetricsListener()
+    listener.pool_created(monitoring.PoolCreatedEvent(ADDRESS, {"maxPoolSize": 50}))
+    listener.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+    listener.connection_check_out_started(
+        monitoring.ConnectionCheckOutStartedEvent(ADDRESS)
+    )
+    listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1))
+
+    stats = listener.stats()["localhost:27017"]
+    assert stats["max_pool_size"] == 50
+    assert stats["open"] == 1
+    assert stats["in_use"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["checkout_wait_max_ms"] >= 0
+
+    listener.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    assert listener.stats()["localhost:27017"]["in_use"] == 0
+    assert listener.stats()["localhost:27017"]["max_in_use"] == 1
+
+
+def test_pool_cleared_is_counted():
+    listener = PoolMetricsListener()
+    listener.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1))
+    listener.pool_cleared(monitoring.PoolClearedEvent(ADDRESS))
+
+    stats = listener.stats()["localhost:27017"]
+    assert stats["pool_cleared"] == 1
+    assert stats["in_use"] == 0
+
+
+def test_client_options_from_environment(monkeypatch):
+    monkeypatch.setattr(database_module, "MONGO_MAX_POOL_SIZE", "200")
+    monkeypatch.setattr(database_module, "MONGO_MIN_POOL_SIZE", "10")
+    monkeypatch.setattr(database_module, "MONGO_WAIT_QUEUE_TIMEOUT_MS", "2000")
+    monkeypatch.setattr(database_module, "MONGO_COMPRESSORS", "bogus,zlib")
+    monkeypatch.setattr(database_module, "MONGO_ZLIB_LEVEL", "6")
+
+    options = database_module.client_options()
+
+    assert options["maxPoolSize"] == 200
+    assert options["minPoolSize"] == 10
+    assert options["waitQueueTimeoutMS"] == 2000
+    assert "maxIdleTimeMS" not in options
+    # Unknown or uninstalled compressors are dropped rather than failing startup
+    assert options["compressors"] == "zlib"
+    assert options["zlibCompressionLevel"] == 6
+    assert database_module.pool_metrics in options["event_listeners"]
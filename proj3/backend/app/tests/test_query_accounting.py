@@ -0,0 +1,146 @@
+"""
+Tests for per-request MongoDB command accounting and its response headers
+"""
+
+import asyncio
+import contextvars
+from datetime import timedelta
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from pymongo import monitoring
+
+from app.query_accounting import (
+    QueryAccountingListener,
+    QueryAccountingMiddleware,
+    current_query_stats,
+    track_queries,
+)
+
+ADDRESS = ("localhost", 27017)
+
+
+def run_command(listener, command, request_id, reply=None, duration_ms=2):
+    name = next(iter(command))
+    listener.started(
+        monitoring.CommandStartedEvent(command, "myapp", request_id, ADDRESS, request_id)
+    )
+    listener.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(milliseconds=duration_ms),
+            reply or {"ok": 1},
+            name,
+            request_id,
+            ADDRESS,
+            request_id,
+        )
+    )
+
+
+# ============================================================
+# TRACKING SCOPES
+# ============================================================
+
+
+def test_commands_outside_a_scope_are_ignored():
+    listener = QueryAccountingListener()
+    run_command(listener, {"find": "meals"}, 1)
+    assert current_query_stats() is None
+
+
+def test_scope_counts_commands_bytes_and_time():
+    listener = QueryAccountingListener()
+    with track_queries() as stats:
+        run_command(
+            listener, {"find": "meals"}, 1, {"cursor": {"firstBatch": [{}, {}]}, "ok": 1}
+        )
+        run_command(
+            listener,
+            {"getMore": 99, "collection": "meals"},
+            2,
+            {"cursor": {"nextBatch": [{}]}, "ok": 1},
+        )
+        run_command(listener, {"update": "meals"}, 3, {"n": 4, "ok": 1})
+
+    assert stats.count == 3
+    assert stats.commands == [("find", "meals"), ("getMore", "meals"), ("update", "meals")]
+    assert stats.documents == 7
+    assert stats.duration_ms == pytest.approx(6)
+
+
+def test_nested_scopes_count_towards_parent():
+    listener = QueryAccountingListener()
+    with track_queries() as outer:
+        run_command(listener, {"find": "users"}, 1)
+        with track_queries() as inner:
+            run_command(listener, {"find": "meals"}, 2)
+
+    assert inner.count == 1
+    assert outer.count == 2
+
+
+@pytest.mark.asyncio
+async def test_scope_follows_executor_threads():
+    """Motor runs commands on executor threads with the caller's context"""
+    listener = QueryAccountingListener()
+    loop = asyncio.get_running_loop()
+    with track_queries() as stats:
+        ctx = contextvars.copy_context()
+        await loop.run_in_executor(
+            None, ctx.run, run_command, listener, {"find": "meals"}, 1
+        )
+    assert stats.count == 1
+
+
+# ============================================================
+# MIDDLEWARE
+# ============================================================
+
+
+@pytest.mark.asyncio
+async def test_middleware_adds_headers_when_enabled():
+    listener = QueryAccountingListener()
+    app = FastAPI()
+    app.add_middleware(QueryAccountingMiddleware, enabled=True)
+
+    @app.get("/items")
+    async def items():
+        run_command(listener, {"find": "meals"}, 1)
+        run_command(listener, {"find": "users"}, 2)
+        return []
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://testserver"
+    ) as client:
+        response = await client.get("/items")
+
+    assert response.headers["x-db-queries"] == "2"
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert '"2 queries' in response.headers["server-timing"]
+
+
+@pytest.mark.asyncio
+async def test_middleware_disabled_by_default():
+    app = FastAPI()
+    app.add_middleware(QueryAccountingMiddleware)
+
+    @app.get("/items")
+    async def items():
+        return []
+
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://testserver"
+    ) as client:
+        response = await client.get("/items")
+
+    assert "x-db-queries" not in response.headers
+    assert "server-timing" not in response.headers
+
+
+def test_query_budget_reports_commands(query_budget):
+    listener = QueryAccountingListener()
+    with pytest.raises(AssertionError, match="2 MongoDB commands issued, budget is 1"):
+        with query_budget(1):
+            run_command(listener, {"find": "meals"}, 1)
+            run_command(listener, {"find": "users"}, 2)
@@ -0,0 +1,237 @@
+"""
+Tests for the in-process BM25 meal search index.
+"""
+
+import random
+from itertools import islice
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app import search_index
+from app.geo import geo_point
+from app.search_index import (
+    SCORE_FIELD,
+    MealSearchIndex,
+    search_terms,
+    text_search_pipeline,
+    within_distance,
+)
+
+MILES = 1609.344
+
+
+@pytest.fixture(params=["numpy", "python"])
+def engine(request, monkeypatch):
+    """Run each test vectorized (if NumPy is installed) and on the threshold walk"""
+    if request.param == "numpy":
+        if search_index.np is None:
+            pytest.skip("NumPy not installed")
+        monkeypatch.setattr(search_index, "NUMPY_MIN_POSTINGS", 0)
+    else:
+        monkeypatch.setattr(search_index, "np", None)
+    return request.param
+
+
+def make_meal(title, description="", ingredients="", cuisine_type="American", **fields):
+    meal = {
+        "_id": ObjectId(),
+        "seller_id": ObjectId(),
+        "status": "available",
+        "title": title,
+        "description": description,
+        "ingredients": ingredients,
+        "cuisine_type": cuisine_type,
+        "meal_type": "dinner",
+        "sale_price": 10.0,
+    }
+    meal.update(fields)
+    return meal
+
+
+def filled_index(meals):
+    index = MealSearchIndex()
+    for meal in meals:
+        index.upsert(meal)
+    return index
+
+
+def ids(index, text, **kwargs):
+    return [point.id for _, point in index.search(text, **kwargs)]
+
+
+# ============================================================
+# RANKING
+# ============================================================
+
+
+def test_search_terms_drop_stop_words_and_fold_plurals():
+    assert search_terms("The Tacos with Beans and beans") == ["taco", "bean"]
+    assert search_terms("  ") == []
+
+
+def test_title_matches_outrank_description_matches():
+    in_title = make_meal("Chicken Curry", "Slow cooked and fragrant")
+    in_description = make_meal("House Special", "Made with chicken thighs")
+    unrelated = make_meal("Veggie Lasagna", "Layers of zucchini")
+    index = filled_index([in_description, unrelated, in_title])
+
+    assert ids(index, "chicken") == [str(in_title["_id"]), str(in_description["_id"])]
+
+
+def test_rare_terms_weigh_more_than_common_ones(engine):
+    common = [make_meal(f"Rice Bowl {i}", ingredients="rice") for i in range(10)]
+    saffron = make_meal("Plain Dish", ingredients="saffron")
+    both = make_meal("Rice Plate", ingredients="rice")
+    index = filled_index(common + [saffron, both])
+
+    results = list(index.search("rice saffron"))
+    assert results[0][1].id == str(saffron["_id"])
+    assert len(results) == 12
+    scores = [score for score, _ in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_resumes_after_score_and_id(engine):
+    meals = [make_meal("Taco", ingredients="corn " * (i % 4)) for i in range(25)]
+    index = filled_index(meals)
+
+    everything = list(index.search("taco"))
+    score, point = everything[9]
+    rest = list(index.search("taco", after=(score, point.id)))
+    assert [p.id for _, p in rest] == [p.id for _, p in everything[10:]]
+
+
+def test_match_filters_candidates_lazily(engine):
+    cheap = make_meal("Pho", sale_price=8.0)
+    pricey = make_meal("Pho Special", sale_price=30.0)
+    index = filled_index([cheap, pricey])
+
+    found = ids(index, "pho", match=lambda point: point.price <= 10)
+    assert found == [str(cheap["_id"])]
+
+
+def test_writes_between_pages_do_not_break_a_paused_search(engine, monkeypatch):
+    # Cached impact order, which writes edit in place
+    monkeypatch.setattr(search_index, "IMPACT_MIN_POSTINGS", 0)
+    meals = [make_meal(f"Pasta {i}", "pasta " * (i % 7), "sauce") for i in range(40)]
+    index = filled_index(meals)
+    ranked = index.search("pasta sauce")
+
+    first = [point.id for _, point in islice(ranked, 5)]
+    removed = {str(meal["_id"]) for meal in meals[::3]}
+    for meal_id in removed:
+        index.remove(meal_id)
+    for i in range(10):
+        index.upsert(make_meal(f"Pasta extra {i}", "pasta pasta", "sauce"))
+    rest = [point.id for _, point in ranked]
+
+    assert len(set(first + rest)) == len(first + rest)
+    assert not removed & set(rest)
+    assert set(first + rest) >= {str(meal["_id"]) for meal in meals} - removed
+
+
+def test_strategies_agree_on_scores_and_order(monkeypatch):
+    if search_index.np is None:
+        pytest.skip("NumPy not installed")
+    rng = random.Random(5)
+    words = ["rice", "bean", "curry", "spicy", "lime", "corn", "tofu", "basil"]
+    index = filled_index(
+        [
+            make_meal(" ".join(rng.choices(words, k=2)), " ".join(rng.choices(words, k=6)))
+            for _ in range(400)
+        ]
+    )
+    query = "spicy rice curry"
+    monkeypatch.setattr(search_index, "NUMPY_MIN_POSTINGS", 0)
+    vectorized = [(score, point.id) for score, point in index.search(query)]
+    monkeypatch.setattr(search_index, "np", None)
+    walked = [(score, point.id) for score, point in index.search(query)]
+    assert vectorized == walked
+    assert len(walked) > 300
+
+
+def test_within_distance_needs_a_location():
+    near = make_meal("Soup", seller_location={"geo": geo_point(35.78, -78.64)})
+    far = make_meal("Soup", seller_location={"geo": geo_point(40.0, -74.0)})
+    nowhere = make_meal("Soup")
+    index = filled_index([near, far, nowhere])
+
+    match = within_distance(35.7796, -78.6382, 10 * MILES)
+    assert ids(index, "soup", match=match) == [str(near["_id"])]
+    assert len(ids(index, "soup")) == 3
+
+
+# ============================================================
+# WRITES AND REBUILD
+# ============================================================
+
+
+def test_updates_replace_terms_and_unavailable_meals_drop_out():
+    meal = make_meal("Beef Stew")
+    index = filled_index([meal])
+
+    meal["title"] = "Lentil Stew"
+    index.upsert(meal)
+    assert ids(index, "beef") == []
+    assert ids(index, "lentil") == [str(meal["_id"])]
+
+    meal["status"] = "sold"
+    index.upsert(meal)
+    assert len(index) == 0
+    assert index.stats()["terms"] == 0
+
+
+def test_remove_and_remove_seller():
+    seller = ObjectId()
+    meals = [make_meal("Dumplings", seller_id=seller), make_meal("Dumplings", seller_id=seller)]
+    other = make_meal("Dumplings")
+    index = filled_index(meals + [other])
+
+    index.remove(other["_id"])
+    assert len(index) == 2
+    index.remove_seller(seller)
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_loads_available_meals_and_replays_writes(mongo_client):
+    db = mongo_client["test_meal_db"]
+    await db.meals.insert_many(
+        [make_meal("Pad Thai"), make_meal("Green Curry"), make_meal("Thai Tea", status="sold")]
+    )
+    index = MealSearchIndex()
+    late = make_meal("Thai Basil Chicken")
+
+    class WriteDuringRebuild:
+        """meals collection that sees a meal created while it is being read"""
+
+        def find(self, *args, **kwargs):
+            index.upsert(late)
+            return db.meals.find(*args, **kwargs)
+
+    count = await index.rebuild(SimpleNamespace(meals=WriteDuringRebuild()))
+
+    assert index.ready
+    assert count == 3
+    assert len(ids(index, "thai")) == 2
+
+
+# ============================================================
+# $text FALLBACK PIPELINE
+# ============================================================
+
+
+def test_text_pipeline_resumes_with_keyset_and_radius():
+    after_id = ObjectId()
+    pipeline = text_search_pipeline(
+        {"status": "available"}, ["taco", "bean"], 35.0, -78.0, 5 * MILES, (1.5, after_id), 0, 20
+    )
+
+    match = pipeline[0]["$match"]
+    assert match["$text"] == {"$search": "taco bean"}
+    assert match["seller_location.geo"]["$geoWithin"]["$centerSphere"][0] == [-78.0, 35.0]
+    assert pipeline[1] == {"$addFields": {SCORE_FIELD: {"$meta": "textScore"}}}
+    assert pipeline[2]["$match"]["$or"][1] == {SCORE_FIELD: 1.5, "_id": {"$gt": after_id}}
+    assert pipeline[-2:] == [{"$sort": {SCORE_FIELD: -1, "_id": 1}}, {"$limit": 20}]
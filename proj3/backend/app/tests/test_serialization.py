@@ -0,0 +1,106 @@
+"""
+Tests for the fast list serialization path: byte-for-byte JSON equivalence
+with FastAPI's response_model handling and an unchanged OpenAPI schema.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import List
+
+import pytest
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import app.serialization as serialization
+from app.models import DisputeResponse, MealResponse, OrderHistoryResponse, ReviewResponse
+from app.routes.meal_routes import meal_to_response
+
+
+def sample_meals(count):
+    now = datetime(2025, 1, 2, 3, 4, 5, 678000)
+    seller = {"full_name": "Chef Ünal", "stats": {"average_rating": 4.5}}
+    meals = []
+    for i in range(count):
+        meal = {
+            "_id": ObjectId(),
+            "seller_id": ObjectId(),
+            "title": f"Meal {i} \"special\"",
+            "description": "Homemade with love — and garlic",
+            "cuisine_type": "Italian",
+            "meal_type": "dinner",
+            "ingredients": "pasta, tomato",
+            "photos": ["/static/uploads/a.jpg"],
+            "allergen_info": {"contains": ["gluten"], "may_contain": []},
+            "portion_size": "Serves 2",
+            "available_for_sale": True,
+            "sale_price": 12.5 + i,
+            "available_for_swap": False,
+            "status": "available",
+            "preparation_date": now,
+            "expires_date": now + timedelta(days=2),
+            "created_at": now,
+            "updated_at": now,
+            "seller_location": {"latitude": 35.77, "longitude": -78.63},
+        }
+        meals.append(meal_to_response(meal, seller, 35.9, -78.9))
+    return meals
+
+
+async def fastapi_default_body(items, model):
+    """What FastAPI produces for ``response_model=List[model]``"""
+    field = create_response_field(name="Response", type_=List[model])
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_fastapi_output():
+    meals = sample_meals(5)
+
+    fast = serialization.dump_model_list(meals, MealResponse)
+    default = await fastapi_default_body(meals, MealResponse)
+
+    assert json.loads(fast) == json.loads(default)
+
+
+@pytest.mark.asyncio
+async def test_fast_path_matches_for_empty_list():
+    assert json.loads(serialization.dump_model_list([], MealResponse)) == []
+
+
+def test_adapter_is_cached_per_model():
+    assert serialization.list_adapter(ReviewResponse) is serialization.list_adapter(
+        ReviewResponse
+    )
+
+
+def test_response_can_be_disabled(monkeypatch):
+    meals = sample_meals(2)
+    monkeypatch.setattr(serialization, "FAST_JSON_RESPONSES", False)
+    assert serialization.model_list_response(meals, MealResponse) is meals
+
+
+def test_openapi_schema_still_uses_response_models(test_client):
+    schema = test_client.get("/openapi.json").json()
+
+    def response_schema(path):
+        return schema["paths"][path]["get"]["responses"]["200"]["content"][
+            "application/json"
+        ]["schema"]
+
+    expected = {
+        "/api/meals/": "MealResponse",
+        "/api/meals/my/listings": "MealResponse",
+        "/api/meals/my/recommendations": "MealResponse",
+        "/reviews/my-reviews": "ReviewResponse",
+        "/api/transactions/my-orders": "OrderHistoryResponse",
+        "/api/disputes/my-disputes": "DisputeResponse",
+    }
+    for path, model in expected.items():
+        assert response_schema(path)["type"] == "array"
+        assert response_schema(path)["items"] == {"$ref": f"#/components/schemas/{model}"}
+
+    for model in (MealResponse, ReviewResponse, OrderHistoryResponse, DisputeResponse):
+        assert model.__name__ in schema["components"]["schemas"]
@@ -0,0 +1,208 @@
+"""
+Tests for the slow-query log: query shapes, explain parsing, the index
+advisor, and recording flagged commands into the capped collection.
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from pymongo import monitoring
+
+import app.database as database_module
+from app.slow_queries import (
+    SLOW_QUERY_COLLECTION,
+    SlowQueryLog,
+    query_shape,
+    shape_key,
+    slow_query_report,
+    suggest_indexes,
+    summarize_explain,
+)
+
+TEST_DB_NAME = "test_meal_db"
+ADDRESS = ("localhost", 27017)
+
+COLLSCAN_EXPLAIN = {
+    "queryPlanner": {
+        "winningPlan": {
+            "stage": "SORT",
+            "inputStage": {"stage": "COLLSCAN"},
+        }
+    },
+    "executionStats": {
+        "nReturned": 5,
+        "totalDocsExamined": 5000,
+        "totalKeysExamined": 0,
+        "executionTimeMillis": 140,
+    },
+}
+
+
+@pytest_asyncio.fixture
+async def slow_db(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    await db[SLOW_QUERY_COLLECTION].drop()
+    yield db
+    await db[SLOW_QUERY_COLLECTION].drop()
+
+
+def meals_find(status="available", cuisine="Thai"):
+    return {
+        "find": "meals",
+        "filter": {"status": status, "cuisine_type": cuisine},
+        "sort": {"created_at": -1},
+        "limit": 20,
+    }
+
+
+# ============================================================
+# SHAPES AND EXPLAIN PARSING
+# ============================================================
+
+
+def test_query_shape_strips_literals():
+    a = query_shape("meals", "find", meals_find("available", "Thai"))
+    b = query_shape("meals", "find", meals_find("sold", "Italian"))
+
+    assert a["filter"] == {"status": "?", "cuisine_type": "?"}
+    assert a["sort"] == [["created_at", -1]]
+    assert shape_key(a) == shape_key(b)
+
+
+def test_summarize_explain_flags_collscan_and_scan_ratio():
+    summary = summarize_explain(COLLSCAN_EXPLAIN)
+
+    assert summary["stages"] == ["SORT", "COLLSCAN"]
+    assert summary["scan_ratio"] == 1000
+    assert summary["flags"] == ["COLLSCAN", "HIGH_SCAN_RATIO", "IN_MEMORY_SORT"]
+
+
+def test_summarize_explain_reads_aggregate_cursor_stage():
+    explain = {"stages": [{"$cursor": COLLSCAN_EXPLAIN}, {"$group": {}}]}
+    assert "COLLSCAN" in summarize_explain(explain)["flags"]
+
+
+# ============================================================
+# INDEX ADVISOR
+# ============================================================
+
+
+def test_suggestion_orders_equality_sort_range():
+    shape = query_shape(
+        "meals",
+        "find",
+        {
+            "find": "meals",
+            "filter": {"price": {"$lte": 10}, "status": "available"},
+            "sort": {"created_at": -1},
+        },
+    )
+    assert suggest_indexes(shape) == [[["status", 1], ["created_at", -1], ["price", 1]]]
+
+
+def test_suggestion_per_or_branch():
+    shape = query_shape(
+        "events",
+        "find",
+        {"find": "events", "filter": {"$or": [{"organizer_id": "x"}, {"attendees": "x"}]}},
+    )
+    assert suggest_indexes(shape) == [[["organizer_id", 1]], [["attendees", 1]]]
+
+
+# ============================================================
+# LISTENER AND RECORDER
+# ============================================================
+
+
+def test_listener_ignores_fast_and_unexplainable_commands():
+    log = SlowQueryLog(threshold_ms=50)
+    log.started(monitoring.CommandStartedEvent({"insert": "meals"}, "myapp", 1, ADDRESS, 1))
+    log.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(milliseconds=500), {"ok": 1}, "insert", 1, ADDRESS, 1
+        )
+    )
+    log.started(monitoring.CommandStartedEvent(meals_find(), "myapp", 2, ADDRESS, 2))
+    log.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(milliseconds=5), {"ok": 1}, "find", 2, ADDRESS, 2
+        )
+    )
+    assert log.flagged == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_command_is_explained_and_reported(slow_db):
+    log = SlowQueryLog(threshold_ms=50, sample_rate=1.0)
+
+    async def fake_explain(db, command):
+        return COLLSCAN_EXPLAIN
+
+    log._explain = fake_explain
+    log.start(lambda: slow_db)
+    try:
+        for request_id in (1, 2):
+            log.started(
+                monitoring.CommandStartedEvent(
+                    meals_find(), TEST_DB_NAME, request_id, ADDRESS, request_id
+                )
+            )
+            log.succeeded(
+                monitoring.CommandSucceededEvent(
+                    timedelta(milliseconds=120), {"ok": 1}, "find", request_id, ADDRESS, 1
+                )
+            )
+        for _ in range(50):
+            if log.recorded == 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await log.stop()
+
+    assert log.flagged == 2
+    # Same shape within the cooldown is only explained once
+    assert log.explained == 1
+
+    report = await slow_query_report(slow_db)
+    assert len(report) == 1
+    entry = report[0]
+    assert entry["count"] == 2
+    assert entry["flags"] == ["COLLSCAN", "HIGH_SCAN_RATIO", "IN_MEMORY_SORT"]
+    suggestion = entry["suggested_indexes"][0]
+    assert suggestion["key"] == [["status", 1], ["cuisine_type", 1], ["created_at", -1]]
+    # meals declares (status, cuisine_type, created_at) in the index registry
+    assert suggestion["declared"] is True
+
+
+def test_client_options_register_slow_query_log():
+    options = database_module.client_options()
+    assert database_module.slow_query_log in options["event_listeners"]
+
+
+@pytest.mark.asyncio
+async def test_slow_query_report_is_admin_only(slow_db):
+    from httpx import ASGITransport, AsyncClient
+    from unittest.mock import patch
+
+    from app.dependencies import get_current_user
+    from app.main import app
+
+    user = {"email": "user@example.com", "role": "user"}
+    transport = ASGITransport(app=app)
+    with patch("app.routes.debug_routes.get_database", return_value=slow_db):
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            anonymous = await client.get("/api/debug/slow-queries")
+            app.dependency_overrides[get_current_user] = lambda: user
+            try:
+                forbidden = await client.get("/api/debug/slow-queries")
+                user["role"] = "admin"
+                allowed = await client.get("/api/debug/slow-queries")
+            finally:
+                app.dependency_overrides.clear()
+
+    assert anonymous.status_code in (401, 403)
+    assert forbidden.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()["queries"] == []
@@ -0,0 +1,204 @@
+"""
+Tests for the in-process meal suggest (prefix) index.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app import suggest_index
+from app.suggest_index import SALE_WEIGHT, MealSuggestIndex, suggest_key
+
+
+def make_meal(title, cuisine_type="American", ingredients="", views=0, **fields):
+    meal = {
+        "_id": ObjectId(),
+        "seller_id": ObjectId(),
+        "status": "available",
+        "title": title,
+        "cuisine_type": cuisine_type,
+        "ingredients": ingredients,
+        "views": views,
+        "expires_date": datetime.utcnow() + timedelta(days=2),
+    }
+    meal.update(fields)
+    return meal
+
+
+def filled_index(meals):
+    index = MealSuggestIndex()
+    for meal in meals:
+        index.upsert(meal)
+    return index
+
+
+def texts(index, prefix, limit=10):
+    return [s.text for s in index.suggest(prefix, limit)]
+
+
+# ============================================================
+# LOOKUPS
+# ============================================================
+
+
+def test_suggest_key_keeps_lowercase_words():
+    assert suggest_key("  Pad-Thai (Spicy!) ") == "pad thai spicy"
+    assert suggest_key("!!") == ""
+
+
+def test_matches_the_start_of_any_word():
+    index = filled_index(
+        [make_meal("Spicy Chicken Curry", "Indian", "chicken thighs, coconut milk")]
+    )
+
+    assert texts(index, "cur") == ["Spicy Chicken Curry"]
+    assert texts(index, "Chick") == ["Spicy Chicken Curry", "chicken thighs"]
+    assert texts(index, "coconut m") == ["coconut milk"]
+    assert texts(index, "ind") == ["Indian"]
+    assert texts(index, "urry") == []
+    assert texts(index, "") == []
+
+
+def test_trailing_space_ends_the_word():
+    index = filled_index([make_meal("Corn Salsa"), make_meal("Cornbread")])
+
+    assert sorted(texts(index, "corn")) == ["Corn Salsa", "Cornbread"]
+    assert texts(index, "corn ") == ["Corn Salsa"]
+
+
+def test_popular_suggestions_come_first_and_limit_applies():
+    index = filled_index(
+        [
+            make_meal("Pad Thai", views=3),
+            make_meal("Pad See Ew", views=40),
+            make_meal("Pad Thai", views=5),
+            make_meal("Paella", views=1),
+        ]
+    )
+
+    found = index.suggest("pa", 2)
+    assert [(s.text, s.meals) for s in found] == [("Pad See Ew", 1), ("Pad Thai", 2)]
+    assert texts(index, "pa") == ["Pad See Ew", "Pad Thai", "Paella"]
+
+
+def test_views_and_sales_reorder_suggestions():
+    pho, pozole = make_meal("Pho"), make_meal("Pozole")
+    index = filled_index([pho, pozole])
+
+    index.viewed(pozole["_id"])
+    assert texts(index, "p") == ["Pozole", "Pho"]
+    index.sold(pho["_id"])
+    assert texts(index, "p") == ["Pho", "Pozole"]
+    assert index.suggest("pho")[0].weight == 1 + SALE_WEIGHT
+
+
+@pytest.mark.asyncio
+async def test_built_and_pending_keys_merge(mongo_client, monkeypatch):
+    """Suggestions added after a build are merged with the built ones"""
+    monkeypatch.setattr(suggest_index, "PENDING_MAX_KEYS", 50)
+    rng = random.Random(7)
+    words = ["tomato", "toast", "tofu", "taco", "tamale", "tikka", "tortilla", "tea"]
+    meals = [
+        make_meal(f"{rng.choice(words)} {rng.choice(words)} {i % 150}", views=rng.randrange(100))
+        for i in range(300)
+    ]
+    db = mongo_client["test_meal_db"]
+    await db.meals.insert_many(meals[:200])
+    index = MealSuggestIndex()
+    await index.rebuild(db)
+    wakes = []
+    monkeypatch.setattr(index._refresher, "wake", lambda: wakes.append(1))
+    for meal in meals[200:]:
+        index.upsert(meal)
+    assert index.stats()["pending_keys"] > 50
+    assert wakes
+
+    weights = {}
+    for meal in meals:
+        key = suggest_key(meal["title"])
+        weights[key] = weights.get(key, 0) + 1 + meal["views"]
+    for prefix in ("t", "to", "tofu", "tea t", "1"):
+        expected = sorted(
+            (w for key, w in weights.items() if any(k.startswith(prefix) for k in _starts(key))),
+            reverse=True,
+        )
+        assert [s.weight for s in index.suggest(prefix, 25)] == expected[:25]
+
+
+def _starts(title):
+    words = suggest_key(title).split()
+    return [" ".join(words[i:]) for i in range(len(words))]
+
+
+# ============================================================
+# WRITES, EXPIRY AND REBUILD
+# ============================================================
+
+
+def test_updates_and_removals_drop_old_suggestions():
+    meal = make_meal("Beef Stew", ingredients="beef, carrots")
+    index = filled_index([meal])
+
+    meal["title"] = "Lentil Stew"
+    meal["ingredients"] = "lentils"
+    index.upsert(meal)
+    assert texts(index, "beef") == []
+    assert texts(index, "stew") == ["Lentil Stew"]
+
+    meal["status"] = "sold"
+    index.upsert(meal)
+    assert texts(index, "stew") == []
+    assert len(index) == 0
+
+    seller = ObjectId()
+    index = filled_index([make_meal("Dal", seller_id=seller), make_meal("Dal Makhani")])
+    index.remove_seller(seller)
+    assert [(s.text, s.meals) for s in index.suggest("dal")] == [("Dal Makhani", 1)]
+
+
+def test_expired_meals_drop_out():
+    soon = datetime.now(timezone.utc) + timedelta(milliseconds=50)
+    index = filled_index(
+        [
+            make_meal("Gumbo", expires_date=datetime.utcnow() - timedelta(hours=1)),
+            make_meal("Goulash", expires_date=soon),
+            make_meal("Gnocchi"),
+        ]
+    )
+    assert sorted(texts(index, "g")) == ["Gnocchi", "Goulash"]
+
+    index._data.expire(datetime.utcnow() + timedelta(seconds=1))
+    assert texts(index, "g") == ["Gnocchi"]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_counts_sales_and_replays_writes(mongo_client):
+    db = mongo_client["test_meal_db"]
+    kimchi, kheer = make_meal("Kimchi Stew"), make_meal("Kheer", views=5)
+    await db.meals.insert_many([kimchi, kheer, make_meal("Kofta", status="sold")])
+    await db.transactions.insert_one({"meal_id": str(kimchi["_id"])})
+    index = MealSuggestIndex()
+    late = make_meal("Katsu")
+
+    class WriteDuringRebuild:
+        """meals collection that sees a meal created while it is being read"""
+
+        def find(self, *args, **kwargs):
+            index.upsert(late)
+            index.viewed(late["_id"])
+            return db.meals.find(*args, **kwargs)
+
+    count = await index.rebuild(
+        SimpleNamespace(meals=WriteDuringRebuild(), transactions=db.transactions)
+    )
+
+    assert index.ready
+    assert count == 3
+    assert [(s.text, s.weight) for s in index.suggest("k")] == [
+        ("Kimchi Stew", 1 + SALE_WEIGHT),
+        ("Kheer", 6),
+        ("Katsu", 2),
+    ]
@@ -0,0 +1,94 @@
+"""
+Tests for signed access/refresh tokens issued at login
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from datetime import timedelta
+from bson import ObjectId
+
+from app.tokens import (
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+    issue_tokens,
+    looks_like_jwt,
+    TokenError,
+    REFRESH_TOKEN_TYPE,
+    _encode,
+)
+
+
+@pytest.fixture
+def user():
+    return {
+        "_id": ObjectId(),
+        "email": "tokenuser@example.com",
+        "role": "user",
+        "verified": True,
+    }
+
+
+def test_access_token_round_trip(user):
+    claims = decode_token(create_access_token(user))
+
+    assert claims["sub"] == str(user["_id"])
+    assert claims["role"] == "user"
+    assert claims["verified"] is True
+    assert claims["type"] == "access"
+
+
+def test_refresh_token_rejected_as_access_token(user):
+    with pytest.raises(TokenError):
+        decode_token(create_refresh_token(user))
+
+    claims = decode_token(create_refresh_token(user), expected_type=REFRESH_TOKEN_TYPE)
+    assert claims["sub"] == str(user["_id"])
+
+
+def test_expired_token_rejected(user):
+    token = _encode(user, "access", timedelta(seconds=-1))
+
+    with pytest.raises(TokenError) as exc:
+        decode_token(token)
+    assert exc.value.expired is True
+
+
+def test_tampered_token_rejected(user):
+    token = create_access_token(user)
+    header, payload, signature = token.split(".")
+    tampered = ".".join([header, payload, signature[::-1]])
+
+    with pytest.raises(TokenError):
+        decode_token(tampered)
+
+
+def test_issue_tokens_shape(user):
+    tokens = issue_tokens(user)
+
+    assert tokens["token_type"] == "bearer"
+    assert tokens["expires_in"] > 0
+    assert looks_like_jwt(tokens["access_token"])
+    assert looks_like_jwt(tokens["refresh_token"])
+
+
+def test_email_is_not_mistaken_for_jwt():
+    assert not looks_like_jwt("first.last@example.co.uk")
+
+
+def test_missing_secret_key_fails_in_production():
+    env = {k: v for k, v in os.environ.items() if k != "SECRET_KEY"}
+    env["ENVIRONMENT"] = "production"
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.tokens"],
+        cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode != 0
+    assert "SECRET_KEY must be set" in result.stderr
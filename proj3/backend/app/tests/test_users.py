@@ -1918,6 +1918,33 @@ async def test_update_social_media_authenticated(
     assert data["social_media"]["facebook"] == "auth_facebook"
 
 
+@pytest.mark.asyncio
+async def test_delete_account_recounts_reviewed_sellers(
+    authenticated_client, mongo_client, test_user, another_user
+):
+    """Deleting an account updates the stats of sellers it reviewed"""
+    db = mongo_client[TEST_DB_NAME]
+    await db.users.update_one(
+        {"_id": another_user["_id"]},
+        {"$set": {"stats.average_rating": 3.0, "stats.total_reviews": 2}},
+    )
+    await db.reviews.insert_many(
+        [
+            {"reviewer_id": test_user["_id"], "seller_id": another_user["_id"], "rating": 1},
+            {"reviewer_id": ObjectId(), "seller_id": another_user["_id"], "rating": 5},
+        ]
+    )
+    before = (await db.users.find_one({"_id": another_user["_id"]})).get("updated_at")
+
+    response = await authenticated_client.delete("/api/users/me")
+
+    assert response.status_code == 200
+    seller = await db.users.find_one({"_id": another_user["_id"]})
+    assert seller["stats"]["average_rating"] == 5.0
+    assert seller["stats"]["total_reviews"] == 1
+    assert seller["updated_at"] != before
+
+
 @pytest.mark.asyncio
 async def test_delete_account_authenticated(
     authenticated_client, mongo_client, test_user
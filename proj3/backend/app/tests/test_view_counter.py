@@ -0,0 +1,84 @@
+"""
+Tests for the buffered meal view counter.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+from app.view_counter import ViewCounter
+
+TEST_DB_NAME = "test_meal_db"
+
+
+@pytest_asyncio.fixture
+async def meals(mongo_client):
+    db = mongo_client[TEST_DB_NAME]
+    docs = [{"_id": ObjectId(), "title": f"Meal {i}", "views": 10 * i} for i in range(3)]
+    await db.meals.insert_many(docs)
+    yield db, docs
+
+
+@pytest.mark.asyncio
+async def test_views_are_buffered_until_flushed(meals):
+    db, docs = meals
+    counter = ViewCounter()
+    for _ in range(3):
+        counter.record(docs[0]["_id"])
+    counter.record(str(docs[1]["_id"]))
+
+    assert counter.pending(str(docs[0]["_id"])) == 3
+    assert (await db.meals.find_one({"_id": docs[0]["_id"]}))["views"] == 0
+
+    assert await counter.flush(db) == 4
+    assert counter.pending(docs[0]["_id"]) == 0
+    stored = {m["_id"]: m["views"] async for m in db.meals.find()}
+    assert stored == {docs[0]["_id"]: 3, docs[1]["_id"]: 11, docs[2]["_id"]: 20}
+    assert await counter.flush(db) == 0
+    assert counter.stats()["flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_views_for_the_next_one(meals):
+    db, docs = meals
+    counter = ViewCounter()
+    counter.record(docs[2]["_id"])
+
+    class Unreachable:
+        class meals:
+            @staticmethod
+            def with_options(**kwargs):
+                return Unreachable.meals
+
+            @staticmethod
+            async def bulk_write(*args, **kwargs):
+                raise AutoReconnect("primary stepped down")
+
+    with pytest.raises(AutoReconnect):
+        await counter.flush(Unreachable())
+    assert counter.pending(docs[2]["_id"]) == 1
+    assert counter.stats()["flush_errors"] == 1
+
+    await counter.flush(db)
+    assert (await db.meals.find_one({"_id": docs[2]["_id"]}))["views"] == 21
+
+
+@pytest.mark.asyncio
+async def test_stop_flushes_what_is_left(meals):
+    db, docs = meals
+    counter = ViewCounter(flush_seconds=3600, max_meals=2)
+    counter.start(lambda: db)
+
+    counter.record(docs[0]["_id"])
+    counter.record(docs[1]["_id"])  # two meals pending wakes the flush loop
+    await asyncio.sleep(0.05)
+    assert counter.stats()["flushes"] == 1
+
+    counter.record(docs[0]["_id"])
+    await counter.stop()
+
+    assert counter.stats()["running"] is False
+    assert (await db.meals.find_one({"_id": docs[0]["_id"]}))["views"] == 2
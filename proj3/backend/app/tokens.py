@@ -0,0 +1,98 @@
+import os
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from dotenv import load_dotenv
+from jose import jwt, JWTError, ExpiredSignatureError
+
+load_dotenv()
+
+ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+SECRET_KEY = os.getenv("SECRET_KEY")
+if not SECRET_KEY:
+    # Tokens signed with a per-process key stop validating after a restart and
+    # are not shared between workers, so this is only suitable for development.
+    if ENVIRONMENT == "production":
+        raise RuntimeError("SECRET_KEY must be set when ENVIRONMENT=production")
+    SECRET_KEY = secrets.token_urlsafe(32)
+    print("⚠️ SECRET_KEY not set; using a random per-process signing key")
+
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, expired, or of the wrong type"""
+
+    def __init__(self, detail: str, expired: bool = False):
+        super().__init__(detail)
+        self.detail = detail
+        self.expired = expired
+
+
+def looks_like_jwt(token: str) -> bool:
+    """Cheap structural check used to tell signed tokens from legacy email bearers"""
+    return token.count(".") == 2 and "@" not in token
+
+
+def _encode(user: dict, token_type: str, expires_delta: timedelta) -> str:
+    now = datetime.utcnow()
+    claims = {
+        "sub": str(user["_id"]),
+        "email": user.get("email"),
+        "role": str(getattr(user.get("role"), "value", user.get("role"))),
+        "verified": bool(user.get("verified")),
+        "type": token_type,
+        "iat": now,
+        "exp": now + expires_delta,
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_access_token(user: dict) -> str:
+    """Issue a short-lived access token for ``user``"""
+    return _encode(
+        user, ACCESS_TOKEN_TYPE, timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+def create_refresh_token(user: dict) -> str:
+    """Issue a long-lived refresh token for ``user``"""
+    return _encode(user, REFRESH_TOKEN_TYPE, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+
+
+def issue_tokens(user: dict) -> dict:
+    """Return the token fields included in login and refresh responses"""
+    return {
+        "access_token": create_access_token(user),
+        "refresh_token": create_refresh_token(user),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, expected_type: Optional[str] = ACCESS_TOKEN_TYPE) -> dict:
+    """Validate signature, expiry and required claims; return the claims.
+
+    Raises TokenError if the token cannot be trusted.
+    """
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except ExpiredSignatureError:
+        raise TokenError("Token has expired", expired=True)
+    except JWTError:
+        raise TokenError("Invalid authentication credentials")
+
+    for claim in ("sub", "role", "verified", "type"):
+        if claim not in claims:
+            raise TokenError("Invalid authentication credentials")
+
+    if expected_type is not None and claims["type"] != expected_type:
+        raise TokenError("Invalid token type")
+
+    return claims
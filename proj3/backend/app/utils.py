@@ -7,6 +7,8 @@ import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
+from .password_pool import password_pool
+
 # fix password encryption after testing
 DEV_PLAINTEXT = os.getenv("DEV_PLAINTEXT_PASSWORDS", "0") == "1"
 
@@ -30,9 +32,6 @@ def hash_password(password):
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     plain = _unwrap_secret(plain_password)
 
-    print("verify_password types:", type(plain), type(hashed_password))
-    print("hashed_password repr:", repr(hashed_password))
-
     if (
         DEV_PLAINTEXT
         and isinstance(hashed_password, str)
@@ -48,6 +47,25 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         raise
 
 
+async def hash_password_async(password):
+    """Hash a password on the bounded worker pool instead of the event loop.
+
+    Raises PasswordPoolSaturated if too many hashes are already queued.
+    """
+    password = _unwrap_secret(password)
+    if DEV_PLAINTEXT:
+        return hash_password(password)
+    return await password_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the bounded worker pool instead of the event loop.
+
+    Raises PasswordPoolSaturated if too many verifications are already queued.
+    """
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
 def generate_verification_token() -> str:
     """Generate a secure random token"""
     return secrets.token_urlsafe(32)
@@ -58,26 +76,25 @@ def create_verification_token_hash(email: str, token: str) -> str:
     return hashlib.sha256(f"{email}{token}".encode()).hexdigest()
 
 
-def send_verification_email(email: str, token: str, user_type: str = "user"):
-    """Send (or simulate sending) verification email"""
+def smtp_settings() -> dict:
+    """Read SMTP configuration from the environment"""
+    return {
+        "server": os.getenv("SMTP_SERVER"),
+        "port": int(os.getenv("SMTP_PORT", "587")),
+        "sender_email": os.getenv("SENDER_EMAIL"),
+        "sender_password": os.getenv("SENDER_PASSWORD"),
+        "use_ssl": os.getenv("SMTP_USE_SSL", "0") == "1",
+        "use_tls": os.getenv("SMTP_USE_TLS", "1") == "1",
+    }
+
+
+def build_verification_email(email: str, token: str, user_type: str = "user") -> dict:
+    """Build the subject and bodies of a verification email"""
     BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
     verification_link = (
         f"{BASE_URL}/api/auth/verify?email={email}&token={token}&type={user_type}"
     )
 
-    # If SMTP configuration is not provided, fall back to printing the link.
-    SMTP_SERVER = os.getenv("SMTP_SERVER")
-    if not SMTP_SERVER:
-        print(f"✅ Verification link for {email}: {verification_link}")
-        return True
-
-    SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
-    SENDER_EMAIL = os.getenv("SENDER_EMAIL")
-    SENDER_PASSWORD = os.getenv("SENDER_PASSWORD")
-    USE_SSL = os.getenv("SMTP_USE_SSL", "0") == "1"
-    USE_TLS = os.getenv("SMTP_USE_TLS", "1") == "1"
-
-    # Build email
     subject = "Verify your Taste Buddiez account"
     text = (
         f"Please verify your email by visiting the link:"
@@ -95,29 +112,64 @@ def send_verification_email(email: str, token: str, user_type: str = "user"):
       </body>
     </html>
     """
+    return {
+        "to": email,
+        "subject": subject,
+        "text": text,
+        "html": html,
+        "link": verification_link,
+    }
 
+
+def build_mime_message(to: str, subject: str, text: str, html: str, sender=None):
+    """Build a multipart/alternative message with plain-text and HTML parts"""
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
-    msg["From"] = SENDER_EMAIL or "noreply@localhost"
-    msg["To"] = email
+    msg["From"] = sender or "noreply@localhost"
+    msg["To"] = to
 
     part1 = MIMEText(text, "plain")
     part2 = MIMEText(html, "html")
     msg.attach(part1)
     msg.attach(part2)
+    return msg
+
+
+def send_verification_email(email: str, token: str, user_type: str = "user"):
+    """Send (or simulate sending) verification email synchronously.
+
+    Request handlers should enqueue through app.outbox instead; this opens a
+    new SMTP connection per call.
+    """
+    message = build_verification_email(email, token, user_type)
+    verification_link = message["link"]
+
+    # If SMTP configuration is not provided, fall back to printing the link.
+    settings = smtp_settings()
+    if not settings["server"]:
+        print(f"✅ Verification link for {email}: {verification_link}")
+        return True
+
+    msg = build_mime_message(
+        email,
+        message["subject"],
+        message["text"],
+        message["html"],
+        settings["sender_email"],
+    )
 
     try:
-        if USE_SSL:
-            server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=10)
+        if settings["use_ssl"]:
+            server = smtplib.SMTP_SSL(settings["server"], settings["port"], timeout=10)
         else:
-            server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=10)
+            server = smtplib.SMTP(settings["server"], settings["port"], timeout=10)
         server.ehlo()
-        if not USE_SSL and USE_TLS:
+        if not settings["use_ssl"] and settings["use_tls"]:
             server.starttls()
             server.ehlo()
 
-        if SENDER_EMAIL and SENDER_PASSWORD:
-            server.login(SENDER_EMAIL, SENDER_PASSWORD)
+        if settings["sender_email"] and settings["sender_password"]:
+            server.login(settings["sender_email"], settings["sender_password"])
 
         server.send_message(msg)
         server.quit()
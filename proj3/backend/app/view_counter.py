@@ -0,0 +1,133 @@
+"""
+Buffered meal view counter.
+
+``get_meal_by_id`` used to ``$inc`` the meal's ``views`` on every read,
+turning the most-read endpoint into a write per request and serializing
+popular meals on one hot document. Views are now counted in memory per
+meal and written every ``VIEW_FLUSH_SECONDS`` as one unordered
+``bulk_write`` of ``$inc`` updates, at the write concern in
+``VIEW_FLUSH_WRITE_CONCERN`` (``1`` by default: acknowledged by the primary,
+without waiting for a majority). A flush also runs early once
+``VIEW_BUFFER_MAX_MEALS`` meals have unflushed views, and once more on
+shutdown.
+
+Responses add the views still in the buffer (``pending``) to the stored
+count, so a reader sees their own view right away. Views buffered by
+other workers show up once those workers flush.
+"""
+
+import os
+import time
+from typing import Callable
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.write_concern import WriteConcern
+
+from .loaders import document_id
+from .periodic import PeriodicTask
+
+VIEW_FLUSH_SECONDS = float(os.getenv("VIEW_FLUSH_SECONDS", "5"))
+VIEW_BUFFER_MAX_MEALS = int(os.getenv("VIEW_BUFFER_MAX_MEALS", "10000"))
+VIEW_FLUSH_WRITE_CONCERN = int(os.getenv("VIEW_FLUSH_WRITE_CONCERN", "1"))
+
+
+class ViewCounter:
+    """Per-meal view increments buffered in memory and flushed in batches"""
+
+    def __init__(
+        self,
+        flush_seconds: float = VIEW_FLUSH_SECONDS,
+        max_meals: int = VIEW_BUFFER_MAX_MEALS,
+        write_concern: int = VIEW_FLUSH_WRITE_CONCERN,
+    ):
+        self.flush_seconds = flush_seconds
+        self.max_meals = max_meals
+        self.write_concern = WriteConcern(w=write_concern)
+        self._pending = {}  # meal _id -> views not yet written
+        self._flushing = {}  # views in the bulk_write under way
+        # Not cancelled on stop: a bulk_write cut off mid-flight could be
+        # applied and then retried, counting its views twice
+        self._flusher = PeriodicTask(
+            "Meal view flush", self.flush, flush_seconds, run_at_start=False, run_on_stop=True
+        )
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+        self.last_flush_ms = 0.0
+
+    def record(self, meal_id) -> None:
+        """Count one view of a meal (no I/O)"""
+        key = document_id(meal_id)
+        self._pending[key] = self._pending.get(key, 0) + 1
+        self.recorded += 1
+        if len(self._pending) >= self.max_meals:
+            self._flusher.wake()
+
+    def pending(self, meal_id) -> int:
+        """Views of a meal not yet reflected in its stored ``views``"""
+        key = document_id(meal_id)
+        return self._pending.get(key, 0) + self._flushing.get(key, 0)
+
+    async def flush(self, db) -> int:
+        """Write buffered views; returns how many were written.
+
+        Views whose write failed go back into the buffer for the next flush.
+        Returns 0 without writing while another flush is under way.
+        """
+        if not self._pending or self._flushing:
+            return 0
+        batch, self._pending = self._pending, {}
+        self._flushing = batch
+        failed = list(batch)
+        start = time.perf_counter()
+        try:
+            await db.meals.with_options(write_concern=self.write_concern).bulk_write(
+                [UpdateOne({"_id": key}, {"$inc": {"views": n}}) for key, n in batch.items()],
+                ordered=False,
+            )
+            failed = []
+        except BulkWriteError as e:
+            keys = list(batch)
+            failed = [keys[error["index"]] for error in e.details.get("writeErrors", [])]
+            self.flush_errors += 1
+        except Exception:
+            self.flush_errors += 1
+            raise
+        finally:
+            for key in failed:
+                self._pending[key] = self._pending.get(key, 0) + batch[key]
+            self._flushing = {}
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+        written = sum(batch.values()) - sum(batch[key] for key in failed)
+        self.flushed += written
+        self.flushes += 1
+        return written
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._flusher.running,
+            "flush_seconds": self.flush_seconds,
+            "pending_meals": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "flush_errors": self.flush_errors,
+            "last_flush_ms": round(self.last_flush_ms, 1),
+        }
+
+    def start(self, get_database: Callable) -> None:
+        """Flush every ``flush_seconds`` on the running loop"""
+        self._flusher.start(get_database)
+
+    async def stop(self) -> None:
+        """Stop the flush loop after writing everything still buffered"""
+        await self._flusher.stop()
+
+
+meal_views = ViewCounter()
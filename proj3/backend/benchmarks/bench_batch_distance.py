@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: distance + radius filter + sort for a set of meals.
+
+Compares the scalar ``calculate_distance`` loop followed by a Python sort
+with ``geo.nearest_within``, which computes the distances, the radius
+mask and the nearest-first order in one pass (vectorized when NumPy is
+installed).
+
+Usage (from proj3/backend):
+    python benchmarks/bench_batch_distance.py [--sizes 20,100,1000,10000,100000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import geo  # noqa: E402
+from app.geo import METERS_PER_MILE, nearest_within  # noqa: E402
+from app.routes.meal_routes import calculate_distance  # noqa: E402
+
+USER = (35.7796, -78.6382)
+RADIUS_MILES = 25
+
+
+def scalar(lats, lons):
+    lat, lon = USER
+    nearby = []
+    for i, (seller_lat, seller_lon) in enumerate(zip(lats, lons)):
+        distance = calculate_distance(lat, lon, seller_lat, seller_lon)
+        if distance <= RADIUS_MILES:
+            nearby.append((distance, i))
+    nearby.sort(key=lambda item: item[0])
+    return [i for _, i in nearby]
+
+
+def batch(lats, lons):
+    order, _ = nearest_within(*USER, lats, lons, max_distance=RADIUS_MILES * METERS_PER_MILE)
+    return order
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="20,100,1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"NumPy: {'yes' if geo.np is not None else 'no (pure Python fallback)'}")
+    print(f"{'meals':>8} {'scalar us':>10} {'batch us':>10} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        lats = [USER[0] + rng.uniform(-1, 1) for _ in range(size)]
+        lons = [USER[1] + rng.uniform(-1, 1) for _ in range(size)]
+        # Same meals either way (the scalar loop rounds to 0.1 mile)
+        assert abs(len(scalar(lats, lons)) - len(batch(lats, lons))) <= max(2, size // 500)
+
+        scalar_s = timed(lambda: scalar(lats, lons), args.repeat)
+        batch_s = timed(lambda: batch(lats, lons), args.repeat)
+        print(f"{size:>8} {scalar_s * 1e6:>10.0f} {batch_s * 1e6:>10.0f} "
+              f"{scalar_s / batch_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
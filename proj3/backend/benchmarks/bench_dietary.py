@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dietary restriction checks per meal.
+
+Compares the original approach (rebuild the rules dict on every call,
+then scan each excluded term against the ingredient string and each
+excluded allergen against each meal allergen) with the compiled
+``DietaryMatcher`` regexes from ``app.dietary``. Three workloads:
+
+- one restriction per meal (``check_meal_matches_dietary_restriction``)
+- a user's three restrictions together (``meal_matches_restrictions``)
+- all eight restrictions, as ``dietary_tags`` computes on every write
+
+Usage (from proj3/backend):
+    python benchmarks/bench_dietary.py [--meals 5000] [--repeat 5]
+"""
+import argparse
+import copy
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.dietary import (  # noqa: E402
+    DIETARY_RESTRICTIONS,
+    DIETARY_RULES,
+    check_meal_matches_dietary_restriction,
+    dietary_tags,
+    meal_matches_restrictions,
+)
+
+USER_RESTRICTIONS = ["vegetarian", "gluten-free", "nut-free"]
+WORDS = [
+    "chicken", "rice", "broccoli", "tofu", "quinoa", "spinach", "pasta", "tomato",
+    "basil", "garlic", "olive oil", "salmon", "lemon", "potato", "black beans",
+    "corn", "salsa", "cheddar cheese", "butter", "onion", "carrot", "ginger",
+    "soy sauce", "sesame", "honey", "almonds", "flour", "eggs", "mushrooms", "pepper",
+]
+ALLERGENS = ["milk", "eggs", "wheat", "soy", "peanuts", "tree nuts", "fish", "shellfish"]
+
+
+def legacy_exclusions(restriction):
+    # The original function built this dict literal on every call
+    rules = copy.deepcopy(DIETARY_RULES)
+    return rules.get(restriction.lower(), {"ingredients": [], "allergens": []})
+
+
+def legacy_check(meal, restriction):
+    exclusions = legacy_exclusions(restriction)
+    meal_allergens = meal.get("allergen_info", {}).get("contains", [])
+    for allergen in exclusions["allergens"]:
+        if any(allergen.lower() in ma.lower() for ma in meal_allergens):
+            return False
+    text = (meal.get("ingredients") or "").lower()
+    for term in exclusions["ingredients"]:
+        if term in text:
+            return False
+    return True
+
+
+def sample_meals(count, rng):
+    return [
+        {
+            "ingredients": ", ".join(rng.sample(WORDS, rng.randint(3, 8))),
+            "allergen_info": {"contains": rng.sample(ALLERGENS, rng.randint(0, 3))},
+        }
+        for _ in range(count)
+    ]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--meals", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    meals = sample_meals(args.meals, random.Random(42))
+
+    workloads = [
+        (
+            "one restriction",
+            lambda: [legacy_check(m, "vegan") for m in meals],
+            lambda: [check_meal_matches_dietary_restriction(m, "vegan") for m in meals],
+        ),
+        (
+            "user's 3 restrictions",
+            lambda: [all(legacy_check(m, r) for r in USER_RESTRICTIONS) for m in meals],
+            lambda: [meal_matches_restrictions(m, USER_RESTRICTIONS) for m in meals],
+        ),
+        (
+            "dietary_tags (all 8)",
+            lambda: [[r for r in DIETARY_RESTRICTIONS if legacy_check(m, r)] for m in meals],
+            lambda: [dietary_tags(m) for m in meals],
+        ),
+    ]
+
+    print(f"{args.meals} meals")
+    print(f"{'workload':<24} {'legacy us/meal':>15} {'compiled us/meal':>17} {'speedup':>8}")
+    for name, legacy, compiled in workloads:
+        assert legacy() == compiled()
+        legacy_s = timed(legacy, args.repeat)
+        compiled_s = timed(compiled, args.repeat)
+        per_meal = 1e6 / args.meals
+        print(f"{name:<24} {legacy_s * per_meal:>15.2f} {compiled_s * per_meal:>17.2f} "
+              f"{legacy_s / compiled_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
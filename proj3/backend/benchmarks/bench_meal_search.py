@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark: BM25 search from the in-process index vs scanning every meal.
+
+The scan baseline is what clients do today without a search endpoint:
+walk every meal and keep those whose searchable text contains a query
+word, then sort by how many words matched. The index answers the same
+queries ranked by BM25, with and without a price/cuisine filter, and
+returns the first page of 20.
+
+Usage (from proj3/backend):
+    python benchmarks/bench_meal_search.py [--sizes 10000,100000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+
+from app.meal_index import point_filter  # noqa: E402
+from app.search_index import FIELD_WEIGHTS, MealSearchIndex, search_terms  # noqa: E402
+
+LIMIT = 20
+CUISINES = ["Italian", "Mexican", "Chinese", "Indian", "Thai", "American", "French", "Korean"]
+DISHES = [
+    "curry", "tacos", "lasagna", "dumplings", "burrito", "ramen", "pho", "stew",
+    "salad", "soup", "pizza", "risotto", "biryani", "bibimbap", "casserole", "noodles",
+]
+WORDS = [
+    "chicken", "rice", "cheese", "garlic", "tomato", "onion", "beef", "spicy",
+    "homemade", "fresh", "beans", "pepper", "tofu", "ginger", "creamy", "lemon",
+    "potato", "basil", "mushroom", "spinach", "pork", "coconut", "noodles", "crispy",
+    "shrimp", "lentils", "carrot", "corn", "avocado", "sesame", "smoky", "hearty",
+]
+# Word frequencies in real listings are Zipfian: a few words are everywhere,
+# most are rare. Tail words stand in for the long tail of ingredients/names.
+VOCABULARY = WORDS + [f"word{i}" for i in range(3000)]
+ZIPF = [1 / (rank + 1) ** 1.1 for rank in range(len(VOCABULARY))]
+QUERIES = ["curry", "spicy chicken curry", "creamy mushroom risotto", "shrimp", "word250"]
+
+
+def make_meals(count, rng):
+    meals = []
+    for _ in range(count):
+        words = rng.choices(VOCABULARY, ZIPF, k=10)
+        meals.append(
+            {
+                "_id": ObjectId(),
+                "seller_id": ObjectId(),
+                "status": "available",
+                "title": f"{' '.join(words[:2]).title()} {rng.choice(DISHES).title()}",
+                "description": " ".join(rng.choices(VOCABULARY, ZIPF, k=rng.randint(10, 30))),
+                "ingredients": ", ".join(words[2:]),
+                "cuisine_type": rng.choice(CUISINES),
+                "meal_type": "dinner",
+                "sale_price": round(rng.uniform(5, 30), 2),
+            }
+        )
+    return meals
+
+
+def scan(meals, text):
+    terms = set(search_terms(text))
+    hits = []
+    for meal in meals:
+        words = set(" ".join(str(meal.get(f) or "") for f in FIELD_WEIGHTS).lower().split())
+        found = sum(1 for w in words if w.rstrip("s") in terms or w in terms)
+        if found:
+            hits.append((found, meal["_id"]))
+    hits.sort(key=lambda item: -item[0])
+    return hits[:LIMIT]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(42)
+    match = point_filter({"cuisine_type": "Thai", "sale_price": {"$lte": 12}})
+
+    print(f"{'meals':>7} {'build s':>8} {'query':<26} {'scan ms':>8} "
+          f"{'bm25 ms':>8} {'filtered ms':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        meals = make_meals(size, rng)
+        index = MealSearchIndex()
+        start = time.perf_counter()
+        for meal in meals:
+            index.upsert(meal)
+        build = time.perf_counter() - start
+
+        for text in QUERIES:
+            def ranked():
+                return list(islice(index.search(text), LIMIT))
+
+            def filtered():
+                return list(islice(index.search(text, match=match), LIMIT))
+
+            assert len(ranked()) == len(scan(meals, text))
+            scan_s = timed(lambda: scan(meals, text), max(1, args.repeat // 2))
+            ranked_s = timed(ranked, args.repeat * 4)
+            filtered_s = timed(filtered, args.repeat * 4)
+            print(f"{size:>7} {build:>8.2f} {text:<26} {scan_s * 1e3:>8.1f} "
+                  f"{ranked_s * 1e3:>8.2f} {filtered_s * 1e3:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
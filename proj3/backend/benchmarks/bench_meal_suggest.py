@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: type-ahead suggestions from the prefix index vs scanning meals.
+
+The scan baseline is what a keystroke costs without the index: walk every
+meal, collect titles, cuisines and ingredients with a word starting with
+the prefix, and rank them by the views of their meals. The index answers
+the same prefixes after a full build, and again after ``--writes`` new
+titles have landed in its pending side list. The memory column is the
+tracemalloc growth of building the index.
+
+Usage (from proj3/backend):
+    python benchmarks/bench_meal_suggest.py [--sizes 10000,100000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+
+from app.suggest_index import MealSuggestIndex, _meal_suggestions, _word_starts  # noqa: E402
+
+LIMIT = 10
+CUISINES = ["Italian", "Mexican", "Chinese", "Indian", "Thai", "American", "French", "Korean"]
+DISHES = [
+    "curry", "tacos", "lasagna", "dumplings", "burrito", "ramen", "pho", "stew",
+    "salad", "soup", "pizza", "risotto", "biryani", "bibimbap", "casserole", "noodles",
+]
+WORDS = [
+    "chicken", "rice", "cheese", "garlic", "tomato", "onion", "beef", "spicy",
+    "homemade", "fresh", "beans", "pepper", "tofu", "ginger", "creamy", "lemon",
+    "potato", "basil", "mushroom", "spinach", "pork", "coconut", "noodles", "crispy",
+]
+# Tail words stand in for the long tail of dish names and ingredients
+VOCABULARY = WORDS + [f"{w}{i}" for i in range(2000) for w in ("mo", "ka")]
+ZIPF = [1 / (rank + 1) ** 1.1 for rank in range(len(VOCABULARY))]
+PREFIXES = ["c", "ch", "chicken c", "ri", "mo1", "ka1999", "zz"]
+
+
+def make_meals(count, rng):
+    meals = []
+    for _ in range(count):
+        words = rng.choices(VOCABULARY, ZIPF, k=6)
+        meals.append(
+            {
+                "_id": ObjectId(),
+                "seller_id": ObjectId(),
+                "status": "available",
+                "title": f"{' '.join(words[:2]).title()} {rng.choice(DISHES).title()}",
+                "ingredients": ", ".join(words[2:]),
+                "cuisine_type": rng.choice(CUISINES),
+                "views": int(rng.paretovariate(1.2)),
+            }
+        )
+    return meals
+
+
+def scan(meals, prefix):
+    weights = {}
+    for meal in meals:
+        for kind, text, key in set(_meal_suggestions(meal)):
+            if any(start.startswith(prefix) for start in _word_starts(key)):
+                weights[(kind, key)] = weights.get((kind, key), 0) + 1 + meal["views"]
+    return sorted(weights.items(), key=lambda item: -item[1])[:LIMIT]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+class _Meals:
+    """Just enough of a Motor database for MealSuggestIndex.rebuild"""
+
+    def __init__(self, meals):
+        self.meals = self
+        self.transactions = self
+        self._rows = meals
+
+    def aggregate(self, pipeline):
+        return self._iterate([])
+
+    def find(self, *args, **kwargs):
+        return self._iterate(self._rows)
+
+    async def _iterate(self, rows):
+        for row in rows:
+            yield row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--writes", type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'meals':>7} {'build s':>8} {'memory MB':>10} {'prefix':<10} {'scan ms':>8} "
+          f"{'index ms':>9} {'+writes ms':>11}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        meals = make_meals(size + args.writes, rng)
+        index = MealSuggestIndex()
+        tracemalloc.start()
+        start = time.perf_counter()
+        asyncio.run(index.rebuild(_Meals(meals[:size])))
+        build = time.perf_counter() - start
+        memory = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop()
+
+        built = {}
+        for prefix in PREFIXES:
+            found = index.suggest(prefix, LIMIT)
+            weights = [weight for _, weight in scan(meals[:size], prefix)]
+            assert [s.weight for s in found] == weights
+            built[prefix] = timed(lambda: index.suggest(prefix, LIMIT), args.repeat)
+        for meal in meals[size:]:
+            index.upsert(meal)
+
+        for prefix in PREFIXES:
+            scan_s = timed(lambda: scan(meals, prefix), 1)
+            written_s = timed(lambda: index.suggest(prefix, LIMIT), args.repeat)
+            print(f"{size:>7} {build:>8.2f} {memory:>10.1f} {prefix:<10} {scan_s * 1e3:>8.1f} "
+                  f"{built[prefix] * 1e3:>9.3f} {written_s * 1e3:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
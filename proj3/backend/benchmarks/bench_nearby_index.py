@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark: "meals near me" from the in-process index vs a distance loop.
+
+The loop baseline is what location search did before: run
+``calculate_distance`` for every meal, keep those inside the radius and
+sort by distance. The index answers the same radius query and a
+nearest-20 query (no radius) from its grid. Meals are spread over 40
+metro areas in the continental US.
+
+Usage (from proj3/backend):
+    python benchmarks/bench_nearby_index.py [--sizes 10000,100000,1000000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+
+from app.meal_index import MealPoint, NearbyMealIndex  # noqa: E402
+from app.routes.meal_routes import calculate_distance  # noqa: E402
+
+USER = (35.7796, -78.6382)
+RADIUS_MILES = 10
+LIMIT = 20
+METERS_PER_MILE = 1609.344
+
+
+def meal_points(count, rng):
+    metros = [(rng.uniform(26, 48), rng.uniform(-122, -70)) for _ in range(39)] + [USER]
+    points = []
+    for _ in range(count):
+        lat, lon = rng.choice(metros)
+        points.append(
+            MealPoint(
+                str(ObjectId()), "seller", lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3),
+                12.0, "Italian", "dinner", frozenset(),
+            )
+        )
+    return points
+
+
+def distance_loop(points):
+    lat, lon = USER
+    nearby = []
+    for point in points:
+        distance = calculate_distance(lat, lon, point.lat, point.lon)
+        if distance <= RADIUS_MILES:
+            nearby.append((distance, point))
+    nearby.sort(key=lambda item: item[0])
+    return nearby[:LIMIT]
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'meals':>8} {'build s':>8} {'loop ms':>9} {'radius ms':>10} "
+          f"{'knn-20 ms':>10} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        points = meal_points(size, rng)
+        index = NearbyMealIndex()
+        start = time.perf_counter()
+        for point in points:
+            index._place(index._cells, index._points, point)
+        build = time.perf_counter() - start
+
+        def radius_query():
+            return list(islice(
+                index.nearest(*USER, max_distance=RADIUS_MILES * METERS_PER_MILE), LIMIT
+            ))
+
+        def knn_query():
+            return list(islice(index.nearest(*USER), LIMIT))
+
+        # Both find a full page of meals around the user
+        assert len(radius_query()) == len(distance_loop(points)) == LIMIT
+        loop_s = timed(lambda: distance_loop(points), args.repeat)
+        radius_s = timed(radius_query, args.repeat * 20)
+        knn_s = timed(knn_query, args.repeat * 20)
+        print(f"{size:>8} {build:>8.2f} {loop_s * 1e3:>9.1f} {radius_s * 1e3:>10.2f} "
+              f"{knn_s * 1e3:>10.2f} {loop_s / radius_s:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency of an unrelated endpoint (/health) during a login storm.
+
+Compares bcrypt verification run inline on the event loop (the old
+behaviour of `login`) against the bounded worker pool used by
+`verify_password_async`.
+
+Usage (from proj3/backend):
+    python benchmarks/bench_password_pool.py [--logins 40] [--interval 0.01]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from httpx import AsyncClient, ASGITransport  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.password_pool import password_pool, PasswordPoolSaturated  # noqa: E402
+from app.utils import hash_password, verify_password, verify_password_async  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def inline_login(hashed, delay):
+    # Mirrors the old handler: a synchronous bcrypt call inside a coroutine
+    await asyncio.sleep(delay)
+    verify_password("SecurePass123!", hashed)
+
+
+async def pooled_login(hashed, delay):
+    await asyncio.sleep(delay)
+    try:
+        await verify_password_async("SecurePass123!", hashed)
+    except PasswordPoolSaturated:
+        pass
+
+
+async def timed_get(client, samples, scheduled_at):
+    await client.get("/health")
+    samples.append((time.perf_counter() - scheduled_at) * 1000)
+
+
+async def probe(client, samples, stop, interval):
+    # Probes follow a fixed schedule and latency is measured from the time a
+    # probe was due, so requests that arrive while the loop is blocked count
+    # their wait (avoids coordinated omission)
+    pending = []
+    start = time.perf_counter()
+    due = 0
+    while not stop.is_set():
+        now = time.perf_counter()
+        while start + due * interval <= now:
+            scheduled_at = start + due * interval
+            pending.append(
+                asyncio.ensure_future(timed_get(client, samples, scheduled_at))
+            )
+            due += 1
+        await asyncio.sleep(max(0.0, start + due * interval - time.perf_counter()))
+    await asyncio.gather(*pending)
+
+
+async def run_scenario(name, login_fn, hashed, logins, interval):
+    samples = []
+    stop = asyncio.Event()
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        probe_task = asyncio.ensure_future(probe(client, samples, stop, interval))
+        start = time.perf_counter()
+        # Logins arrive spread out over the storm, like real traffic
+        await asyncio.gather(
+            *(login_fn(hashed, i * interval * 2) for i in range(logins))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    print(
+        f"{name:<8} logins={logins} storm={elapsed:.2f}s probes={len(samples)} "
+        f"/health p50={statistics.median(samples):.2f}ms "
+        f"p99={percentile(samples, 99):.2f}ms max={max(samples):.2f}ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--interval", type=float, default=0.01)
+    args = parser.parse_args()
+
+    hashed = hash_password("SecurePass123!")
+    await run_scenario("inline", inline_login, hashed, args.logins, args.interval)
+    await run_scenario("pooled", pooled_login, hashed, args.logins, args.interval)
+    print(f"pool stats: {password_pool.stats()}")
+    password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-item cost of serializing list responses.
+
+Compares FastAPI's handling of ``response_model=List[MealResponse]``
+(re-validate, dump to dicts, stdlib json) with the cached TypeAdapter
+``dump_json`` path used by ``model_list_response``. Building the
+MealResponse objects is the same on both paths and reported separately.
+
+Usage (from proj3/backend):
+    python benchmarks/bench_serialization.py [--sizes 20,100,1000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.models import MealResponse  # noqa: E402
+from app.routes.meal_routes import meal_to_response  # noqa: E402
+from app.serialization import dump_model_list  # noqa: E402
+
+SELLER = {"full_name": "Test Seller", "stats": {"average_rating": 4.2}}
+
+
+def meal_docs(count):
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "seller_id": ObjectId(),
+            "title": f"Homemade meal {i}",
+            "description": "Fresh pasta with tomato sauce and basil",
+            "cuisine_type": "Italian",
+            "meal_type": "dinner",
+            "ingredients": "pasta, tomato, basil, garlic, olive oil",
+            "photos": ["/static/uploads/1.jpg", "/static/uploads/2.jpg"],
+            "allergen_info": {"contains": ["gluten"], "may_contain": ["nuts"]},
+            "nutrition_info": "Calories: 450",
+            "portion_size": "Serves 2",
+            "available_for_sale": True,
+            "sale_price": 12.0,
+            "available_for_swap": True,
+            "swap_preferences": ["Any vegetarian meal"],
+            "status": "available",
+            "preparation_date": now,
+            "expires_date": now + timedelta(days=2),
+            "pickup_instructions": "Ring doorbell",
+            "average_rating": 4.5,
+            "total_reviews": 12,
+            "views": 40,
+            "created_at": now,
+            "updated_at": now,
+            "seller_location": {"latitude": 35.77, "longitude": -78.63},
+        }
+        for i in range(count)
+    ]
+
+
+async def fastapi_default(field, items):
+    content = await serialize_response(field=field, response_content=items)
+    return JSONResponse(content).body
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="20,100,1000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    field = create_response_field(name="Response_get_meals", type_=List[MealResponse])
+    loop = asyncio.new_event_loop()
+
+    print(f"{'items':>6} {'build us/item':>14} {'default us/item':>16} "
+          f"{'fast us/item':>13} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        docs = meal_docs(size)
+        items = [meal_to_response(doc, SELLER, 35.9, -78.9) for doc in docs]
+        # Both paths must produce the same document
+        assert json.loads(loop.run_until_complete(fastapi_default(field, items))) == (
+            json.loads(dump_model_list(items, MealResponse))
+        )
+
+        build = timed(
+            lambda: [meal_to_response(doc, SELLER, 35.9, -78.9) for doc in docs],
+            args.repeat,
+        )
+        default = timed(
+            lambda: loop.run_until_complete(fastapi_default(field, items)), args.repeat
+        )
+        fast = timed(lambda: dump_model_list(items, MealResponse), args.repeat)
+
+        per_item = 1e6 / size
+        print(f"{size:>6} {build * per_item:>14.1f} {default * per_item:>16.1f} "
+              f"{fast * per_item:>13.1f} {default / fast:>7.1f}x")
+
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
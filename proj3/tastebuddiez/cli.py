@@ -356,6 +356,129 @@ README.md
         sys.exit(1)
 
 
+def load_backend_module(name):
+    """Import ``app.<name>`` from the backend, adding backend/ to the path if needed"""
+    import importlib
+
+    try:
+        return importlib.import_module(f"app.{name}")
+    except ImportError:
+        sys.path.insert(0, str(get_project_root() / "backend"))
+        return importlib.import_module(f"app.{name}")
+
+
+def load_index_registry():
+    """Import the backend index registry"""
+    return load_backend_module("indexes")
+
+
+@cli.command()
+@click.option(
+    "--mongo-url",
+    default=lambda: os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+    help="MongoDB connection string (defaults to $MONGODB_URL)",
+)
+@click.option(
+    "--db",
+    "db_name",
+    default=lambda: os.getenv("DATABASE_NAME", "myapp"),
+    help="Database name (defaults to $DATABASE_NAME)",
+)
+@click.option("--apply", is_flag=True, help="Create any missing declared indexes")
+def indexes(mongo_url, db_name, apply):
+    """Compare declared MongoDB indexes with the live database"""
+    import asyncio
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    async def run():
+        registry = load_index_registry()
+        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        try:
+            db = client[db_name]
+            if apply:
+                for result in await registry.ensure_indexes(db):
+                    if result["error"]:
+                        click.secho(
+                            f"✗ {result['collection']}: {result['error']}", fg="red"
+                        )
+            return await registry.index_report(db)
+        finally:
+            client.close()
+
+    try:
+        report = asyncio.run(run())
+    except Exception as e:
+        click.secho(f"Error reading indexes: {e}", err=True)
+        sys.exit(1)
+
+    drift = False
+    for collection, diff in report.items():
+        if not (diff["missing"] or diff["extra"] or diff["unused"]):
+            click.secho(f"✓ {collection}", fg="green")
+            continue
+
+        drift = True
+        click.secho(f"{collection}", fg="yellow")
+        for spec in diff["missing"]:
+            click.secho(f"  missing: {spec['name']} {spec['options'] or ''}", fg="red")
+        for spec in diff["extra"]:
+            click.secho(f"  undeclared: {spec['name']}", fg="yellow")
+        for name in diff["unused"]:
+            click.secho(f"  unused since restart: {name}", fg="yellow")
+
+    sys.exit(1 if drift else 0)
+
+
+@cli.command()
+@click.argument("name", required=False)
+@click.option(
+    "--mongo-url",
+    default=lambda: os.getenv("MONGODB_URL", "mongodb://localhost:27017"),
+    help="MongoDB connection string (defaults to $MONGODB_URL)",
+)
+@click.option(
+    "--db",
+    "db_name",
+    default=lambda: os.getenv("DATABASE_NAME", "myapp"),
+    help="Database name (defaults to $DATABASE_NAME)",
+)
+@click.option("--batch-size", default=500, show_default=True, help="Documents per batch")
+@click.option("--restart", is_flag=True, help="Ignore saved progress and start over")
+def backfill(name, mongo_url, db_name, batch_size, restart):
+    """Run a resumable data backfill (omit NAME to list them)"""
+    import asyncio
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    backfills = load_backend_module("backfills")
+    if name is None:
+        for backfill_name, job in backfills.BACKFILLS.items():
+            click.echo(f"{backfill_name:<20} {job.description}")
+        return
+    if name not in backfills.BACKFILLS:
+        click.secho(f"Unknown backfill: {name}", fg="red", err=True)
+        sys.exit(1)
+
+    async def run():
+        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=5000)
+        try:
+            return await backfills.run_backfill(
+                client[db_name], backfills.BACKFILLS[name], batch_size, restart
+            )
+        finally:
+            client.close()
+
+    try:
+        progress = asyncio.run(run())
+    except Exception as e:
+        click.secho(f"Backfill failed (re-run to resume): {e}", err=True)
+        sys.exit(1)
+
+    click.secho(
+        f"✓ {name}: scanned {progress['scanned']}, updated {progress['updated']}",
+        fg="green",
+    )
+
+
 def main():
     """Main entry point"""
     cli()